@@ -0,0 +1 @@
+"""Performance benchmarks for jupyter_server_ai_tools. Run with ``pytest benchmarks``."""
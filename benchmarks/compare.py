@@ -0,0 +1,50 @@
+"""
+Compare two benchmark result files.
+
+Usage:
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 1.2]
+
+Prints the ratio of candidate to baseline median time for each benchmark, and exits
+with status 1 if any benchmark got slower by more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> dict[tuple[str, int], dict]:
+    with open(path) as f:
+        report = json.load(f)
+    return {(result["name"], result["tool_count"]): result for result in report["results"]}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.2,
+        help="Slowdown ratio above which a benchmark counts as a regression.",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = load(args.baseline)
+    candidate = load(args.candidate)
+    regressions = 0
+    for key in sorted(baseline.keys() & candidate.keys()):
+        ratio = candidate[key]["median"] / baseline[key]["median"]
+        flag = ""
+        if ratio > args.threshold:
+            regressions += 1
+            flag = "  REGRESSION"
+        name, tool_count = key
+        print(f"{name:<50} {tool_count:>7} tools  {ratio:6.2f}x{flag}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
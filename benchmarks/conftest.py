@@ -0,0 +1,102 @@
+import json
+import platform
+import statistics
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable
+
+import pytest
+
+import jupyter_server_ai_tools
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("benchmarks")
+    group.addoption(
+        "--bench-sizes",
+        default="10,1000,10000",
+        help="Comma separated tool counts of the synthetic registries (up to 100000).",
+    )
+    group.addoption(
+        "--bench-repeat", type=int, default=5, help="Number of timed runs per measurement."
+    )
+    group.addoption(
+        "--bench-output",
+        default="benchmark-results.json",
+        help="File the benchmark results are written to as JSON.",
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "tool_count" in metafunc.fixturenames:
+        sizes = [int(size) for size in metafunc.config.getoption("--bench-sizes").split(",")]
+        metafunc.parametrize("tool_count", sizes, ids=[f"{size}_tools" for size in sizes])
+
+
+class BenchmarkRecorder:
+    """Times operations and collects the results for the JSON report."""
+
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results: list[dict[str, Any]] = []
+
+    def measure(self, name: str, size: int, func: Callable[[], Any], number: int = 1):
+        timings = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            timings.append((time.perf_counter() - start) / number)
+        return self._record(name, size, timings, number=number)
+
+    def measure_once(self, name: str, size: int, func: Callable[[], Any]):
+        """Time a single call, for operations whose first run differs from later ones."""
+        start = time.perf_counter()
+        func()
+        return self._record(name, size, [time.perf_counter() - start], number=1)
+
+    async def measure_requests(
+        self, name: str, size: int, request: Callable[[], Awaitable[Any]], number: int = 100
+    ):
+        """Time `number` sequential requests, `repeat` times, and report latency percentiles."""
+        latencies = []
+        for _ in range(self.repeat * number):
+            start = time.perf_counter()
+            await request()
+            latencies.append(time.perf_counter() - start)
+        result = self._record(name, size, latencies, number=1)
+        quantiles = statistics.quantiles(latencies, n=100, method="inclusive")
+        result.update(p50=quantiles[49], p90=quantiles[89], p99=quantiles[98])
+        return result
+
+    def _record(self, name: str, size: int, timings: list[float], number: int):
+        median = statistics.median(timings)
+        result = {
+            "name": name,
+            "tool_count": size,
+            "runs": len(timings),
+            "number": number,
+            "min": min(timings),
+            "median": median,
+            "mean": statistics.fmean(timings),
+            "ops_per_sec": 1 / median if median else None,
+        }
+        self.results.append(result)
+        return result
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "version": jupyter_server_ai_tools.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "results": self.results,
+        }
+
+
+@pytest.fixture(scope="session")
+def bench(request):
+    recorder = BenchmarkRecorder(request.config.getoption("--bench-repeat"))
+    yield recorder
+    with open(request.config.getoption("--bench-output"), "w") as f:
+        json.dump(recorder.report(), f, indent=2)
@@ -0,0 +1,387 @@
+"""
+Replay a request trace against a Jupyter server and report throughput, latency and memory.
+
+Usage:
+    python -m benchmarks.loadgen trace.ndjson [--concurrency 32] [--rate 200] [--speed 1]
+    python -m benchmarks.loadgen --synthetic 10000 --concurrency 64 -- --allow-root
+
+Traces are recorded by running a server with ``--AIServerToolsApp.trace_file=trace.ndjson``.
+Requests are sent at the `--rate` given, or else with the spacing they were recorded
+with, sped up `--speed` times (0 sends them as fast as possible); at most
+`--concurrency` of them are in flight at once. Without `--url`, a local server is
+started with jupyter_server_ai_tools and the stub toolkit of ``tests.mock_extension``,
+and its resident memory is sampled while the trace is replayed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError, HTTPRequest
+
+from jupyter_server_ai_tools.tracing import read_trace
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Tail latencies reported for every kind of request.
+PERCENTILES = {"p50": 0.5, "p99": 0.99, "p999": 0.999}
+
+
+def synthetic_trace(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    """
+    Build a trace of agent-like traffic against the stub toolkit: mostly tool calls,
+    with listings, searches and small batches in between, spaced 5ms apart.
+    """
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        name = f"agent-{rng.randrange(1000)}"
+        roll = rng.random()
+        if roll < 0.6:
+            path = "api/toolkits/hello_toolkit/tools/say_hello"
+            body: Any = {"arguments": {"name": name}}
+        elif roll < 0.8:
+            path, body = "api/toolkits", None
+        elif roll < 0.9:
+            path, body = "api/tools/search?q=hello&limit=5", None
+        else:
+            path = "api/tools/batch"
+            call = {"toolkit": "hello_toolkit", "tool": "say_hello"}
+            body = {
+                "calls": [
+                    {"id": "a", **call, "arguments": {"name": name}},
+                    {"id": "b", **call, "arguments": {"name": {"$ref": "a"}}},
+                ]
+            }
+        entries.append(
+            {
+                "time": i * 0.005,
+                "method": "GET" if body is None else "POST",
+                "path": path,
+                "body": json.dumps(body) if body is not None else None,
+            }
+        )
+    return entries
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def request_kind(path: str) -> str:
+    path = path.partition("?")[0].strip("/")
+    if path.startswith("api/toolkits/") and "/tools/" in path:
+        return "invoke"
+    if path.startswith("api/toolkits"):
+        return "list"
+    if path.startswith("api/tools/"):
+        return path.split("/")[2]
+    return "other"
+
+
+def read_rss(pid: int) -> int | None:
+    """The resident memory of a process in bytes, or None if it can't be read."""
+    try:
+        import psutil
+    except ImportError:
+        pass
+    else:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+class LocalServer:
+    """A Jupyter server with the extension and the stub toolkit, in a child process."""
+
+    def __init__(self, server_args: list[str]):
+        self.server_args = server_args
+        self.token = secrets.token_hex(16)
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}/"
+        self.process: subprocess.Popen | None = None
+        self._directory = tempfile.TemporaryDirectory(prefix="jupyter-ai-tools-loadgen-")
+
+    def __enter__(self) -> "LocalServer":
+        config = {
+            "ServerApp": {
+                "port": self.port,
+                "ip": "127.0.0.1",
+                "open_browser": False,
+                "root_dir": self._directory.name,
+                "jpserver_extensions": {
+                    "jupyter_server_ai_tools": True,
+                    "tests.mock_extension": True,
+                },
+            },
+            "IdentityProvider": {"token": self.token},
+        }
+        config_path = Path(self._directory.name) / "jupyter_server_config.json"
+        config_path.write_text(json.dumps(config))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+        self._log = open(Path(self._directory.name) / "server.log", "wb")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "jupyter_server", f"--config={config_path}", *self.server_args],
+            cwd=REPO_ROOT,
+            env=env,
+            stdout=self._log,
+            stderr=subprocess.STDOUT,
+        )
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self._log.close()
+        self._directory.cleanup()
+
+    async def wait_until_ready(self, timeout: float = 60.0):
+        client = AsyncHTTPClient()
+        deadline = time.monotonic() + timeout
+        while True:
+            assert self.process is not None
+            if self.process.poll() is not None:
+                raise RuntimeError(f"The server exited:\n{self._log_tail()}")
+            try:
+                response = await client.fetch(
+                    self.url + "api/status",
+                    headers={"Authorization": f"token {self.token}"},
+                    raise_error=False,
+                )
+                if response.code == 200:
+                    return
+            except (OSError, HTTPClientError):
+                pass
+            if time.monotonic() > deadline:
+                raise RuntimeError(
+                    f"The server didn't start within {timeout:g} seconds:\n{self._log_tail()}"
+                )
+            await asyncio.sleep(0.2)
+
+    def _log_tail(self, lines: int = 20) -> str:
+        self._log.flush()
+        text = (Path(self._directory.name) / "server.log").read_text(errors="replace")
+        return "\n".join(text.splitlines()[-lines:])
+
+
+def _schedule(
+    entries: list[dict[str, Any]], rate: float | None, speed: float
+) -> Iterator[tuple[float, dict[str, Any]]]:
+    # Yield each request with the number of seconds after the start it is due.
+    first = entries[0].get("time", 0.0) if entries else 0.0
+    for index, entry in enumerate(entries):
+        if rate:
+            yield index / rate, entry
+        elif speed:
+            yield (entry.get("time", first) - first) / speed, entry
+        else:
+            yield 0.0, entry
+
+
+async def replay(
+    url: str,
+    token: str | None,
+    entries: list[dict[str, Any]],
+    concurrency: int = 32,
+    rate: float | None = None,
+    speed: float = 1.0,
+    server_pid: int | None = None,
+    rss_interval: float = 0.5,
+    request_timeout: float = 300.0,
+) -> dict[str, Any]:
+    """Replay the requests of a trace and return the report."""
+    AsyncHTTPClient.configure(None, max_clients=concurrency)
+    client = AsyncHTTPClient()
+    headers = {"Authorization": f"token {token}"} if token else {}
+    slots = asyncio.Semaphore(concurrency)
+    latencies: dict[str, list[float]] = {}
+    statuses: dict[str, int] = {}
+    rss_samples: list[tuple[float, int]] = []
+    start = time.perf_counter()
+
+    async def send(entry: dict[str, Any]):
+        body = entry.get("body")
+        request = HTTPRequest(
+            url + entry["path"].lstrip("/"),
+            method=entry["method"],
+            headers=headers,
+            body=(
+                body.encode() if body is not None else (b"" if entry["method"] == "POST" else None)
+            ),
+            request_timeout=request_timeout,
+        )
+        sent = time.perf_counter()
+        try:
+            response = await client.fetch(request, raise_error=False)
+            status = str(response.code)
+        except HTTPClientError as e:
+            # Timeouts and closed connections are raised even with raise_error=False, as
+            # errors with code 599.
+            status = str(e.code)
+        except Exception as e:
+            status = type(e).__name__
+        finally:
+            slots.release()
+        latencies.setdefault(request_kind(entry["path"]), []).append(time.perf_counter() - sent)
+        statuses[status] = statuses.get(status, 0) + 1
+
+    async def sample_rss():
+        while server_pid is not None:
+            rss = read_rss(server_pid)
+            if rss is not None:
+                rss_samples.append((round(time.perf_counter() - start, 3), rss))
+            await asyncio.sleep(rss_interval)
+
+    sampler = asyncio.ensure_future(sample_rss())
+    tasks = []
+    for due, entry in _schedule(entries, rate, speed):
+        delay = start + due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await slots.acquire()
+        tasks.append(asyncio.ensure_future(send(entry)))
+    await asyncio.gather(*tasks)
+    duration = time.perf_counter() - start
+    sampler.cancel()
+    if server_pid is not None and (rss := read_rss(server_pid)) is not None:
+        rss_samples.append((round(duration, 3), rss))
+
+    all_latencies = sorted(latency for values in latencies.values() for latency in values)
+    return {
+        "requests": len(all_latencies),
+        "duration": duration,
+        "throughput": len(all_latencies) / duration if duration else 0.0,
+        "statuses": statuses,
+        "latency": {
+            kind: _summarize(sorted(values))
+            for kind, values in sorted(latencies.items()) + [("all", all_latencies)]
+        },
+        "rss": {
+            "peak": max((rss for _, rss in rss_samples), default=None),
+            "samples": rss_samples,
+        },
+    }
+
+
+def _summarize(sorted_values: list[float]) -> dict[str, float]:
+    summary: dict[str, float] = {"count": len(sorted_values)}
+    for name, fraction in PERCENTILES.items():
+        summary[name] = percentile(sorted_values, fraction)
+    summary["max"] = sorted_values[-1] if sorted_values else 0.0
+    return summary
+
+
+def print_report(report: dict[str, Any]):
+    print(
+        f"{report['requests']} requests in {report['duration']:.2f}s: "
+        f"{report['throughput']:.1f} requests/s"
+    )
+    print("Statuses: " + ", ".join(f"{k}: {v}" for k, v in sorted(report["statuses"].items())))
+    print(f"{'':<10} {'count':>7} " + " ".join(f"{name:>9}" for name in [*PERCENTILES, "max"]))
+    for kind, summary in report["latency"].items():
+        times = " ".join(f"{summary[name] * 1000:>7.1f}ms" for name in [*PERCENTILES, "max"])
+        print(f"{kind:<10} {summary['count']:>7} {times}")
+    samples = report["rss"]["samples"]
+    if samples:
+        first, peak, last = samples[0][1], report["rss"]["peak"], samples[-1][1]
+        print(
+            f"Server RSS: {first / 2**20:.1f} MiB at start, {peak / 2**20:.1f} MiB peak, "
+            f"{last / 2**20:.1f} MiB at end ({len(samples)} samples)"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    # Arguments after "--" are for the local server.
+    split = argv.index("--") if "--" in argv else len(argv)
+    argv, server_args = argv[:split], argv[split + 1 :]
+
+    parser = argparse.ArgumentParser(
+        description=__doc__.split("\n\n")[1],
+        epilog="Arguments after '--' are passed on to the local server.",
+    )
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("trace", nargs="?", help="A trace file recorded with 'trace_file'.")
+    source.add_argument(
+        "--synthetic", type=int, metavar="N", help="Replay N requests of synthetic traffic."
+    )
+    parser.add_argument("--concurrency", type=int, default=32, help="Requests in flight at most.")
+    parser.add_argument("--rate", type=float, help="Requests per second, instead of the trace's.")
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="Replay speed-up of the trace's own timing."
+    )
+    parser.add_argument("--url", help="Base URL of a running server, instead of a local one.")
+    parser.add_argument("--token", default=os.environ.get("JUPYTER_TOKEN"), help="Its token.")
+    parser.add_argument(
+        "--rss-interval", type=float, default=0.5, help="Seconds between memory samples."
+    )
+    parser.add_argument("--output", help="File the report is written to as JSON.")
+    args = parser.parse_args(argv)
+
+    if args.synthetic is not None:
+        entries = synthetic_trace(args.synthetic)
+    else:
+        entries = sorted(read_trace(args.trace), key=lambda entry: entry.get("time", 0.0))
+
+    async def run() -> dict[str, Any]:
+        if args.url:
+            url = args.url.rstrip("/") + "/"
+            return await replay(url, args.token, entries, args.concurrency, args.rate, args.speed)
+        with LocalServer(server_args) as server:
+            await server.wait_until_ready()
+            assert server.process is not None
+            return await replay(
+                server.url,
+                server.token,
+                entries,
+                args.concurrency,
+                args.rate,
+                args.speed,
+                server_pid=server.process.pid,
+                rss_interval=args.rss_interval,
+            )
+
+    report = asyncio.run(run())
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
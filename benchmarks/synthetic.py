@@ -0,0 +1,39 @@
+from jupyter_server_ai_tools.models import Tool, Toolkit, ToolkitRegistry, ToolSet
+
+
+def synthetic_tool(path: str, limit: int = 10, recursive: bool = False):
+    """A synthetic tool used to populate benchmark registries."""
+    return path
+
+
+def build_toolkits(tool_count: int, tools_per_toolkit: int = 100) -> list[Toolkit]:
+    """
+    Build toolkits holding `tool_count` tools in total.
+
+    Tools cycle through every combination of capability flags, so capability
+    filters match about the same share of tools at every size.
+    """
+    toolkits = []
+    for start in range(0, tool_count, tools_per_toolkit):
+        tools = ToolSet()
+        for i in range(start, min(start + tools_per_toolkit, tool_count)):
+            tools.add(
+                Tool(
+                    callable=synthetic_tool,
+                    name=f"tool_{i}",
+                    description=f"Synthetic tool number {i}.",
+                    read=bool(i & 1),
+                    write=bool(i & 2),
+                    execute=bool(i & 4),
+                    delete=bool(i & 8),
+                )
+            )
+        toolkits.append(Toolkit(name=f"toolkit_{start // tools_per_toolkit}", tools=tools))
+    return toolkits
+
+
+def build_registry(tool_count: int, tools_per_toolkit: int = 100) -> ToolkitRegistry:
+    registry = ToolkitRegistry()
+    for toolkit in build_toolkits(tool_count, tools_per_toolkit):
+        registry.register_toolkit(toolkit)
+    return registry
@@ -0,0 +1,72 @@
+import pytest
+from tornado.httpclient import HTTPClientError
+
+from .synthetic import build_toolkits
+
+
+@pytest.fixture
+def jp_server_config():
+    return {"ServerApp": {"jpserver_extensions": {"jupyter_server_ai_tools": True}}}
+
+
+@pytest.fixture
+def toolkit_registry(jp_serverapp):
+    return jp_serverapp.web_app.settings["toolkit_registry"]
+
+
+async def test_get_toolkits(bench, jp_fetch, toolkit_registry, tool_count):
+    for toolkit in build_toolkits(tool_count):
+        toolkit_registry.register_toolkit(toolkit)
+
+    response = await jp_fetch("api", "toolkits")
+    etag = response.headers["Etag"]
+
+    async def not_modified():
+        with pytest.raises(HTTPClientError):
+            await jp_fetch("api", "toolkits", headers={"If-None-Match": etag})
+
+    number = 20 if tool_count > 1000 else 100
+    await bench.measure_requests(
+        "GET /api/toolkits", tool_count, lambda: jp_fetch("api", "toolkits"), number=number
+    )
+    await bench.measure_requests(
+        "GET /api/toolkits[gzip]",
+        tool_count,
+        lambda: jp_fetch(
+            "api", "toolkits", headers={"Accept-Encoding": "gzip"}, decompress_response=False
+        ),
+        number=number,
+    )
+    await bench.measure_requests("GET /api/toolkits[304]", tool_count, not_modified, number=number)
+    await bench.measure_requests(
+        "GET /api/toolkits?name=toolkit_0&any_of=read",
+        tool_count,
+        lambda: jp_fetch("api", "toolkits", params={"name": "toolkit_0", "any_of": "read"}),
+        number=number,
+    )
+
+
+async def test_register_with_the_app(bench, toolkit_registry, tool_count):
+    # Registering through the app also updates its search index on every change.
+    toolkits = build_toolkits(tool_count, tools_per_toolkit=1)
+
+    def register():
+        for toolkit in toolkits:
+            toolkit_registry.register_toolkit(toolkit)
+
+    def unregister():
+        for toolkit in toolkits:
+            toolkit_registry.unregister_toolkit(toolkit.name)
+
+    bench.measure_once("app.register_toolkit[1 tool each]", tool_count, register)
+    bench.measure_once("app.unregister_toolkit[1 tool each]", tool_count, unregister)
+    bench.measure_once(
+        "app.register_toolkits[1 tool each]",
+        tool_count,
+        lambda: toolkit_registry.register_toolkits(toolkits),
+    )
+    # The first search indexes the parameter names left out at registration.
+    bench.measure_once(
+        "app.search_tools[first]", tool_count, lambda: toolkit_registry.search_tools("path")
+    )
+    bench.measure("app.search_tools", tool_count, lambda: toolkit_registry.search_tools("path"))
@@ -0,0 +1,70 @@
+from jupyter_server_ai_tools.models import Capability, ToolkitRegistry
+
+from .synthetic import build_registry, build_toolkits
+
+
+def test_register_toolkit(bench, tool_count):
+    toolkits = build_toolkits(tool_count)
+
+    def register():
+        registry = ToolkitRegistry()
+        for toolkit in toolkits:
+            registry.register_toolkit(toolkit)
+
+    bench.measure("register_toolkit", tool_count, register)
+
+
+def test_register_small_toolkits(bench, tool_count):
+    # Many one-tool toolkits, so the cost of each registration dominates.
+    toolkits = build_toolkits(tool_count, tools_per_toolkit=1)
+
+    def register():
+        registry = ToolkitRegistry()
+        for toolkit in toolkits:
+            registry.register_toolkit(toolkit)
+
+    def register_all():
+        ToolkitRegistry().register_toolkits(toolkits)
+
+    bench.measure("register_toolkit[1 tool each]", tool_count, register)
+    bench.measure("register_toolkits[1 tool each]", tool_count, register_all)
+
+
+def test_get_toolkit(bench, tool_count):
+    registry = build_registry(tool_count)
+    name = "toolkit_0"
+
+    bench.measure("get_toolkit", tool_count, lambda: registry.get_toolkit(name), number=1000)
+    bench.measure(
+        "get_toolkit[read]",
+        tool_count,
+        lambda: registry.get_toolkit(name, read=True),
+        number=1000,
+    )
+    bench.measure(
+        "get_toolkit[any_of=read|write]",
+        tool_count,
+        lambda: registry.get_toolkit(name, any_of=Capability.READ | Capability.WRITE),
+        number=1000,
+    )
+
+
+def test_list_toolkits(bench, tool_count):
+    registry = build_registry(tool_count)
+
+    bench.measure("list_toolkits", tool_count, registry.list_toolkits, number=10)
+    bench.measure(
+        "iter_toolkits[all_of=execute]",
+        tool_count,
+        lambda: list(registry.iter_toolkits(all_of=Capability.EXECUTE)),
+    )
+
+
+def test_model_dump_json(bench, tool_count):
+    registry = build_registry(tool_count)
+    # The first dump also derives every tool's input schema; time that separately.
+    bench.measure_once(
+        "ToolkitSet.model_dump_json[cold]", tool_count, registry.toolkits.model_dump_json
+    )
+    bench.measure("ToolkitSet.model_dump_json", tool_count, registry.toolkits.model_dump_json)
+    bench.measure("get_listing[cached]", tool_count, registry.get_listing, number=1000)
@@ -1,35 +1,730 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Iterable, Iterator
+
+from jupyter_core.paths import jupyter_data_dir
 from jupyter_server.extension.application import ExtensionApp
+from jupyter_server.utils import url_path_join
+from traitlets import Bool, Dict, Float, Int, Unicode, default
 
-from .handlers import ToolkitHandler
-from .models import Toolkit, ToolkitRegistry
+from .batch import BatchCall, BatchError, BatchResult, parse_batch, run_batch
+from .blobs import BlobStore, as_buffer
+from .cache import CacheStats, ResultCache
+from .coalescing import CallCoalescer
+from .discovery import discover_toolkits, revalidate_toolkits
+from .execution import ToolExecutor, check_arguments, effective_timeout, run_with_timeout
+from .formats import DEFAULT_FORMAT, render
+from .handlers import (
+    ToolBatchHandler,
+    ToolBlobHandler,
+    ToolInvocationHandler,
+    ToolkitHandler,
+    ToolkitWebSocketHandler,
+    ToolMetricsHandler,
+    ToolProfileHandler,
+    ToolProfilesHandler,
+    ToolSearchHandler,
+)
+from .manifest_cache import ManifestCache
+from .metrics import ToolMetrics
+from .models import (
+    Capability,
+    FrozenToolkitSet,
+    RegistryChange,
+    Tool,
+    Toolkit,
+    ToolkitListing,
+    ToolkitRegistry,
+    ToolkitView,
+)
+from .profiling import CallProfile, CallProfiler
+from .scheduling import DEFAULT_PRIORITIES, ToolScheduler
+from .search import SearchHit, ToolSearchIndex
+from .tracing import TraceRecorder
 
 
 class AIServerToolsApp(ExtensionApp):
-    name = "jupyter_server_ai_tools"  
+    name = "jupyter_server_ai_tools"
     load_other_extensions = True
 
     handlers = [
         (r"api/toolkits", ToolkitHandler),
+        (r"api/toolkits/ws", ToolkitWebSocketHandler),
+        (r"api/tools/blobs/([0-9a-f]{64})", ToolBlobHandler),
+        (r"api/tools/batch", ToolBatchHandler),
+        (r"api/tools/metrics", ToolMetricsHandler),
+        (r"api/tools/profiles", ToolProfilesHandler),
+        (r"api/tools/profiles/([0-9]+)", ToolProfileHandler),
+        (r"api/tools/search", ToolSearchHandler),
+        (r"api/toolkits/([^/]+)/tools/([^/]+)", ToolInvocationHandler),
     ]
 
+    compress_listing = Bool(
+        True,
+        config=True,
+        help="Serve the toolkit listing gzipped to clients that accept it.",
+    )
+
+    discover_entry_points = Bool(
+        True,
+        config=True,
+        help=(
+            "Register the toolkits that installed packages declare in the "
+            "'jupyter_server_ai_tools.toolkits' entry point group."
+        ),
+    )
+
+    manifest_cache = Bool(
+        False,
+        config=True,
+        help=(
+            "Cache the manifests of entry point toolkits on disk, so that later starts "
+            "can list them without importing their providers. Cached toolkits are "
+            "checked against their providers in the background after startup."
+        ),
+    )
+
+    manifest_cache_path = Unicode(config=True, help="The file holding the toolkit manifest cache.")
+
+    @default("manifest_cache_path")
+    def _default_manifest_cache_path(self):
+        return os.path.join(jupyter_data_dir(), "jupyter_server_ai_tools", "manifest-cache.json")
+
+    max_workers = Int(
+        8,
+        config=True,
+        help="Maximum number of threads used to run synchronous tool callables.",
+    )
+
+    max_processes = Int(
+        config=True,
+        help=(
+            "Number of worker processes used to run tools with the 'process' execution mode. "
+            "Defaults to the number of CPUs."
+        ),
+    )
+
+    @default("max_processes")
+    def _default_max_processes(self):
+        return os.cpu_count() or 1
+
+    process_start_method = Unicode(
+        config=True,
+        help=(
+            "The multiprocessing start method for tool worker processes. Defaults to "
+            "'forkserver' where available, so workers aren't forked from the server itself."
+        ),
+    )
+
+    @default("process_start_method")
+    def _default_process_start_method(self):
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            return "forkserver"
+        return "spawn"
+
+    cache_max_entries = Int(
+        1024, config=True, help="Maximum number of tool results kept in the result cache."
+    )
+
+    cache_max_bytes = Int(
+        64 * 1024 * 1024,
+        config=True,
+        help="Maximum total size, in bytes of JSON, of the tool results in the result cache.",
+    )
+
+    cache_ttl = Float(
+        300.0, config=True, help="Number of seconds a cached tool result stays valid."
+    )
+
+    max_concurrent_calls = Int(
+        64,
+        config=True,
+        help="Maximum number of tool calls running at once. 0 means no limit.",
+    )
+
+    max_calls_per_user = Int(
+        16,
+        config=True,
+        help="Maximum number of tool calls one user can have running at once. 0 means no limit.",
+    )
+
+    max_calls_per_toolkit = Int(
+        0,
+        config=True,
+        help="Maximum number of calls to one toolkit's tools running at once. 0 means no limit.",
+    )
+
+    max_queued_calls = Int(
+        256,
+        config=True,
+        help=(
+            "Maximum number of tool calls waiting for room to run. Further calls are "
+            "rejected with '429 Too Many Requests'. 0 means no limit."
+        ),
+    )
+
+    call_priorities = Dict(
+        default_value=DEFAULT_PRIORITIES,
+        config=True,
+        help=(
+            "Priority of waiting tool calls by capability; lower runs first. A tool gets "
+            "the largest priority among its capabilities."
+        ),
+    )
+
+    change_log_size = Int(
+        1000,
+        config=True,
+        help=(
+            "Number of registry changes kept for clients syncing with "
+            "'GET /api/toolkits?since=<revision>'. Older clients get a full snapshot."
+        ),
+    )
+
+    max_long_poll = Float(
+        60.0,
+        config=True,
+        help="Maximum number of seconds a 'wait' request for registry changes is held open.",
+    )
+
+    blob_store_path = Unicode(
+        "",
+        config=True,
+        help=(
+            "Directory holding large tool results served from 'api/tools/blobs'. Defaults "
+            "to a temporary directory removed when the server stops."
+        ),
+    )
+
+    blob_max_bytes = Int(
+        1024 * 1024 * 1024,
+        config=True,
+        help="Maximum total size of the blob store; least recently used blobs are deleted.",
+    )
+
+    blob_min_bytes = Int(
+        1024 * 1024,
+        config=True,
+        help=(
+            "Bytes-like tool results at least this large are spilled into the blob store "
+            "and returned as a handle instead of inline."
+        ),
+    )
+
+    profile_sample_rate = Float(
+        0.0,
+        config=True,
+        help="Fraction of tool calls profiled with cProfile, from 0 (none) to 1 (all).",
+    )
+
+    profile_slow_threshold = Float(
+        0.0,
+        config=True,
+        help=(
+            "Tool calls taking longer than this many seconds have the next call of the same "
+            "tool profiled. 0 disables it."
+        ),
+    )
+
+    profile_memory = Bool(
+        False,
+        config=True,
+        help="Also trace the memory allocations of profiled tool calls with tracemalloc.",
+    )
+
+    max_profiles = Int(
+        50,
+        config=True,
+        help="Number of most recent tool call profiles kept for 'api/tools/profiles'.",
+    )
+
+    trace_file = Unicode(
+        "",
+        config=True,
+        help=(
+            "File the requests to the toolkit listing, search, invocation and batch "
+            "endpoints are appended to, for replaying them with 'benchmarks/loadgen.py'. "
+            "Empty disables tracing."
+        ),
+    )
+
     def initialize_settings(self):
-        self._registry = ToolkitRegistry()
+        self._registry = ToolkitRegistry(max_changes=self.change_log_size)
+        self._search_index = ToolSearchIndex()
+        self._registry.add_listener(self._on_registry_change)
+        self.metrics = ToolMetrics()
+        self._scheduler = ToolScheduler(
+            max_concurrent=self.max_concurrent_calls,
+            max_per_user=self.max_calls_per_user,
+            max_per_toolkit=self.max_calls_per_toolkit,
+            max_queued=self.max_queued_calls,
+            priorities=self.call_priorities,
+            metrics=self.metrics,
+        )
+        self._coalescer = CallCoalescer(self.metrics)
+        self._observed_listings: dict[str, ToolkitListing] = {}
+        self._formatted_listings: dict[str, ToolkitListing] = {}
+        self._executor = ToolExecutor(
+            max_workers=self.max_workers,
+            max_processes=self.max_processes,
+            process_start_method=self.process_start_method,
+        )
+        self._result_cache = ResultCache(
+            max_entries=self.cache_max_entries,
+            max_bytes=self.cache_max_bytes,
+            ttl=self.cache_ttl,
+        )
+        self._profiler = CallProfiler(
+            sample_rate=self.profile_sample_rate,
+            slow_threshold=self.profile_slow_threshold,
+            max_profiles=self.max_profiles,
+            memory=self.profile_memory,
+        )
+        self._blob_store = BlobStore(
+            self.blob_store_path or None, max_bytes=self.blob_max_bytes, log=self.log
+        )
         self.settings["toolkit_registry"] = self
+        self.settings["toolkit_blob_store"] = self._blob_store
+        self._trace_recorder = None
+        if self.trace_file:
+            self._trace_recorder = TraceRecorder(self.trace_file, log=self.log)
+            self.settings["toolkit_trace_recorder"] = self._trace_recorder
+        if self.discover_entry_points:
+            self._discover_toolkits()
+
+    def _discover_toolkits(self):
+        cache = None
+        if self.manifest_cache:
+            cache = ManifestCache(self.manifest_cache_path, log=self.log)
+        toolkits: dict[str, Toolkit] = {}
+        for toolkit in discover_toolkits(log=self.log, cache=cache):
+            if toolkit.name in toolkits or toolkit.name in self._registry.snapshot.by_name:
+                self.log.error(
+                    "Failed to register discovered toolkit '%s': the name is already taken.",
+                    toolkit.name,
+                )
+                continue
+            toolkits[toolkit.name] = toolkit
+        self.register_toolkits(toolkits.values())
+        if cache is not None:
+            cache.save()
+            threading.Thread(
+                target=self._revalidate_manifests,
+                args=(cache,),
+                name="jupyter-ai-tools-manifests",
+                daemon=True,
+            ).start()
+
+    def _revalidate_manifests(self, cache: ManifestCache):
+        for toolkit in revalidate_toolkits(cache, log=self.log):
+            self.log.info("Toolkit '%s' changed since it was cached; replacing it.", toolkit.name)
+            self.replace_toolkit(toolkit)
+        cache.save()
+
+    async def stop_extension(self):
+        self._executor.shutdown()
+        self._blob_store.close()
+        if self._trace_recorder is not None:
+            self._trace_recorder.close()
 
     def register_toolkit(self, toolkit: Toolkit):
         self._registry.register_toolkit(toolkit)
+        self._warm_up(toolkit.tools)
+
+    def register_toolkits(self, toolkits: Iterable[Toolkit]):
+        """Register several toolkits at once, which is faster than one at a time."""
+        toolkits = list(toolkits)
+        self._registry.register_toolkits(toolkits)
+        self._warm_up(tool for toolkit in toolkits for tool in toolkit.tools)
+
+    def unregister_toolkit(self, name: str) -> Toolkit:
+        return self._registry.unregister_toolkit(name)
+
+    def replace_toolkit(self, toolkit: Toolkit):
+        """Register `toolkit`, replacing any registered toolkit with the same name."""
+        self._registry.replace_toolkit(toolkit)
+        self._warm_up(toolkit.tools)
+
+    def add_tool(self, toolkit_name: str, tool: Tool):
+        self._registry.add_tool(toolkit_name, tool)
+        self._warm_up([tool])
+
+    def remove_tool(self, toolkit_name: str, tool_name: str) -> Tool:
+        return self._registry.remove_tool(toolkit_name, tool_name)
+
+    def replace_tool(self, toolkit_name: str, tool: Tool):
+        self._registry.replace_tool(toolkit_name, tool)
+        self._warm_up([tool])
+
+    def _warm_up(self, tools: Iterable[Tool]):
+        if any(tool.execution_mode == "process" for tool in tools):
+            # Warm the worker processes up now rather than on the first call.
+            self._executor.process_pool.start()
+
+    def _on_registry_change(self, change: RegistryChange):
+        self._search_index.apply_change(change, self._registry.snapshot)
+        if change.action != "added":
+            # Results cached for a removed or replaced tool may no longer be valid.
+            self._result_cache.invalidate(change.toolkit_name, change.tool_name)
 
     def get_toolkit(
-        self, 
-        name: str, 
-        read: bool = False, 
-        write: bool = False, 
-        execute: bool = False, 
-        delete: bool = False
-    ) -> Toolkit:
+        self,
+        name: str,
+        read: bool = False,
+        write: bool = False,
+        execute: bool = False,
+        delete: bool = False,
+        *,
+        any_of: Capability | None = None,
+        all_of: Capability | None = None,
+    ) -> ToolkitView:
         return self._registry.get_toolkit(
-            name=name, read=read, write=write, execute=execute, delete=delete
+            name=name,
+            read=read,
+            write=write,
+            execute=execute,
+            delete=delete,
+            any_of=any_of,
+            all_of=all_of,
+        )
+
+    def list_toolkits(self, format: str | None = None) -> FrozenToolkitSet | Any:
+        """
+        Return the registered toolkits.
+
+        With a `format` (``"openai"``, ``"anthropic"`` or ``"mcp"``), return the
+        registered tools as plain data in that format instead, decoded from the listing
+        rendered once per registry revision.
+        """
+        if format is None:
+            return self._registry.list_toolkits()
+        return json.loads(self.get_toolkit_listing(format).body)
+
+    def iter_toolkits(
+        self,
+        names: Iterable[str] | None = None,
+        *,
+        any_of: Capability | None = None,
+        all_of: Capability | None = None,
+        after: str | None = None,
+    ) -> Iterator[Toolkit | ToolkitView]:
+        return self._registry.iter_toolkits(names, any_of=any_of, all_of=all_of, after=after)
+
+    def get_toolkit_listing(self, format: str = DEFAULT_FORMAT) -> ToolkitListing:
+        """
+        Return the listing of all toolkits in a format, rendered once per revision.
+
+        Raises:
+            ValueError: If the format is unknown
+        """
+        if format == DEFAULT_FORMAT:
+            listing = self._registry.get_listing()
+        else:
+            listing = self._get_formatted_listing(format)
+        if listing is not self._observed_listings.get(format):
+            # Each generation's listing is serialized once; record that when first seen.
+            self._observed_listings[format] = listing
+            self.metrics.serialization.observe(listing.serialization_seconds)
+        return listing
+
+    def _get_formatted_listing(self, format: str) -> ToolkitListing:
+        snapshot = self._registry.snapshot
+        listing = self._formatted_listings.get(format)
+        if listing is None or listing.generation != snapshot.generation:
+            start = time.perf_counter()
+            body = render(format, snapshot.toolkits)
+            listing = ToolkitListing(snapshot.generation, body, time.perf_counter() - start)
+            self._formatted_listings[format] = listing
+        return listing
+
+    @property
+    def revision(self) -> int:
+        """The registry's current revision, which increases on every change."""
+        return self._registry.generation
+
+    def get_changes(self, since: int) -> list[RegistryChange] | None:
+        """
+        Return the registry changes made after revision `since`, oldest first, or None
+        if they are no longer all in the change log.
+        """
+        return self._registry.changes_since(since)
+
+    async def wait_for_changes(self, since: int, timeout: float) -> bool:
+        """
+        Wait up to `timeout` seconds for the registry to move past revision `since`.
+
+        Returns whether it did. Changes made from other threads wake the waiter too.
+        """
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def listener(change: RegistryChange):
+            loop.call_soon_threadsafe(changed.set)
+
+        self.add_registry_listener(listener)
+        try:
+            if self.revision != since:
+                return True
+            try:
+                await asyncio.wait_for(changed.wait(), min(timeout, self.max_long_poll))
+            except asyncio.TimeoutError:
+                return False
+            return True
+        finally:
+            self.remove_registry_listener(listener)
+
+    def search_tools(
+        self,
+        query: str,
+        limit: int = 10,
+        *,
+        any_of: Capability | None = None,
+        all_of: Capability | None = None,
+    ) -> list[SearchHit]:
+        """
+        Return the registered tools best matching `query`, best first.
+
+        Tools are ranked with BM25 over their names, descriptions and parameter names.
+        """
+        return self._search_index.search(query, limit, any_of=any_of, all_of=all_of)
+
+    def get_metrics(self) -> dict[str, Any]:
+        """Return per-tool call, error, in-flight and latency metrics as plain data."""
+        return self.metrics.snapshot()
+
+    def add_registry_listener(self, listener: Callable[[RegistryChange], None]):
+        self._registry.add_listener(listener)
+
+    def remove_registry_listener(self, listener: Callable[[RegistryChange], None]):
+        self._registry.remove_listener(listener)
+
+    def get_tool(self, toolkit_name: str, tool_name: str) -> Tool:
+        try:
+            tool = self._registry.get_tool(toolkit_name, tool_name)
+        except LookupError:
+            self.metrics.track_lookup(found=False)
+            raise
+        self.metrics.track_lookup(found=True)
+        return tool
+
+    async def invoke_tool(
+        self,
+        toolkit_name: str,
+        tool_name: str,
+        arguments: dict[str, Any] | None = None,
+        *,
+        user: str | None = None,
+        timeout: float | None = None,
+        tool: Tool | None = None,
+    ) -> Any:
+        """
+        Call a registered tool and return its result.
+
+        The chunks yielded by generator tools are collected into a list; use
+        `stream_tool` to receive them as they are produced. Results of tools with
+        `cache` set are memoized per set of arguments, and calls of tools with
+        `coalesce` set share the run of an identical call already in flight (which
+        counts toward the scheduler's limits once, under the user who started it).
+        Calling a tool that writes or deletes drops the cached results of its whole
+        toolkit.
+
+        The call waits for the scheduler to let it run; `user` is the name the
+        per-user limit is counted under. `tool` is the tool as already returned by
+        `get_tool`, so that callers who had to look at it first don't look it up (and
+        count the lookup) twice.
+
+        The call is cancelled if it takes longer, waiting included, than `timeout`
+        seconds or the tool's own timeout, whichever is shorter. Async tools are
+        cancelled where they await, process tools are killed, and thread tools are
+        left to finish in the background with their result discarded.
+
+        Raises:
+            LookupError: If the toolkit or tool isn't registered
+            ToolArgumentError: If the arguments don't match the tool's signature
+            SchedulerFullError: If the call would have to wait and the queue is full
+            ToolTimeoutError: If the call timed out
+        """
+        if tool is None:
+            tool = self.get_tool(toolkit_name, tool_name)
+        if tool.record.coalesce:
+            arguments = check_arguments(tool, arguments or {}, with_defaults=True)
+            call = self._coalescer.run(
+                toolkit_name,
+                tool_name,
+                arguments,
+                lambda: self._run_tool(toolkit_name, tool, arguments, user),
+            )
+        else:
+            call = self._run_tool(toolkit_name, tool, arguments or {}, user)
+        return await run_with_timeout(
+            call, effective_timeout(tool.record.timeout, timeout), tool_name
         )
-    
-    def list_toolkits(self):
-        return self._registry.list_toolkits()
+
+    async def _run_tool(
+        self, toolkit_name: str, tool: Tool, arguments: dict[str, Any], user: str | None
+    ) -> Any:
+        async with self._scheduler.slot(toolkit_name, user, tool.record.capabilities):
+            with self.metrics.track_call(toolkit_name, tool.record.name):
+                return await self._invoke_tool(toolkit_name, tool, arguments)
+
+    async def _invoke_tool(self, toolkit_name: str, tool: Tool, arguments: dict[str, Any]) -> Any:
+        record = tool.record
+        # Key cached results on every argument, so that leaving out a default doesn't
+        # make a call look different.
+        arguments = check_arguments(tool, arguments, with_defaults=record.cache)
+        if record.is_generator:
+            return [chunk async for chunk in self._executor.stream(tool, arguments)]
+
+        if not record.cache:
+            try:
+                return await self._call(toolkit_name, tool, arguments)
+            finally:
+                if record.is_mutating:
+                    self._result_cache.invalidate(toolkit_name)
+
+        key = ResultCache.make_key(toolkit_name, record.name, arguments)
+        hit, result = self._result_cache.get(key)
+        if not hit:
+            result = await self._call(toolkit_name, tool, arguments)
+            self._result_cache.put(key, result)
+        return result
+
+    async def _call(self, toolkit_name: str, tool: Tool, arguments: dict[str, Any]) -> Any:
+        with self._profiler.profile(toolkit_name, tool.record.name) as capture:
+            return await self._executor.call(tool, arguments, capture)
+
+    async def stream_tool(
+        self,
+        toolkit_name: str,
+        tool_name: str,
+        arguments: dict[str, Any] | None = None,
+        *,
+        user: str | None = None,
+        timeout: float | None = None,
+        tool: Tool | None = None,
+    ) -> AsyncIterator[Any]:
+        """
+        Call a registered tool and yield its result in chunks as they are produced.
+
+        Tools that aren't generators yield their whole result as a single chunk. The
+        call holds its scheduler slot until the last chunk has been consumed. The
+        timeout is applied as in `invoke_tool`, to the time spent producing chunks;
+        time spent by the consumer between chunks doesn't count, and `tool` is passed
+        as in `invoke_tool`.
+        """
+        if tool is None:
+            tool = self.get_tool(toolkit_name, tool_name)
+        remaining = effective_timeout(tool.record.timeout, timeout)
+        loop = asyncio.get_running_loop()
+        async with aclosing(self._stream_tool(toolkit_name, tool, arguments or {}, user)) as chunks:
+            while True:
+                start = loop.time()
+                try:
+                    chunk = await run_with_timeout(chunks.__anext__(), remaining, tool_name)
+                except StopAsyncIteration:
+                    return
+                if remaining is not None:
+                    remaining -= loop.time() - start
+                yield chunk
+
+    async def _stream_tool(
+        self, toolkit_name: str, tool: Tool, arguments: dict[str, Any], user: str | None
+    ) -> AsyncGenerator[Any, None]:
+        async with self._scheduler.slot(toolkit_name, user, tool.record.capabilities):
+            with self.metrics.track_call(toolkit_name, tool.record.name):
+                arguments = check_arguments(tool, arguments)
+                try:
+                    async for chunk in self._executor.stream(tool, arguments):
+                        yield chunk
+                finally:
+                    if tool.record.is_mutating:
+                        self._result_cache.invalidate(toolkit_name)
+
+    async def invoke_batch(
+        self,
+        calls: list[dict[str, Any]],
+        *,
+        user: str | None = None,
+        timeout: float | None = None,
+        allowed: Capability | None = None,
+    ) -> AsyncIterator[BatchResult]:
+        """
+        Call a batch of tools, some using the results of others, and yield the results
+        as the calls complete.
+
+        See `batch.parse_batch` for the layout of `calls`. Arguments of the form
+        ``{"$ref": "<id>"}`` are replaced by the result of that call. Independent calls
+        run concurrently, each going through `invoke_tool` (and its scheduling) with
+        the given `user` and `timeout`. The whole batch is checked before any call
+        runs: every tool must exist and, if `allowed` is given, only have capabilities
+        among `allowed`.
+
+        Raises:
+            BatchError: If the batch is malformed or uses tools it isn't allowed to
+            LookupError: If a toolkit or tool isn't registered
+        """
+        batch = parse_batch(calls)
+        tools: dict[str, Tool] = {}
+        for call in batch:
+            tool = tools[call.id] = self.get_tool(call.toolkit_name, call.tool_name)
+            if allowed is not None and tool.record.capabilities & ~allowed:
+                raise BatchError(
+                    f"Call '{call.id}' uses tool '{call.tool_name}', which needs capabilities "
+                    "the batch isn't allowed"
+                )
+
+        async def invoke(call: BatchCall, arguments: dict[str, Any]) -> Any:
+            return await self.invoke_tool(
+                call.toolkit_name,
+                call.tool_name,
+                arguments,
+                user=user,
+                timeout=timeout,
+                tool=tools[call.id],
+            )
+
+        async with aclosing(run_batch(batch, invoke)) as results:
+            async for result in results:
+                yield result
+
+    async def spill_result(self, result: Any) -> Any:
+        """
+        Move a large bytes-like result into the blob store and return a handle to it.
+
+        Results supporting the buffer protocol (`bytes`, `memoryview`, `mmap`, arrays...)
+        of at least `blob_min_bytes` are written to the store from their own memory,
+        and replaced by ``{"$blob": <id>, "size": <bytes>, "url": <path>}``. Other
+        results are returned as they are.
+        """
+        view = as_buffer(result)
+        if view is None or view.nbytes < self.blob_min_bytes:
+            return result
+        loop = asyncio.get_running_loop()
+        handle = await loop.run_in_executor(None, self._blob_store.put, view)
+        base_url = self.serverapp.base_url if self.serverapp is not None else "/"
+        return {
+            "$blob": handle.id,
+            "size": handle.size,
+            "url": url_path_join(base_url, "api/tools/blobs", handle.id),
+        }
+
+    def list_profiles(self) -> list[CallProfile]:
+        """Return the kept tool call profiles, most recent first."""
+        return self._profiler.list_profiles()
+
+    def get_profile(self, profile_id: int) -> CallProfile:
+        return self._profiler.get_profile(profile_id)
+
+    def invalidate_cache(
+        self, toolkit_name: str | None = None, tool_name: str | None = None
+    ) -> int:
+        """Drop cached tool results, optionally only those of one toolkit or tool."""
+        return self._result_cache.invalidate(toolkit_name, tool_name)
+
+    def get_cache_stats(self) -> CacheStats:
+        return self._result_cache.stats()
@@ -0,0 +1,195 @@
+import asyncio
+from typing import Any, AsyncGenerator, Awaitable, Callable, Iterable, NamedTuple
+
+from .execution import ToolArgumentError, ToolTimeoutError
+from .scheduling import SchedulerFullError
+
+# An argument value of ``{"$ref": "<id>"}`` is replaced by the result of call <id>.
+REFERENCE_KEY = "$ref"
+
+
+class BatchError(ValueError):
+    """Raised when a batch of tool calls is malformed, e.g. has a dependency cycle."""
+
+
+class BatchCall(NamedTuple):
+    id: str
+    toolkit_name: str
+    tool_name: str
+    arguments: dict[str, Any]
+    # Ids of the calls that must succeed before this one runs, including the calls
+    # whose results its arguments reference.
+    depends_on: frozenset[str]
+
+
+class BatchResult(NamedTuple):
+    id: str
+    result: Any = None
+    # An HTTP-like status and a message for calls that failed or were skipped.
+    status: int = 200
+    error: str | None = None
+
+    def to_json(self) -> dict[str, Any]:
+        if self.error is None:
+            return {"id": self.id, "result": self.result}
+        return {"id": self.id, "status": self.status, "error": self.error}
+
+
+def parse_batch(specs: Any) -> list[BatchCall]:
+    """
+    Build the calls of a batch from their JSON description, and check their
+    dependencies.
+
+    Each call is an object with an `id`, a `toolkit`, a `tool`, and optionally
+    `arguments` and `depends_on`, a list of call ids. Calls whose arguments reference
+    other calls' results depend on them implicitly.
+
+    Raises:
+        BatchError: If a call is malformed, ids are repeated, or dependencies are
+            missing or form a cycle
+    """
+    if not isinstance(specs, list) or not specs:
+        raise BatchError("'calls' must be a non-empty list")
+
+    calls = []
+    for index, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            raise BatchError(f"Call {index} must be a JSON object")
+        call_id = spec.get("id", str(index))
+        toolkit_name, tool_name = spec.get("toolkit"), spec.get("tool")
+        arguments = spec.get("arguments") or {}
+        depends_on = spec.get("depends_on") or []
+        if not isinstance(call_id, str) or not call_id:
+            raise BatchError(f"The id of call {index} must be a non-empty string")
+        if not isinstance(toolkit_name, str) or not isinstance(tool_name, str):
+            raise BatchError(f"Call '{call_id}' must name a 'toolkit' and a 'tool'")
+        if not isinstance(arguments, dict):
+            raise BatchError(f"The 'arguments' of call '{call_id}' must be a JSON object")
+        if not isinstance(depends_on, list) or not all(isinstance(d, str) for d in depends_on):
+            raise BatchError(f"The 'depends_on' of call '{call_id}' must be a list of call ids")
+        references = set(_find_references(arguments))
+        calls.append(
+            BatchCall(
+                call_id, toolkit_name, tool_name, arguments, frozenset(depends_on) | references
+            )
+        )
+
+    ids = [call.id for call in calls]
+    if len(set(ids)) != len(ids):
+        duplicates = sorted({call_id for call_id in ids if ids.count(call_id) > 1})
+        raise BatchError(f"Call ids must be unique, got {', '.join(duplicates)} more than once")
+    for call in calls:
+        missing = call.depends_on - set(ids)
+        if missing:
+            raise BatchError(f"Call '{call.id}' depends on unknown calls: {sorted(missing)}")
+    _check_acyclic(calls)
+    return calls
+
+
+def resolve_references(value: Any, results: dict[str, Any]) -> Any:
+    """Replace the ``{"$ref": <id>}`` objects in `value` by the results they reference."""
+    if isinstance(value, dict):
+        if len(value) == 1 and REFERENCE_KEY in value:
+            return results[value[REFERENCE_KEY]]
+        return {key: resolve_references(item, results) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, results) for item in value]
+    return value
+
+
+async def run_batch(
+    calls: Iterable[BatchCall], invoke: Callable[[BatchCall, dict[str, Any]], Awaitable[Any]]
+) -> AsyncGenerator[BatchResult, None]:
+    """
+    Run a batch of calls checked by `parse_batch`, yielding their results as they
+    complete.
+
+    Every call runs as soon as the calls it depends on have succeeded, so
+    independent calls run concurrently. Calls depending on a failed call are skipped,
+    with a 424 status. Closing the iterator cancels the calls still running.
+    """
+    waiting = {call.id: call for call in calls}
+    results: dict[str, Any] = {}
+    failed: set[str] = set()
+    running: dict[asyncio.Future, BatchCall] = {}
+    try:
+        while waiting or running:
+            for call in list(waiting.values()):
+                failed_dependencies = call.depends_on & failed
+                if failed_dependencies:
+                    del waiting[call.id]
+                    failed.add(call.id)
+                    yield BatchResult(
+                        call.id,
+                        status=424,
+                        error=f"Skipped: call '{min(failed_dependencies)}' failed",
+                    )
+                elif call.depends_on <= results.keys():
+                    del waiting[call.id]
+                    arguments = resolve_references(call.arguments, results)
+                    running[asyncio.ensure_future(invoke(call, arguments))] = call
+            if not running:
+                # Only skipped calls were left; they were all reported above.
+                continue
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                call = running.pop(task)
+                error = task.exception()
+                if error is None:
+                    results[call.id] = task.result()
+                    yield BatchResult(call.id, task.result())
+                else:
+                    failed.add(call.id)
+                    yield BatchResult(call.id, status=error_status(error), error=str(error))
+    finally:
+        for task in running:
+            task.cancel()
+
+
+def error_status(error: BaseException) -> int:
+    """The HTTP status a failed tool call is reported with."""
+    if isinstance(error, LookupError):
+        return 404
+    if isinstance(error, ToolArgumentError):
+        return 400
+    if isinstance(error, SchedulerFullError):
+        return 429
+    if isinstance(error, ToolTimeoutError):
+        return 504
+    return 500
+
+
+def _find_references(value: Any) -> Iterable[str]:
+    if isinstance(value, dict):
+        if len(value) == 1 and REFERENCE_KEY in value:
+            reference = value[REFERENCE_KEY]
+            if not isinstance(reference, str):
+                raise BatchError(f"Invalid reference {value!r}: '$ref' must be a call id")
+            yield reference
+            return
+        for item in value.values():
+            yield from _find_references(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _find_references(item)
+
+
+def _check_acyclic(calls: list[BatchCall]):
+    # Kahn's algorithm: repeatedly take the calls whose dependencies are all taken.
+    remaining = {call.id: set(call.depends_on) for call in calls}
+    ready = [call_id for call_id, depends_on in remaining.items() if not depends_on]
+    dependents: dict[str, list[str]] = {}
+    for call in calls:
+        for dependency in call.depends_on:
+            dependents.setdefault(dependency, []).append(call.id)
+    while ready:
+        call_id = ready.pop()
+        del remaining[call_id]
+        for dependent in dependents.get(call_id, ()):
+            depends_on = remaining[dependent]
+            depends_on.discard(call_id)
+            if not depends_on:
+                ready.append(dependent)
+    if remaining:
+        raise BatchError(f"Calls {sorted(remaining)} have a dependency cycle")
@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import os
+import re
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, NamedTuple
+
+# Blobs are named by the SHA-256 of their content.
+BLOB_ID = re.compile(r"[0-9a-f]{64}")
+
+
+class BlobHandle(NamedTuple):
+    id: str
+    size: int
+
+
+def as_buffer(value: Any) -> memoryview | None:
+    """
+    Return a flat byte view of `value` if it supports the buffer protocol, else None.
+
+    Strings don't count. The view shares the value's memory unless the buffer isn't
+    contiguous, in which case it is copied once.
+    """
+    if isinstance(value, str):
+        return None
+    try:
+        view = memoryview(value)
+    except TypeError:
+        return None
+    if not view.contiguous:
+        view = memoryview(view.tobytes())
+    return view.cast("B")
+
+
+class BlobStore:
+    """
+    A content-addressed store of large tool results, kept as files in one directory.
+
+    Results are written straight from their buffer, without being copied or encoded,
+    and are named by the hash of their content, so a result stored twice takes the
+    space of one. Once the blobs take more than `max_bytes`, the least recently used
+    ones are deleted. Files being served when they are deleted stay readable until
+    they are closed.
+
+    Without a `path`, the blobs live in a temporary directory removed by `close`.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike | None = None,
+        max_bytes: int = 1024 * 1024 * 1024,
+        log: logging.Logger | None = None,
+    ):
+        self.max_bytes = max_bytes
+        self.log = log or logging.getLogger(__name__)
+        self._owns_path = not path
+        self.path = Path(path or tempfile.mkdtemp(prefix="jupyter-ai-tools-blobs-"))
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @property
+    def bytes(self) -> int:
+        return self._bytes
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, blob_id: str) -> bool:
+        return blob_id in self._sizes
+
+    def put(self, value: Any) -> BlobHandle:
+        """
+        Store a bytes-like value and return its handle.
+
+        Raises:
+            TypeError: If the value doesn't support the buffer protocol
+            ValueError: If the value is larger than the store
+        """
+        view = as_buffer(value)
+        if view is None:
+            raise TypeError(f"Can't store a {type(value).__name__} as a blob")
+        size = view.nbytes
+        if size > self.max_bytes:
+            raise ValueError(
+                f"A result of {size} bytes doesn't fit the blob store ({self.max_bytes} bytes)"
+            )
+
+        blob_id = hashlib.sha256(view).hexdigest()
+        with self._lock:
+            if blob_id in self._sizes:
+                self._sizes.move_to_end(blob_id)
+                return BlobHandle(blob_id, size)
+
+        # Write a temporary file and move it into place, so readers never see half of it.
+        fd, temp_path = tempfile.mkstemp(dir=self.path, prefix=".blob-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(view)
+            os.replace(temp_path, self.path / blob_id)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+
+        with self._lock:
+            if blob_id not in self._sizes:
+                self._sizes[blob_id] = size
+                self._bytes += size
+            self._evict(keep=blob_id)
+        return BlobHandle(blob_id, size)
+
+    def touch(self, blob_id: str) -> bool:
+        """Mark a blob as recently used; returns whether it is in the store."""
+        with self._lock:
+            if blob_id not in self._sizes:
+                return False
+            self._sizes.move_to_end(blob_id)
+            return True
+
+    def delete(self, blob_id: str) -> bool:
+        with self._lock:
+            return self._remove(blob_id)
+
+    def close(self):
+        """Forget the blobs, deleting them if the store made its own directory."""
+        with self._lock:
+            self._sizes.clear()
+            self._bytes = 0
+        if self._owns_path:
+            shutil.rmtree(self.path, ignore_errors=True)
+
+    def _load(self):
+        # Pick up the blobs left by a previous run, oldest first.
+        blobs = []
+        for entry in os.scandir(self.path):
+            if entry.is_file() and BLOB_ID.fullmatch(entry.name):
+                stat = entry.stat()
+                blobs.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, blob_id, size in sorted(blobs):
+            self._sizes[blob_id] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    def _evict(self, keep: str | None = None):
+        # Called with `_lock` held.
+        while self._bytes > self.max_bytes:
+            blob_id = next(iter(self._sizes))
+            if blob_id == keep:
+                break
+            self._remove(blob_id)
+
+    def _remove(self, blob_id: str) -> bool:
+        # Called with `_lock` held.
+        size = self._sizes.pop(blob_id, None)
+        if size is None:
+            return False
+        self._bytes -= size
+        try:
+            (self.path / blob_id).unlink()
+        except OSError:
+            self.log.warning("Failed to delete blob '%s'.", blob_id)
+        return True
@@ -0,0 +1,116 @@
+import copy
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+
+class _Entry(NamedTuple):
+    value: Any
+    size: int
+    expires: float
+
+
+class ResultCache:
+    """
+    An LRU cache of tool results.
+
+    Entries expire `ttl` seconds after they are stored, and the least recently used
+    entries are evicted once the cache holds more than `max_entries` results or more
+    than `max_bytes` of (JSON-encoded) result data. Results are copied as they are
+    stored and returned, so callers changing a result don't change the cached one.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: float = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: OrderedDict[Any, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(toolkit_name: str, tool_name: str, arguments: dict[str, Any]) -> tuple:
+        """Build a cache key that doesn't depend on the order of the arguments."""
+        canonical = json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=repr)
+        return (toolkit_name, tool_name, canonical)
+
+    def get(self, key: Hashable) -> tuple[bool, Any]:
+        """Return ``(True, value)`` for a live entry, or ``(False, None)``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires <= self._clock():
+                if entry is not None:
+                    self._remove(key)
+                self._misses += 1
+                return False, None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+            value = entry.value
+        return True, copy.deepcopy(value)
+
+    def put(self, key: Hashable, value: Any):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(copy.deepcopy(value), size, self._clock() + self.ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self._evictions += 1
+
+    def invalidate(self, toolkit_name: str | None = None, tool_name: str | None = None) -> int:
+        """
+        Drop cached results, optionally only those of one toolkit or tool.
+
+        Returns:
+            int: The number of entries dropped
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if (toolkit_name is None or key[0] == toolkit_name)
+                and (tool_name is None or key[1] == tool_name)
+            ]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                entries=len(self._entries),
+                bytes=self._bytes,
+            )
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
@@ -0,0 +1,64 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from .cache import ResultCache
+from .metrics import ToolMetrics
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+
+class CallCoalescer:
+    """
+    Single-flight execution of identical concurrent tool calls.
+
+    The first call of a tool with a given set of arguments runs; calls made with the
+    same arguments while it is in flight wait for it instead of running again, and all
+    of them get its result or exception. A waiter that is cancelled only stops
+    waiting: the shared run is cancelled once its last waiter is gone.
+
+    The coalescer must only be used from one event loop.
+    """
+
+    def __init__(self, metrics: ToolMetrics | None = None):
+        self.metrics = metrics
+        self._flights: dict[Hashable, _Flight] = {}
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    async def run(
+        self,
+        toolkit_name: str,
+        tool_name: str,
+        arguments: dict[str, Any],
+        call: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Run `call`, or wait for the identical call already in flight, and return its result."""
+        key = ResultCache.make_key(toolkit_name, tool_name, arguments)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+        elif self.metrics is not None:
+            self.metrics.coalesced.labels(toolkit_name, tool_name).inc()
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if not flight.waiters and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+
+    def _forget(self, key: Hashable, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
@@ -0,0 +1,78 @@
+import logging
+from importlib.metadata import entry_points
+from typing import Any, Iterator
+
+from .manifest_cache import ManifestCache
+from .models import Toolkit
+
+ENTRY_POINT_GROUP = "jupyter_server_ai_tools.toolkits"
+
+
+def discover_toolkits(
+    group: str = ENTRY_POINT_GROUP,
+    log: logging.Logger | None = None,
+    cache: ManifestCache | None = None,
+) -> Iterator[Toolkit]:
+    """
+    Load the toolkits that installed packages declare through entry points.
+
+    Each entry point names a toolkit manifest: a `Toolkit`, a dict accepted by
+    `Toolkit.from_manifest`, or a function returning either. Tools given as
+    ``"module:function"`` references are only imported when first used, so
+    providers should point the entry point at a lightweight module holding the
+    manifest rather than at the module implementing the tools. For example:
+
+        [project.entry-points."jupyter_server_ai_tools.toolkits"]
+        greetings = "my_extension.toolkits:greetings"
+
+    With a `cache`, toolkits whose entry point hasn't changed since they were cached
+    are built from their cached manifest without loading the entry point at all.
+
+    Returns:
+        Iterator[Toolkit]: The toolkits, skipping (and logging) entry points that fail
+        to load
+    """
+    log = log or logging.getLogger(__name__)
+    for entry_point in entry_points(group=group):
+        try:
+            manifest = cache.get(entry_point) if cache is not None else None
+            if manifest is not None:
+                yield Toolkit.from_manifest(manifest)
+                continue
+            toolkit = load_toolkit(entry_point.load())
+            if cache is not None:
+                cache.put(entry_point, toolkit)
+            yield toolkit
+        except Exception:
+            log.exception("Failed to load toolkit from entry point '%s'.", entry_point.value)
+
+
+def revalidate_toolkits(
+    cache: ManifestCache, log: logging.Logger | None = None
+) -> Iterator[Toolkit]:
+    """
+    Load the entry points whose toolkits `discover_toolkits` built from `cache`.
+
+    Yields the toolkits whose manifest turned out to have changed, and updates the
+    cache. Entry points that fail to load are logged and dropped from the cache.
+    """
+    log = log or logging.getLogger(__name__)
+    for entry_point in cache.take_hits():
+        try:
+            toolkit = load_toolkit(entry_point.load())
+        except Exception:
+            log.exception("Failed to load toolkit from entry point '%s'.", entry_point.value)
+            cache.discard(entry_point)
+            continue
+        if cache.put(entry_point, toolkit):
+            yield toolkit
+
+
+def load_toolkit(manifest: Any) -> Toolkit:
+    if callable(manifest) and not isinstance(manifest, Toolkit):
+        manifest = manifest()
+    if isinstance(manifest, Toolkit):
+        return manifest
+    if isinstance(manifest, dict):
+        return Toolkit.from_manifest(manifest)
+    raise TypeError(f"Expected a Toolkit or a toolkit manifest dict, got {type(manifest)}")
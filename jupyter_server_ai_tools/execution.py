@@ -0,0 +1,337 @@
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import multiprocessing
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+from pydantic import ValidationError
+
+from .models import Tool
+from .profiling import ProfileCapture, profiled_call
+
+T = TypeVar("T")
+
+
+class ToolArgumentError(ValueError):
+    """Raised when the arguments given for a tool call don't fit the tool's signature."""
+
+
+class ToolTimeoutError(TimeoutError):
+    """Raised when a tool call takes longer than its timeout and is cancelled."""
+
+
+class ProcessPool:
+    """
+    A pool of worker processes for CPU-bound tools.
+
+    The workers are started and warmed up ahead of the first call, and each runs one
+    call at a time; calls beyond the number of workers wait for one to be free.
+    Callables and arguments are pickled, so process tools must be importable
+    module-level functions.
+
+    If a worker dies, only the call it was running fails, with `BrokenProcessPool`, and
+    the worker is replaced. A call that is cancelled while running (on timeout, or
+    because its client went away) can't be stopped inside its worker, so that worker
+    is killed and replaced; the calls running on other workers carry on.
+    """
+
+    def __init__(self, max_workers: int, start_method: str | None = None):
+        self._max_workers = max_workers
+        self._context = multiprocessing.get_context(start_method)
+        # Each call holds one of these threads while it waits for its worker.
+        self._threads: ThreadPoolExecutor | None = None
+        self._idle: list[_Worker] = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._threads is None:
+                self._closed = False
+                self._threads = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="jupyter-ai-tools-process"
+                )
+                self._idle = [_Worker(self._context) for _ in range(self._max_workers)]
+            return self._threads
+
+    async def run(self, func: Callable, arguments: dict[str, Any]) -> Any:
+        call = _ProcessCall()
+        future = self.start().submit(self._run, call, func, arguments)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Calls that haven't started are simply dropped; running ones are killed.
+            if not future.cancel():
+                call.cancel()
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            threads, self._threads = self._threads, None
+            idle, self._idle = self._idle, []
+            self._closed = True
+        if threads is not None:
+            threads.shutdown(wait=False, cancel_futures=True)
+        for worker in idle:
+            worker.close()
+
+    def _run(self, call: "_ProcessCall", func: Callable, arguments: dict[str, Any]) -> Any:
+        # Runs on one of `_threads`, so there is always a worker for it.
+        with self._lock:
+            worker = self._idle.pop() if self._idle else None
+        if worker is None or not worker.is_alive():
+            if worker is not None:
+                worker.close()
+            worker = _Worker(self._context)
+        if not call.start(worker):
+            self._release(worker)
+            raise concurrent.futures.CancelledError()
+        broken = False
+        try:
+            return worker.call(func, arguments)
+        except BrokenProcessPool:
+            broken = True
+            raise
+        finally:
+            # Replace the worker if it died, or may have been killed by a cancellation.
+            if call.finish() or broken:
+                worker.close()
+                worker = _Worker(self._context)
+            self._release(worker)
+
+    def _release(self, worker: "_Worker"):
+        with self._lock:
+            if not self._closed:
+                self._idle.append(worker)
+                return
+        worker.close()
+
+
+class _ProcessCall:
+    """A call on the process pool, and the worker running it once it started."""
+
+    def __init__(self):
+        self._worker: _Worker | None = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+    def start(self, worker: "_Worker") -> bool:
+        with self._lock:
+            if self._cancelled:
+                return False
+            self._worker = worker
+            return True
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled = True
+            worker = self._worker
+        if worker is not None:
+            worker.kill()
+
+    def finish(self) -> bool:
+        """Forget the call's worker, and return whether the call was cancelled."""
+        with self._lock:
+            self._worker = None
+            return self._cancelled
+
+
+class _Worker:
+    """A worker process, running the calls sent through its pipe one at a time."""
+
+    def __init__(self, context: Any):
+        self._connection, child_connection = context.Pipe()
+        self._process = context.Process(
+            target=_serve_calls, args=(child_connection,), name="jupyter-ai-tools", daemon=True
+        )
+        self._process.start()
+        child_connection.close()
+
+    def call(self, func: Callable, arguments: dict[str, Any]) -> Any:
+        self._connection.send((func, arguments))
+        try:
+            succeeded, value = self._connection.recv()
+        except (EOFError, OSError):
+            raise BrokenProcessPool(
+                "A tool worker process terminated abruptly while running a call."
+            ) from None
+        if succeeded:
+            return value
+        raise value
+
+    def is_alive(self) -> bool:
+        return self._process.is_alive()
+
+    def kill(self):
+        self._process.kill()
+
+    def close(self):
+        # The worker exits once its end of the pipe is closed.
+        self._connection.close()
+        if not self._process.is_alive():
+            self._process.join()
+
+
+def _serve_calls(connection: Any):
+    # The main loop of a worker process.
+    while True:
+        try:
+            func, arguments = connection.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            reply = (True, func(**arguments))
+        except BaseException as e:
+            reply = (False, e)
+        try:
+            connection.send(reply)
+        except Exception as e:
+            # The result or the error couldn't be pickled.
+            connection.send((False, RuntimeError(f"Failed to send the tool's result: {e!r}")))
+
+
+class ToolExecutor:
+    """
+    Runs tool callables on behalf of the server.
+
+    Coroutine functions are awaited on the event loop. Plain callables are run
+    according to the tool's `execution_mode`: inline on the event loop, on a bounded
+    thread pool, or on a pool of worker processes.
+    """
+
+    def __init__(
+        self, max_workers: int, max_processes: int, process_start_method: str | None = None
+    ):
+        self._thread_pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="jupyter-ai-tools"
+        )
+        self.process_pool = ProcessPool(max_processes, start_method=process_start_method)
+
+    async def run(self, tool: Tool, arguments: dict[str, Any]) -> Any:
+        return await self.call(tool, check_arguments(tool, arguments))
+
+    async def call(
+        self, tool: Tool, arguments: dict[str, Any], capture: ProfileCapture | None = None
+    ) -> Any:
+        """
+        Call a tool with arguments that were already checked by `check_arguments`.
+
+        With a `capture`, the callable is profiled where it runs: on the event loop, in
+        its thread or in its worker process.
+        """
+        record = tool.record
+        func = record.func
+        if record.kind == "coroutine":
+            if capture is not None:
+                return await capture.run_coroutine(func(**arguments))
+            return await func(**arguments)
+
+        if record.execution_mode == "process":
+            if capture is None:
+                return await self.process_pool.run(func, arguments)
+            result, stats, memory_report = await self.process_pool.run(
+                profiled_call, {"func": func, "arguments": arguments, "memory": capture.memory}
+            )
+            capture.absorb(stats, memory_report)
+            return result
+
+        if capture is not None:
+            func = functools.partial(capture.runcall, func)
+
+        if record.execution_mode == "inline":
+            result = func(**arguments)
+        else:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._thread_pool, functools.partial(func, **arguments)
+            )
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def stream(self, tool: Tool, arguments: dict[str, Any]) -> AsyncIterator[Any]:
+        """
+        Call a tool with checked arguments and yield its result in chunks.
+
+        Generator tools yield their chunks one at a time, and the next chunk is only
+        produced once the consumer asks for it. Synchronous generators are advanced on
+        the thread pool (or inline). Other tools yield their whole result as one chunk.
+        """
+        record = tool.record
+        if record.kind == "async_generator":
+            async for chunk in record.func(**arguments):
+                yield chunk
+            return
+
+        if record.kind != "generator":
+            yield await self.call(tool, arguments)
+            return
+
+        generator = record.func(**arguments)
+        inline = record.execution_mode == "inline"
+        pending: concurrent.futures.Future | None = None
+        try:
+            while True:
+                if inline:
+                    chunk = next(generator, _DONE)
+                else:
+                    pending = self._thread_pool.submit(next, generator, _DONE)
+                    chunk = await asyncio.wrap_future(pending)
+                if chunk is _DONE:
+                    break
+                yield chunk
+        finally:
+            if pending is not None and not pending.done():
+                # Cancelled while a thread advances the generator: close it once it's done.
+                pending.add_done_callback(lambda _: generator.close())
+            else:
+                generator.close()
+
+    def shutdown(self):
+        self._thread_pool.shutdown(wait=False, cancel_futures=True)
+        self.process_pool.shutdown()
+
+
+# Marks the end of a synchronous generator without raising StopIteration across threads.
+_DONE = object()
+
+
+async def run_with_timeout(awaitable: Awaitable[T], timeout: float | None, name: str) -> T:
+    """
+    Await a tool call, cancelling it if it takes longer than `timeout` seconds.
+
+    Raises:
+        ToolTimeoutError: If the call timed out
+    """
+    if timeout is None:
+        return await awaitable
+    task = asyncio.ensure_future(awaitable)
+    try:
+        done, _ = await asyncio.wait((task,), timeout=timeout)
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+    if not done:
+        task.cancel()
+        # Let the call handle its cancellation, and release what it holds, first.
+        await asyncio.wait((task,))
+        raise ToolTimeoutError(f"Tool '{name}' timed out after {timeout:g} seconds")
+    return task.result()
+
+
+def effective_timeout(*timeouts: float | None) -> float | None:
+    """Return the shortest of the given timeouts, ignoring the ones that aren't set."""
+    return min((timeout for timeout in timeouts if timeout is not None), default=None)
+
+
+def check_arguments(
+    tool: Tool, arguments: dict[str, Any], *, with_defaults: bool = False
+) -> dict[str, Any]:
+    try:
+        return tool.validate_arguments(arguments, with_defaults=with_defaults)
+    except ValidationError as e:
+        raise ToolArgumentError(f"Invalid arguments for tool '{tool.name}': {e}") from e
@@ -0,0 +1,147 @@
+import hashlib
+import json
+import re
+from typing import Any, Callable, Iterable, Iterator
+
+from .models import Tool, Toolkit, ToolkitView
+
+# The listing formats besides the default one, in which toolkits are listed as they
+# are serialized by `Toolkit.model_dump_json`.
+DEFAULT_FORMAT = "jupyter"
+
+# Separates the toolkit and tool names in the names of tools listed in LLM provider
+# formats, which have a flat namespace of tools.
+NAME_SEPARATOR = "__"
+
+# The tool names OpenAI and Anthropic accept.
+NAME_PATTERN = re.compile(r"^[a-zA-Z0-9_-]{1,64}$")
+
+# Length of the hash ending the names of tools whose plain name doesn't fit.
+_DIGEST_LENGTH = 8
+
+
+def qualified_name(toolkit_name: str, tool_name: str) -> str:
+    """
+    Name a tool in the flat namespace of LLM provider formats.
+
+    The name is ``<toolkit>__<tool>`` when that matches `NAME_PATTERN` and splits back
+    into the same names with `split_qualified_name`. Otherwise, e.g. when a name has
+    spaces or dots, is too long, or the toolkit name has ``__`` in it, the name is the
+    plain one with runs of other characters and underscores replaced by ``_``, cut to
+    fit, and ended with ``-`` and a hash of both names. Such names have no ``__`` in
+    them, so `split_qualified_name` rejects them; map them back to their tool with
+    `resolve_qualified_name`.
+    """
+    name = f"{toolkit_name}{NAME_SEPARATOR}{tool_name}"
+    if (
+        NAME_PATTERN.match(name)
+        and toolkit_name
+        and NAME_SEPARATOR not in toolkit_name
+        and not toolkit_name.endswith("_")
+    ):
+        return name
+    digest = hashlib.sha1(f"{toolkit_name}\0{tool_name}".encode()).hexdigest()[:_DIGEST_LENGTH]
+    prefix = re.sub(r"[^a-zA-Z0-9-]+", "_", name)[: 64 - _DIGEST_LENGTH - 1]
+    return f"{prefix}-{digest}"
+
+
+def split_qualified_name(name: str) -> tuple[str, str]:
+    """
+    Return the toolkit and tool names from a name given by `qualified_name`.
+
+    Raises:
+        ValueError: If the name isn't a ``<toolkit>__<tool>`` name, e.g. because
+            `qualified_name` had to shorten it
+    """
+    toolkit_name, sep, tool_name = name.partition(NAME_SEPARATOR)
+    if not (toolkit_name and sep and tool_name):
+        raise ValueError(f"Expected a '<toolkit>{NAME_SEPARATOR}<tool>' name, got {name!r}")
+    return toolkit_name, tool_name
+
+
+def resolve_qualified_name(name: str, toolkits: Iterable[Toolkit | ToolkitView]) -> tuple[str, str]:
+    """
+    Return the toolkit and tool names of the tool that `qualified_name` named `name`,
+    among `toolkits`. Unlike `split_qualified_name` this works for every name, but
+    scans the toolkits.
+
+    Raises:
+        LookupError: If none of the tools has that name
+    """
+    for toolkit_name, tool in _iter_tools(toolkits):
+        if qualified_name(toolkit_name, str(tool.name)) == name:
+            return toolkit_name, str(tool.name)
+    raise LookupError(f"No tool is named {name!r}")
+
+
+def to_openai(toolkits: Iterable[Toolkit | ToolkitView]) -> list[dict[str, Any]]:
+    """List tools as OpenAI function calling tools."""
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": qualified_name(toolkit_name, str(tool.name)),
+                "description": tool.description or "",
+                "parameters": tool.input_schema,
+            },
+        }
+        for toolkit_name, tool in _iter_tools(toolkits)
+    ]
+
+
+def to_anthropic(toolkits: Iterable[Toolkit | ToolkitView]) -> list[dict[str, Any]]:
+    """List tools as Anthropic Messages API tools."""
+    return [
+        {
+            "name": qualified_name(toolkit_name, str(tool.name)),
+            "description": tool.description or "",
+            "input_schema": tool.input_schema,
+        }
+        for toolkit_name, tool in _iter_tools(toolkits)
+    ]
+
+
+def to_mcp(toolkits: Iterable[Toolkit | ToolkitView]) -> dict[str, Any]:
+    """List tools as the result of an MCP ``tools/list`` request."""
+    return {
+        "tools": [
+            {
+                "name": qualified_name(toolkit_name, str(tool.name)),
+                "description": tool.description or "",
+                "inputSchema": tool.input_schema,
+                "annotations": {
+                    "readOnlyHint": tool.is_read_only,
+                    "destructiveHint": tool.delete,
+                },
+            }
+            for toolkit_name, tool in _iter_tools(toolkits)
+        ]
+    }
+
+
+FORMATS: dict[str, Callable[[Iterable[Toolkit | ToolkitView]], Any]] = {
+    "openai": to_openai,
+    "anthropic": to_anthropic,
+    "mcp": to_mcp,
+}
+
+
+def render(format: str, toolkits: Iterable[Toolkit | ToolkitView]) -> bytes:
+    """
+    Render toolkits as JSON in one of the `FORMATS`.
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    try:
+        renderer = FORMATS[format]
+    except KeyError:
+        raise ValueError(f"Unknown listing format {format!r}") from None
+    return json.dumps(renderer(toolkits), ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def _iter_tools(toolkits: Iterable[Toolkit | ToolkitView]) -> Iterator[tuple[str, Tool]]:
+    # Sorted, so that a listing renders the same way (and has the same ETag) every time.
+    for toolkit in sorted(toolkits, key=lambda toolkit: toolkit.name):
+        for tool in sorted(toolkit.tools, key=lambda tool: str(tool.name)):
+            yield toolkit.name, tool
@@ -1,18 +1,697 @@
+import asyncio
+import base64
+import binascii
+import itertools
 import json
+import os
+import time
+from contextlib import aclosing
+from typing import Any
+from urllib.parse import urlencode
 
 import tornado
-from jupyter_server.base.handlers import APIHandler
+from jupyter_server.base.handlers import APIHandler, JupyterHandler
+from prometheus_client import CONTENT_TYPE_LATEST
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+from tornado.web import StaticFileHandler
+from tornado.websocket import WebSocketClosedError, WebSocketHandler
 
+from .batch import BatchError
+from .execution import ToolArgumentError, ToolTimeoutError
+from .formats import DEFAULT_FORMAT, FORMATS, render
+from .models import Capability, RegistryChange, Tool
+from .scheduling import SchedulerFullError
 
-class ToolkitHandler(APIHandler):
+NDJSON_CONTENT_TYPE = "application/x-ndjson"
+SSE_CONTENT_TYPE = "text/event-stream"
+
+
+class QueryArgumentsMixin:
+    """Parsing of the query arguments shared by the listing and search endpoints."""
+
+    def _get_capabilities(self, argument: str) -> Capability | None:
+        value = self.get_argument(argument, "")  # type: ignore[attr-defined]
+        if not value:
+            return None
+        try:
+            return Capability.from_names(value.split(","))
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, str(e)) from e
+
+    def _get_limit(self) -> int | None:
+        value = self.get_argument("limit", "")  # type: ignore[attr-defined]
+        if not value:
+            return None
+        if not value.isdigit() or int(value) < 1:
+            raise tornado.web.HTTPError(400, f"Invalid limit {value!r}")
+        return int(value)
+
+
+class TracedRequestMixin:
+    """Records the handler's requests in the request trace, when one is configured."""
+
+    def on_finish(self):
+        super().on_finish()  # type: ignore[misc]
+        recorder = self.settings.get("toolkit_trace_recorder")  # type: ignore[attr-defined]
+        if recorder is None:
+            return
+        request = self.request  # type: ignore[attr-defined]
+        base_url = self.base_url  # type: ignore[attr-defined]
+        path = request.uri[len(base_url) :] if request.uri.startswith(base_url) else request.uri
+        duration = request.request_time()
+        recorder.record(
+            time.time() - duration,
+            request.method,
+            path,
+            request.body,
+            self.get_status(),  # type: ignore[attr-defined]
+            duration,
+        )
+
+
+class ToolkitHandler(TracedRequestMixin, QueryArgumentsMixin, APIHandler):
 
     @property
     def toolkit_registry(self):
         return self.settings["toolkit_registry"]
-    
+
     @tornado.web.authenticated
     async def get(self):
         assert self.serverapp is not None
-        toolkits = self.toolkit_registry.list_toolkits()
-        self.finish(toolkits.model_dump_json())
-        
+        names = self._get_names()
+        any_of = self._get_capabilities("any_of")
+        all_of = self._get_capabilities("all_of")
+        limit = self._get_limit()
+        after = self._get_cursor()
+        stream = self._wants_ndjson()
+        since = self._get_revision()
+        format = self._get_format()
+        if format != DEFAULT_FORMAT and (stream or since is not None):
+            raise tornado.web.HTTPError(
+                400, f"Streaming and 'since' aren't supported with format={format!r}"
+            )
+        if since is not None:
+            await self._finish_changes(since, self._get_wait())
+            return
+
+        if not (names or any_of or all_of or limit or after or stream):
+            self._finish_listing(format)
+            return
+
+        toolkits = self.toolkit_registry.iter_toolkits(
+            names or None, any_of=any_of, all_of=all_of, after=after
+        )
+        if limit:
+            # Take one extra toolkit to find out whether there is a next page.
+            page = list(itertools.islice(toolkits, limit + 1))
+            if len(page) > limit:
+                page = page[:limit]
+                self._set_next_link(page[-1].name)
+            toolkits = iter(page)
+
+        metrics = self.toolkit_registry.metrics
+        if stream:
+            self.set_header("Content-Type", NDJSON_CONTENT_TYPE)
+            for toolkit in toolkits:
+                with metrics.track_serialization():
+                    line = toolkit.model_dump_json() + "\n"
+                self.write(line)
+                await self.flush()
+            self.finish(set_content_type=NDJSON_CONTENT_TYPE)
+        elif format != DEFAULT_FORMAT:
+            with metrics.track_serialization():
+                self.finish(render(format, toolkits))
+        else:
+            with metrics.track_serialization():
+                body = "[" + ",".join(toolkit.model_dump_json() for toolkit in toolkits) + "]"
+            self.finish(body)
+
+    def _finish_listing(self, format: str = DEFAULT_FORMAT):
+        listing = self.toolkit_registry.get_toolkit_listing(format)
+        compress = self.toolkit_registry.compress_listing
+        self.set_header("Etag", listing.etag)
+        if compress:
+            # The identity and gzip bodies share one ETag, so caches must key on both.
+            self.add_header("Vary", "Accept-Encoding")
+        if self.check_etag_header():
+            self.set_status(304)
+            self.finish()
+            return
+
+        body = listing.body
+        if compress and self._accepts_gzip():
+            self.set_header("Content-Encoding", "gzip")
+            body = listing.gzipped
+        self.finish(body)
+
+    async def _finish_changes(self, since: int, wait: float):
+        app = self.toolkit_registry
+        if wait and app.revision == since:
+            await app.wait_for_changes(since, wait)
+
+        changes = app.get_changes(since)
+        metrics = app.metrics
+        if changes is None:
+            # The change log doesn't reach back to `since`: send everything instead.
+            listing = app.get_toolkit_listing()
+            body = f'{{"revision":{listing.generation},"snapshot":true,"toolkits":'
+            self.finish(body.encode() + listing.body + b"}")
+            return
+
+        revision = changes[-1].generation if changes else since
+        touched = {change.toolkit_name for change in changes}
+        with metrics.track_serialization():
+            toolkits = list(app.iter_toolkits(touched))
+            removed = sorted(touched - {toolkit.name for toolkit in toolkits})
+            body = (
+                f'{{"revision":{revision},"snapshot":false,'
+                f'"changes":{json.dumps([change._asdict() for change in changes])},'
+                f'"toolkits":[{",".join(toolkit.model_dump_json() for toolkit in toolkits)}],'
+                f'"removed":{json.dumps(removed)}}}'
+            )
+        self.finish(body)
+
+    def _accepts_gzip(self) -> bool:
+        return "gzip" in self.request.headers.get("Accept-Encoding", "")
+
+    def _wants_ndjson(self) -> bool:
+        if self.get_argument("stream", "").lower() in ("1", "true", "ndjson"):
+            return True
+        return NDJSON_CONTENT_TYPE in self.request.headers.get("Accept", "")
+
+    def _get_format(self) -> str:
+        format = self.get_argument("format", DEFAULT_FORMAT)
+        if format != DEFAULT_FORMAT and format not in FORMATS:
+            raise tornado.web.HTTPError(400, f"Unknown listing format {format!r}")
+        return format
+
+    def _get_names(self) -> list[str]:
+        names: list[str] = []
+        for value in self.get_arguments("name"):
+            names.extend(name for name in value.split(",") if name)
+        return names
+
+    def _get_revision(self) -> int | None:
+        value = self.get_argument("since", "")
+        if not value:
+            return None
+        if not value.isdigit():
+            raise tornado.web.HTTPError(400, f"Invalid revision {value!r}")
+        return int(value)
+
+    def _get_wait(self) -> float:
+        value = self.get_argument("wait", "")
+        if not value:
+            return 0.0
+        try:
+            wait = float(value)
+        except ValueError:
+            wait = -1.0
+        if not wait >= 0:
+            raise tornado.web.HTTPError(400, f"Invalid wait {value!r}")
+        return wait
+
+    def _get_cursor(self) -> str | None:
+        value = self.get_argument("cursor", "")
+        if not value:
+            return None
+        try:
+            return base64.urlsafe_b64decode(value.encode()).decode()
+        except (binascii.Error, UnicodeDecodeError) as e:
+            raise tornado.web.HTTPError(400, f"Invalid cursor {value!r}") from e
+
+    def _set_next_link(self, last_name: str):
+        arguments = {
+            key: [value.decode() for value in values]
+            for key, values in self.request.query_arguments.items()
+        }
+        arguments["cursor"] = [base64.urlsafe_b64encode(last_name.encode()).decode()]
+        query = urlencode(arguments, doseq=True)
+        self.set_header("Link", f'<{self.request.path}?{query}>; rel="next"')
+
+
+class ToolSearchHandler(TracedRequestMixin, QueryArgumentsMixin, APIHandler):
+    """
+    Searches tools by name, description and parameter names.
+
+    ``GET /api/tools/search?q=...`` returns the best matching tools, best first, as
+    ``[{"toolkit": ..., "score": ..., "tool": {...}}]``. `limit` (default 10) caps the
+    number of results and `any_of`/`all_of` filter them by capability.
+    """
+
+    @tornado.web.authenticated
+    async def get(self):
+        query = self.get_argument("q", "")
+        if not query.strip():
+            raise tornado.web.HTTPError(400, "Missing search query 'q'")
+        app = self.settings["toolkit_registry"]
+        hits = app.search_tools(
+            query,
+            limit=self._get_limit() or 10,
+            any_of=self._get_capabilities("any_of"),
+            all_of=self._get_capabilities("all_of"),
+        )
+
+        results = []
+        for hit in hits:
+            try:
+                tool = app.get_tool(hit.toolkit_name, hit.tool_name)
+            except LookupError:
+                # Removed since the search; leave it out.
+                continue
+            head = json.dumps({"toolkit": hit.toolkit_name, "score": round(hit.score, 4)})
+            results.append(f'{head[:-1]},"tool":{tool.model_dump_json()}}}')
+        self.finish("[" + ",".join(results) + "]")
+
+
+class ToolMetricsHandler(APIHandler):
+    """Serves the tool metrics in the Prometheus text format."""
+
+    @tornado.web.authenticated
+    async def get(self):
+        metrics = self.settings["toolkit_registry"].metrics
+        self.finish(metrics.generate_latest(), set_content_type=CONTENT_TYPE_LATEST)
+
+
+class ToolBatchHandler(TracedRequestMixin, APIHandler):
+    """
+    Runs a batch of tool calls, streaming each result as NDJSON as soon as it is done.
+
+    The body holds the `calls` (see `AIServerToolsApp.invoke_batch`), and optionally a
+    `timeout` for each call and the `capabilities` the batch's tools may have. Each
+    line is ``{"id": ..., "result": ...}``, or ``{"id": ..., "status": ..., "error": ...}``
+    for a call that failed or was skipped because a call it depends on failed.
+    """
+
+    @tornado.web.authenticated
+    async def post(self):
+        body = self._get_body()
+        try:
+            timeout = _parse_timeout(body.get("timeout"))
+            names = body.get("capabilities")
+            if names is not None and not isinstance(names, list):
+                raise ValueError("'capabilities' must be a list of capability names")
+            allowed = Capability.from_names(names) if names is not None else None
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, str(e)) from e
+
+        user = _user_name(self.current_user)
+        # Run the batch as its own task, so that its calls are cancelled if the client leaves.
+        self._batch = asyncio.ensure_future(
+            self._run_batch(body.get("calls"), user, timeout, allowed)
+        )
+        try:
+            await self._batch
+        except asyncio.CancelledError:
+            if not self._batch.cancelled():
+                raise
+            self.log.info("Cancelled a batch of tool calls: the client went away.")
+
+    def on_connection_close(self):
+        super().on_connection_close()
+        batch = getattr(self, "_batch", None)
+        if batch is not None:
+            batch.cancel()
+
+    async def _run_batch(
+        self, calls: Any, user: str | None, timeout: float | None, allowed: Capability | None
+    ):
+        app = self.settings["toolkit_registry"]
+        results = app.invoke_batch(calls, user=user, timeout=timeout, allowed=allowed)
+        started = False
+        try:
+            async with aclosing(results):
+                async for result in results:
+                    if result.error is None:
+                        result = result._replace(result=await app.spill_result(result.result))
+                    if not started:
+                        self.set_header("Content-Type", NDJSON_CONTENT_TYPE)
+                        started = True
+                    self.write(json.dumps(result.to_json(), default=str) + "\n")
+                    await self.flush()
+        except BatchError as e:
+            raise tornado.web.HTTPError(400, str(e)) from e
+        except LookupError as e:
+            raise tornado.web.HTTPError(404, str(e)) from e
+        except StreamClosedError:
+            return
+        self.finish(set_content_type=NDJSON_CONTENT_TYPE)
+
+    def _get_body(self) -> dict:
+        try:
+            body = json.loads(self.request.body or b"{}")
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, f"Invalid JSON body: {e}") from e
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, "The body must be a JSON object")
+        return body
+
+
+class ToolProfilesHandler(APIHandler):
+    """Lists the kept tool call profiles, most recent first."""
+
+    @tornado.web.authenticated
+    async def get(self):
+        profiles = self.settings["toolkit_registry"].list_profiles()
+        self.finish(json.dumps([profile.summary() for profile in profiles]))
+
+
+class ToolProfileHandler(APIHandler):
+    """
+    Downloads a tool call profile, in the format read by ``pstats.Stats(path)``.
+    """
+
+    @tornado.web.authenticated
+    async def get(self, profile_id: str):
+        try:
+            profile = self.settings["toolkit_registry"].get_profile(int(profile_id))
+        except LookupError as e:
+            raise tornado.web.HTTPError(404, str(e)) from e
+        filename = f"{profile.toolkit_name}-{profile.tool_name}-{profile.id}.pstats"
+        self.set_header("Content-Disposition", f'attachment; filename="{filename}"')
+        self.finish(profile.stats, set_content_type="application/octet-stream")
+
+
+class ToolBlobHandler(JupyterHandler, StaticFileHandler):
+    """
+    Serves large tool results from the blob store, with support for Range requests.
+
+    Blobs never change, so their id doubles as their ETag.
+    """
+
+    def initialize(self):  # type: ignore[override]
+        super().initialize(path=str(self.settings["toolkit_blob_store"].path))
+
+    @tornado.web.authenticated
+    async def get(self, path: str, include_body: bool = True):  # type: ignore[override]
+        if not self.settings["toolkit_blob_store"].touch(path):
+            raise tornado.web.HTTPError(404, f"Blob '{path}' not found")
+        await super().get(path, include_body=include_body)
+
+    def compute_etag(self) -> str | None:
+        # The default hashes the whole file, and remembers the hash forever.
+        return f'"{os.path.basename(self.absolute_path or "")}"'
+
+    def get_content_type(self) -> str:
+        return "application/octet-stream"
+
+
+class ToolInvocationHandler(TracedRequestMixin, APIHandler):
+
+    @property
+    def toolkit_registry(self):
+        return self.settings["toolkit_registry"]
+
+    @tornado.web.authenticated
+    async def post(self, toolkit_name: str, tool_name: str):
+        arguments, timeout = self._get_call_options()
+        user = _user_name(self.current_user)
+        # Run the call as its own task, so that it can be cancelled if the client leaves.
+        self._call = asyncio.ensure_future(
+            self._call_tool(toolkit_name, tool_name, arguments, user, timeout)
+        )
+        try:
+            await self._call
+        except asyncio.CancelledError:
+            if not self._call.cancelled():
+                raise
+            self.log.info(
+                "Cancelled tool '%s' in toolkit '%s': the client went away.",
+                tool_name,
+                toolkit_name,
+            )
+
+    def on_connection_close(self):
+        super().on_connection_close()
+        call = getattr(self, "_call", None)
+        if call is not None:
+            call.cancel()
+
+    async def _call_tool(
+        self,
+        toolkit_name: str,
+        tool_name: str,
+        arguments: dict,
+        user: str | None,
+        timeout: float | None,
+    ):
+        try:
+            tool = self.toolkit_registry.get_tool(toolkit_name, tool_name)
+            if tool.is_generator:
+                await self._stream_result(toolkit_name, tool_name, tool, arguments, user, timeout)
+                return
+            result = await self.toolkit_registry.invoke_tool(
+                toolkit_name, tool_name, arguments, user=user, timeout=timeout, tool=tool
+            )
+            result = await self.toolkit_registry.spill_result(result)
+        except LookupError as e:
+            raise tornado.web.HTTPError(404, str(e)) from e
+        except ToolArgumentError as e:
+            raise tornado.web.HTTPError(400, str(e)) from e
+        except ToolTimeoutError as e:
+            raise tornado.web.HTTPError(504, str(e)) from e
+        except SchedulerFullError as e:
+            # Not an HTTPError: sending those clears the Retry-After header.
+            self.set_status(429)
+            self.set_header("Retry-After", str(e.retry_after))
+            self.finish(json.dumps({"message": str(e), "reason": None}))
+            return
+        except Exception as e:
+            self.log.exception("Tool '%s' in toolkit '%s' failed.", tool_name, toolkit_name)
+            raise tornado.web.HTTPError(500, f"Tool '{tool_name}' failed: {e}") from e
+
+        self.finish(json.dumps({"result": result}, default=str))
+
+    async def _stream_result(
+        self,
+        toolkit_name: str,
+        tool_name: str,
+        tool: Tool,
+        arguments: dict,
+        user: str | None,
+        timeout: float | None,
+    ):
+        """
+        Write each chunk of a generator tool's result as soon as it is produced.
+
+        Chunks are sent as Server-Sent Events if the client accepts them, and as NDJSON
+        otherwise. The next chunk is only produced once the previous one has been
+        flushed to the client. Errors raised before the first chunk become regular
+        error responses; later ones are sent as a final error message.
+        """
+        sse = SSE_CONTENT_TYPE in self.request.headers.get("Accept", "")
+        content_type = SSE_CONTENT_TYPE if sse else NDJSON_CONTENT_TYPE
+        chunks = self.toolkit_registry.stream_tool(
+            toolkit_name, tool_name, arguments, user=user, timeout=timeout, tool=tool
+        )
+        started = False
+        try:
+            async with aclosing(chunks):
+                async for chunk in chunks:
+                    chunk = await self.toolkit_registry.spill_result(chunk)
+                    if not started:
+                        self.set_header("Content-Type", content_type)
+                        self.set_header("Cache-Control", "no-cache")
+                        started = True
+                    if sse:
+                        self.write(f"data: {json.dumps(chunk, default=str)}\n\n")
+                    else:
+                        self.write(json.dumps({"chunk": chunk}, default=str) + "\n")
+                    await self.flush()
+        except StreamClosedError:
+            return
+        except Exception as e:
+            if not started:
+                raise
+            self.log.exception("Tool '%s' in toolkit '%s' failed.", tool_name, toolkit_name)
+            message = f"Tool '{tool_name}' failed: {e}"
+            if sse:
+                self.write(f"event: error\ndata: {json.dumps({'message': message})}\n\n")
+            else:
+                self.write(json.dumps({"error": message}) + "\n")
+
+        if sse:
+            self.write("event: end\ndata: {}\n\n")
+        self.finish(set_content_type=content_type)
+
+    def _get_call_options(self) -> tuple[dict, float | None]:
+        """Return the arguments and the timeout of the call from the request body."""
+        if not self.request.body:
+            return {}, None
+        try:
+            body = json.loads(self.request.body)
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, f"Invalid JSON body: {e}") from e
+        if not isinstance(body, dict):
+            raise tornado.web.HTTPError(400, "'arguments' must be a JSON object")
+
+        arguments = body.get("arguments", {})
+        if not isinstance(arguments, dict):
+            raise tornado.web.HTTPError(400, "'arguments' must be a JSON object")
+        try:
+            timeout = _parse_timeout(body.get("timeout"))
+        except ValueError as e:
+            raise tornado.web.HTTPError(400, str(e)) from e
+        return arguments, timeout
+
+
+class ToolkitWebSocketHandler(JupyterHandler, WebSocketHandler):
+    """
+    A WebSocket carrying many concurrent tool listings and calls over one connection.
+
+    The connection is authenticated once, when it is opened. Clients then send JSON
+    messages tagged with an `id` of their choosing:
+
+    - ``{"id": ..., "type": "list"}`` replies with the toolkit listing
+    - ``{"id": ..., "type": "invoke", "toolkit": ..., "tool": ..., "arguments": {...}}``
+      calls a tool; generator tools send ``chunk`` messages followed by ``end``. An
+      optional ``"timeout"`` gives the number of seconds the call may take
+    - ``{"id": ..., "type": "cancel"}`` cancels a call that is still running
+
+    Replies carry the `id` of their request and may arrive in any order. Failed
+    calls reply with an ``error`` message holding an HTTP-like `status`. The server
+    also pushes ``{"type": "registry_changed", ...}`` whenever the registry changes.
+    """
+
+    @property
+    def toolkit_registry(self):
+        return self.settings["toolkit_registry"]
+
+    async def get(self, *args, **kwargs):
+        # Authenticate the connection once; messages on it aren't checked again.
+        if self.current_user is None:
+            self.log.warning("Couldn't authenticate toolkit WebSocket connection.")
+            raise tornado.web.HTTPError(403)
+        await super().get(*args, **kwargs)
+
+    def open(self, *args, **kwargs):
+        self._loop = IOLoop.current()
+        self._calls: dict[Any, asyncio.Task] = {}
+        self.toolkit_registry.add_registry_listener(self._on_registry_change)
+
+    def on_close(self):
+        self.toolkit_registry.remove_registry_listener(self._on_registry_change)
+        for task in self._calls.values():
+            task.cancel()
+        self._calls.clear()
+
+    def on_message(self, message):
+        try:
+            request = json.loads(message)
+            if not isinstance(request, dict):
+                raise ValueError("messages must be JSON objects")
+        except ValueError as e:
+            self._send({"type": "error", "status": 400, "message": f"Invalid message: {e}"})
+            return
+
+        request_id = request.get("id")
+        kind = request.get("type")
+        if kind == "list":
+            self._send_listing(request_id)
+        elif kind == "invoke":
+            if request_id in self._calls:
+                self._send_error(request_id, 400, f"A call with id {request_id!r} is running")
+                return
+            task = asyncio.ensure_future(self._invoke(request_id, request))
+            self._calls[request_id] = task
+            task.add_done_callback(lambda _: self._calls.pop(request_id, None))
+        elif kind == "cancel":
+            if request_id in self._calls:
+                self._calls[request_id].cancel()
+        else:
+            self._send_error(request_id, 400, f"Unknown message type {kind!r}")
+
+    async def _invoke(self, request_id, request: dict):
+        toolkit_name = request.get("toolkit")
+        tool_name = request.get("tool")
+        arguments = request.get("arguments") or {}
+        if not isinstance(arguments, dict):
+            self._send_error(request_id, 400, "'arguments' must be a JSON object")
+            return
+        try:
+            timeout = _parse_timeout(request.get("timeout"))
+        except ValueError as e:
+            self._send_error(request_id, 400, str(e))
+            return
+
+        app = self.toolkit_registry
+        user = _user_name(self.current_user)
+        try:
+            tool = app.get_tool(toolkit_name, tool_name)
+            if tool.is_generator:
+                chunks = app.stream_tool(
+                    toolkit_name, tool_name, arguments, user=user, timeout=timeout, tool=tool
+                )
+                async with aclosing(chunks):
+                    async for chunk in chunks:
+                        chunk = await app.spill_result(chunk)
+                        self._send({"id": request_id, "type": "chunk", "chunk": chunk})
+                self._send({"id": request_id, "type": "end"})
+            else:
+                result = await app.invoke_tool(
+                    toolkit_name, tool_name, arguments, user=user, timeout=timeout, tool=tool
+                )
+                result = await app.spill_result(result)
+                self._send({"id": request_id, "type": "result", "result": result})
+        except asyncio.CancelledError:
+            self._send({"id": request_id, "type": "cancelled"})
+        except LookupError as e:
+            self._send_error(request_id, 404, str(e))
+        except ToolArgumentError as e:
+            self._send_error(request_id, 400, str(e))
+        except ToolTimeoutError as e:
+            self._send_error(request_id, 504, str(e))
+        except SchedulerFullError as e:
+            self._send(
+                {
+                    "id": request_id,
+                    "type": "error",
+                    "status": 429,
+                    "message": str(e),
+                    "retry_after": e.retry_after,
+                }
+            )
+        except Exception as e:
+            self.log.exception("Tool '%s' in toolkit '%s' failed.", tool_name, toolkit_name)
+            self._send_error(request_id, 500, f"Tool '{tool_name}' failed: {e}")
+
+    def _send_listing(self, request_id):
+        # Splice the cached listing in rather than decoding and re-encoding it.
+        listing = self.toolkit_registry.get_toolkit_listing()
+        header = json.dumps({"id": request_id, "type": "result"})[:-1]
+        self._write(f'{header}, "result": {listing.body.decode()}}}')
+
+    def _on_registry_change(self, change: RegistryChange):
+        # Registry listeners may run on any thread; hop onto the connection's loop.
+        message = {"type": "registry_changed", **change._asdict()}
+        self._loop.add_callback(self._send, message)
+
+    def _send_error(self, request_id, status: int, message: str):
+        self._send({"id": request_id, "type": "error", "status": status, "message": message})
+
+    def _send(self, message: dict):
+        self._write(json.dumps(message, default=str))
+
+    def _write(self, message: str):
+        try:
+            self.write_message(message)
+        except WebSocketClosedError:
+            pass
+
+
+def _user_name(user) -> str | None:
+    """The name tool calls are counted under for the scheduler's per-user limit."""
+    if user is None:
+        return None
+    if isinstance(user, str):
+        return user
+    return getattr(user, "username", None)
+
+
+def _parse_timeout(value) -> float | None:
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not value > 0:
+        raise ValueError("'timeout' must be a positive number of seconds")
+    return float(value)
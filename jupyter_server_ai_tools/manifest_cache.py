@@ -0,0 +1,185 @@
+import hashlib
+import inspect
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+from importlib.metadata import EntryPoint
+from pathlib import Path
+from typing import Any
+
+from .models import LazyCallable, Tool, Toolkit
+
+# Bump when the layout of the cache file or of the manifests in it changes.
+MANIFEST_CACHE_VERSION = 2
+
+
+def tool_manifest(tool: Tool) -> dict[str, Any] | None:
+    """
+    Describe a tool as a manifest entry accepted by `Tool.from_manifest`.
+
+    The entry includes the tool's input schema, so that listing a tool built from it
+    doesn't import the tool. Getting the schema imports lazy callables, so this is
+    meant to be called when the provider was loaded anyway.
+
+    Returns None if the tool can't be described by reference, e.g. because its
+    callable is a local function or a bound method, or it is a subclass of `Tool`,
+    or if its input schema can't be derived.
+    """
+    if type(tool) is not Tool:
+        return None
+    if isinstance(tool.callable, LazyCallable):
+        reference = tool.callable.reference
+    elif inspect.isfunction(tool.callable) and "<" not in tool.callable.__qualname__:
+        reference = f"{tool.callable.__module__}:{tool.callable.__qualname__}"
+    else:
+        return None
+
+    spec: dict[str, Any] = {
+        name: getattr(tool, name) for name in Tool.model_fields if name != "callable"
+    }
+    spec["callable"] = reference
+    try:
+        spec["inputSchema"] = tool.input_schema
+    except Exception:
+        return None
+    return spec
+
+
+def toolkit_manifest(toolkit: Toolkit) -> dict[str, Any] | None:
+    """Describe a toolkit as a manifest, or return None if one of its tools can't be."""
+    if type(toolkit) is not Toolkit:
+        return None
+    tools = []
+    for tool in sorted(toolkit.tools, key=lambda tool: str(tool.name)):
+        spec = tool_manifest(tool)
+        if spec is None:
+            return None
+        tools.append(spec)
+    return {"name": toolkit.name, "description": toolkit.description, "tools": tools}
+
+
+class ManifestCache:
+    """
+    A file of the toolkit manifests loaded from entry points, reused across restarts.
+
+    Each manifest is stored with a fingerprint of its entry point: the version of the
+    distribution declaring it and a hash of the source of the module it points at.
+    While the fingerprint matches, the toolkit is built from the cached manifest
+    without importing or inspecting its provider. Because tools may live in other
+    modules than the manifest, the manifests served from the cache should be checked
+    against the real entry points later, with `discovery.revalidate_toolkits`.
+    """
+
+    def __init__(self, path: str | os.PathLike, log: logging.Logger | None = None):
+        self.path = Path(path)
+        self.log = log or logging.getLogger(__name__)
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._fingerprints: dict[str, dict[str, Any]] = {}
+        self._hits: list[EntryPoint] = []
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, entry_point: EntryPoint) -> dict[str, Any] | None:
+        """Return the cached manifest for `entry_point`, if it is still up to date."""
+        key = _entry_key(entry_point)
+        entry = self._entries.get(key)
+        if entry is None or entry["fingerprint"] != self._fingerprint(entry_point):
+            return None
+        with self._lock:
+            self._hits.append(entry_point)
+        return entry["manifest"]
+
+    def put(self, entry_point: EntryPoint, toolkit: Toolkit) -> bool:
+        """
+        Cache the manifest of the toolkit loaded from `entry_point`.
+
+        Returns whether the cached manifest changed. Toolkits that can't be described
+        by a manifest are dropped from the cache.
+        """
+        key = _entry_key(entry_point)
+        manifest = toolkit_manifest(toolkit)
+        with self._lock:
+            if manifest is None:
+                self._dirty |= self._entries.pop(key, None) is not None
+                return False
+            # Compare as stored, i.e. after a round trip through JSON.
+            manifest = json.loads(json.dumps(manifest))
+            entry = {"fingerprint": self._fingerprint(entry_point), "manifest": manifest}
+            if self._entries.get(key) == entry:
+                return False
+            self._entries[key] = entry
+            self._dirty = True
+            return True
+
+    def discard(self, entry_point: EntryPoint):
+        with self._lock:
+            self._dirty |= self._entries.pop(_entry_key(entry_point), None) is not None
+
+    def take_hits(self) -> list[EntryPoint]:
+        """Return, and forget, the entry points served from the cache so far."""
+        with self._lock:
+            hits, self._hits = self._hits, []
+        return hits
+
+    def save(self):
+        """Write the cache file, if anything changed since it was read."""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": MANIFEST_CACHE_VERSION, "entries": self._entries}
+            body = json.dumps(data, separators=(",", ":")).encode()
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # Write a temporary file and move it into place, so readers never see half of it.
+            fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=".manifest-cache-")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(temp_path, self.path)
+        except OSError:
+            self.log.warning("Failed to write the toolkit manifest cache to '%s'.", self.path)
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_bytes())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError):
+            self.log.warning("Ignoring unreadable toolkit manifest cache '%s'.", self.path)
+            return
+        if not isinstance(data, dict) or data.get("version") != MANIFEST_CACHE_VERSION:
+            return
+        self._entries = data.get("entries", {})
+
+    def _fingerprint(self, entry_point: EntryPoint) -> dict[str, Any]:
+        key = _entry_key(entry_point)
+        fingerprint = self._fingerprints.get(key)
+        if fingerprint is None:
+            dist = entry_point.dist
+            source = _find_source(entry_point.module)
+            fingerprint = {
+                "dist": dist.name if dist is not None else None,
+                "version": dist.version if dist is not None else None,
+                "source": hashlib.sha1(source.read_bytes()).hexdigest() if source else None,
+            }
+            self._fingerprints[key] = fingerprint
+        return fingerprint
+
+
+def _entry_key(entry_point: EntryPoint) -> str:
+    return f"{entry_point.group}:{entry_point.name}={entry_point.value}"
+
+
+def _find_source(module: str) -> Path | None:
+    # Look the module up on sys.path by hand: finding its spec would import its parents.
+    relative = Path(*module.split("."))
+    for entry in sys.path:
+        base = Path(entry or ".") / relative
+        for candidate in (base.with_name(base.name + ".py"), base / "__init__.py"):
+            if candidate.is_file():
+                return candidate
+    return None
@@ -0,0 +1,168 @@
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+
+# Tool calls range from sub-millisecond lookups to minutes-long jobs.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class ToolMetrics:
+    """
+    Per-tool call counters, in-flight gauges and latency histograms.
+
+    The metrics live in their own Prometheus registry, so each extension app keeps
+    separate metrics and they can be exposed on the extension's own endpoint.
+    """
+
+    def __init__(self):
+        self.registry = CollectorRegistry()
+        labels = ["toolkit", "tool"]
+        self.calls = Counter(
+            "jupyter_ai_tools_calls", "Tool calls started.", labels, registry=self.registry
+        )
+        self.errors = Counter(
+            "jupyter_ai_tools_errors", "Tool calls that failed.", labels, registry=self.registry
+        )
+        self.in_flight = Gauge(
+            "jupyter_ai_tools_calls_in_flight",
+            "Tool calls currently running.",
+            labels,
+            registry=self.registry,
+        )
+        self.latency = Histogram(
+            "jupyter_ai_tools_call_duration_seconds",
+            "Time taken by tool calls.",
+            labels,
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self.lookups = Counter(
+            "jupyter_ai_tools_lookups",
+            "Tool lookups, by whether the tool was found.",
+            ["found"],
+            registry=self.registry,
+        )
+        self.serialization = Histogram(
+            "jupyter_ai_tools_listing_serialization_seconds",
+            "Time taken to serialize toolkit listings.",
+            registry=self.registry,
+        )
+        self.queued = Gauge(
+            "jupyter_ai_tools_queued_calls",
+            "Tool calls waiting for the scheduler to let them run.",
+            registry=self.registry,
+        )
+        self.queue_wait = Histogram(
+            "jupyter_ai_tools_queue_wait_seconds",
+            "Time tool calls waited in the scheduler's queue.",
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self.coalesced = Counter(
+            "jupyter_ai_tools_coalesced_calls",
+            "Tool calls that shared the run of an identical call already in flight.",
+            labels,
+            registry=self.registry,
+        )
+        self.rejected = Counter(
+            "jupyter_ai_tools_rejected_calls",
+            "Tool calls turned away because the scheduler's queue was full.",
+            registry=self.registry,
+        )
+
+    @contextmanager
+    def track_call(self, toolkit_name: str, tool_name: str) -> Iterator[None]:
+        labels = (toolkit_name, tool_name)
+        self.calls.labels(*labels).inc()
+        # Create the error counter up front so that tools report zero errors.
+        errors = self.errors.labels(*labels)
+        in_flight = self.in_flight.labels(*labels)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            # Cancellations and closed streams aren't counted as errors.
+            errors.inc()
+            raise
+        finally:
+            self.latency.labels(*labels).observe(time.perf_counter() - start)
+            in_flight.dec()
+
+    def track_lookup(self, found: bool):
+        self.lookups.labels("true" if found else "false").inc()
+
+    @contextmanager
+    def track_serialization(self) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.serialization.observe(time.perf_counter() - start)
+
+    def generate_latest(self) -> bytes:
+        """Render the metrics in the Prometheus text format."""
+        return generate_latest(self.registry)
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Return the current metrics as plain data.
+
+        Returns:
+            dict: Per-tool ``calls``, ``errors``, ``coalesced``, ``in_flight``,
+            ``latency_count``, ``latency_sum`` and cumulative ``latency_buckets``,
+            keyed by toolkit and then tool name, plus ``lookups`` and ``serialization``
+            totals and the ``scheduler`` queue depth, rejections and queue wait totals
+        """
+        tools: dict[str, dict[str, dict[str, Any]]] = {}
+        lookups: dict[str, float] = {}
+        serialization: dict[str, float] = {}
+        scheduler: dict[str, float] = {}
+        for metric in self.registry.collect():
+            for sample in metric.samples:
+                if metric.name == "jupyter_ai_tools_queued_calls":
+                    scheduler["queued"] = sample.value
+                    continue
+                if metric.name == "jupyter_ai_tools_rejected_calls":
+                    if sample.name.endswith("_total"):
+                        scheduler["rejected"] = sample.value
+                    continue
+                if metric.name == "jupyter_ai_tools_queue_wait_seconds":
+                    if sample.name.endswith(("_count", "_sum")):
+                        scheduler["wait_" + sample.name.rpartition("_")[2]] = sample.value
+                    continue
+                if metric.name == "jupyter_ai_tools_lookups":
+                    if sample.name.endswith("_total"):
+                        lookups[sample.labels["found"]] = sample.value
+                    continue
+                if metric.name == "jupyter_ai_tools_listing_serialization_seconds":
+                    if sample.name.endswith(("_count", "_sum")):
+                        serialization[sample.name.rpartition("_")[2]] = sample.value
+                    continue
+
+                stats = tools.setdefault(sample.labels["toolkit"], {}).setdefault(
+                    sample.labels["tool"], {"latency_buckets": {}}
+                )
+                if sample.name == "jupyter_ai_tools_calls_total":
+                    stats["calls"] = sample.value
+                elif sample.name == "jupyter_ai_tools_errors_total":
+                    stats["errors"] = sample.value
+                elif sample.name == "jupyter_ai_tools_coalesced_calls_total":
+                    stats["coalesced"] = sample.value
+                elif sample.name == "jupyter_ai_tools_calls_in_flight":
+                    stats["in_flight"] = sample.value
+                elif sample.name.endswith("_bucket"):
+                    stats["latency_buckets"][sample.labels["le"]] = sample.value
+                elif sample.name.endswith("_count"):
+                    stats["latency_count"] = sample.value
+                elif sample.name.endswith("_sum"):
+                    stats["latency_sum"] = sample.value
+
+        return {
+            "tools": tools,
+            "lookups": lookups,
+            "serialization": serialization,
+            "scheduler": scheduler,
+        }
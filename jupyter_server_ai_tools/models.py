@@ -1,7 +1,82 @@
+import bisect
+import gzip
+import hashlib
+import importlib
+import inspect
+import itertools
+import json
 import re
-from typing import Callable
+import threading
+import time
+import typing
+from collections import deque
+from enum import IntFlag
+from types import MappingProxyType
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    Literal,
+    Mapping,
+    NamedTuple,
+    Sequence,
+)
+
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    TypeAdapter,
+    computed_field,
+    create_model,
+    field_serializer,
+    field_validator,
+    model_serializer,
+    model_validator,
+)
+
+
+class Capability(IntFlag):
+    """Bit flags for the capabilities a tool declares."""
+
+    NONE = 0
+    READ = 1
+    WRITE = 2
+    EXECUTE = 4
+    DELETE = 8
+
+    @classmethod
+    def from_flags(
+        cls, read: bool = False, write: bool = False, execute: bool = False, delete: bool = False
+    ) -> "Capability":
+        mask = cls.NONE
+        if read:
+            mask |= cls.READ
+        if write:
+            mask |= cls.WRITE
+        if execute:
+            mask |= cls.EXECUTE
+        if delete:
+            mask |= cls.DELETE
+        return mask
+
+    @classmethod
+    def from_names(cls, names: Iterable[str]) -> "Capability":
+        """Build a mask from capability names such as ``["read", "write"]``."""
+        mask = cls.NONE
+        for name in names:
+            try:
+                mask |= cls[name.strip().upper()]
+            except KeyError:
+                raise ValueError(f"Unknown capability {name!r}") from None
+        return mask
+
+
+# Every possible combination of capability bits, used to walk the bucket index.
+_ALL_MASKS = tuple(Capability(mask) for mask in range(16))
 
-from pydantic import BaseModel, ConfigDict, Field, model_validator
 
 def get_doc_description(func: Callable) -> str:
     """
@@ -22,6 +97,169 @@ def get_doc_description(func: Callable) -> str:
     return match.group(1).strip() if match else ""
 
 
+class LazyCallable:
+    """
+    A callable given as a ``"module:function"`` reference, imported on first use.
+
+    Until then only the reference is known: the name is the function's name from the
+    reference, and there is no docstring to take a description from.
+    """
+
+    def __init__(self, reference: str):
+        module, sep, attribute = reference.partition(":")
+        if not (module and sep and attribute):
+            raise ValueError(f"Expected a 'module:function' reference, got {reference!r}")
+        self.reference = reference
+        self.__name__ = attribute.rpartition(".")[2]
+        self.__doc__ = None
+        self._func: Callable | None = None
+        self._lock = threading.Lock()
+
+    def resolve(self) -> Callable:
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    module, _, attribute = self.reference.partition(":")
+                    func: Any = importlib.import_module(module)
+                    for name in attribute.split("."):
+                        func = getattr(func, name)
+                    self._func = func
+        return self._func
+
+    def __call__(self, *args, **kwargs):
+        return self.resolve()(*args, **kwargs)
+
+    def __reduce__(self):
+        return (LazyCallable, (self.reference,))
+
+    def __repr__(self):
+        return f"LazyCallable({self.reference!r})"
+
+
+def resolve_callable(func: Callable) -> Callable:
+    """Return the underlying function, importing it if it is a `LazyCallable`."""
+    if isinstance(func, LazyCallable):
+        return func.resolve()
+    return func
+
+
+class PositionalCall:
+    """
+    Calls a function that has positional-only parameters with keyword arguments only,
+    passing the arguments for those parameters by position.
+
+    Tools are always called with keyword arguments, so this wraps callables such as
+    ``def f(a, /)`` whose arguments can't be passed by name.
+    """
+
+    __slots__ = ("func", "parameters")
+
+    def __init__(self, func: Callable, parameters: Sequence[tuple[str, Any]]):
+        self.func = func
+        # The name and default (or `inspect.Parameter.empty`) of each positional-only
+        # parameter, in order.
+        self.parameters = tuple(parameters)
+
+    @classmethod
+    def wrap(cls, func: Callable) -> Callable:
+        """Return `func`, wrapped if it has positional-only parameters."""
+        try:
+            signature = inspect.signature(func)
+        except (TypeError, ValueError):
+            return func
+        parameters = [
+            (parameter.name, parameter.default)
+            for parameter in signature.parameters.values()
+            if parameter.kind == parameter.POSITIONAL_ONLY
+        ]
+        return cls(func, parameters) if parameters else func
+
+    def __call__(self, **kwargs):
+        # Pass every positional-only argument up to the last one given, filling the
+        # ones left out in between with their defaults.
+        given = [i for i, (name, _) in enumerate(self.parameters) if name in kwargs]
+        args = [
+            kwargs.pop(name) if name in kwargs else default
+            for name, default in self.parameters[: given[-1] + 1 if given else 0]
+        ]
+        return self.func(*args, **kwargs)
+
+    def __repr__(self):
+        return f"PositionalCall({self.func!r})"
+
+
+def create_arguments_model(func: Callable, name: str) -> type[BaseModel]:
+    """
+    Build a pydantic model describing the keyword arguments of a callable.
+
+    Args:
+        func (callable): The function whose signature is described
+        name (str): The tool name, used for the model title
+
+    Returns:
+        type[BaseModel]: A model that validates and coerces a dict of arguments, and
+        whose JSON schema describes them. Parameters whose annotation has no JSON
+        schema are accepted as ``Any``.
+    """
+    try:
+        signature = inspect.signature(func)
+    except (TypeError, ValueError):
+        # Some builtins don't expose a signature, so accept anything.
+        return create_model(name, __config__=ConfigDict(extra="allow"))
+
+    try:
+        hints = typing.get_type_hints(func)
+    except Exception:
+        hints = {}
+
+    fields: dict[str, Any] = {}
+    extra: Literal["allow", "forbid"] = "forbid"
+    for parameter in signature.parameters.values():
+        if parameter.kind == parameter.VAR_KEYWORD:
+            extra = "allow"
+            continue
+        if parameter.kind == parameter.VAR_POSITIONAL:
+            continue
+
+        annotation = hints.get(parameter.name, parameter.annotation)
+        if annotation is parameter.empty or isinstance(annotation, str):
+            annotation = Any
+        else:
+            try:
+                TypeAdapter(annotation).json_schema()
+            except Exception:
+                annotation = Any
+
+        default = ... if parameter.default is parameter.empty else parameter.default
+        # Alias every field so parameter names can't clash with BaseModel attributes.
+        fields[f"arg_{parameter.name}"] = (annotation, Field(default, alias=parameter.name))
+
+    return create_model(
+        name,
+        __config__=ConfigDict(extra=extra, arbitrary_types_allowed=True),
+        **fields,
+    )
+
+
+def argument_names(func: Callable) -> list[str]:
+    """
+    Return the names of the arguments described by `create_arguments_model`, without the
+    cost of building the model.
+    """
+    try:
+        signature = inspect.signature(func)
+    except (TypeError, ValueError):
+        return []
+    return [
+        parameter.name
+        for parameter in signature.parameters.values()
+        if parameter.kind not in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD)
+    ]
+
+
+ExecutionMode = Literal["inline", "thread", "process"]
+
+
 class Tool(BaseModel):
     callable: Callable = Field(exclude=True)
     name: str | None = None
@@ -30,6 +268,120 @@ class Tool(BaseModel):
     write: bool = False
     execute: bool = False
     delete: bool = False
+    # How synchronous callables are run: on the event loop ("inline"), on the server's
+    # thread pool ("thread") or on its process pool ("process", for CPU-bound tools).
+    # Coroutine functions are always awaited on the event loop.
+    execution_mode: ExecutionMode = Field(default="thread", exclude=True)
+    # Memoize results per set of arguments; only allowed for read-only tools.
+    cache: bool = Field(default=False, exclude=True)
+    # Share one run among identical concurrent calls; not allowed for tools that write
+    # or delete.
+    coalesce: bool = Field(default=False, exclude=True)
+    # Default number of seconds a call may take before it is cancelled.
+    timeout: float | None = Field(default=None, gt=0, exclude=True)
+
+    _arguments_model: type[BaseModel] | None = PrivateAttr(default=None)
+    _input_schema: dict[str, Any] | None = PrivateAttr(default=None)
+    _record: "ToolRecord | None" = PrivateAttr(default=None)
+
+    @classmethod
+    def from_manifest(cls, spec: dict[str, Any]) -> "Tool":
+        """
+        Create a tool from a manifest entry without importing its callable.
+
+        The entry holds the `Tool` fields, with `callable` as a ``"module:function"``
+        reference, and optionally the tool's `inputSchema` so that listing the tool
+        doesn't import it either.
+        """
+        spec = dict(spec)
+        input_schema = spec.pop("inputSchema", None)
+        tool = cls(**spec)
+        tool._input_schema = input_schema
+        return tool
+
+    @field_validator("callable", mode="before")
+    @classmethod
+    def load_reference(cls, value):
+        if isinstance(value, str):
+            return LazyCallable(value)
+        return value
+
+    @property
+    def arguments_model(self) -> type[BaseModel]:
+        """The model validating this tool's arguments, built on first use."""
+        if self._arguments_model is None:
+            self._arguments_model = create_arguments_model(
+                resolve_callable(self.callable), str(self.name)
+            )
+        return self._arguments_model
+
+    @property
+    def input_schema(self) -> dict[str, Any]:
+        """The JSON schema of this tool's arguments, built on first use."""
+        if self._input_schema is None:
+            self._input_schema = self.arguments_model.model_json_schema()
+        return self._input_schema
+
+    def validate_arguments(
+        self, arguments: dict[str, Any], *, with_defaults: bool = False
+    ) -> dict[str, Any]:
+        """
+        Validate and coerce the arguments for a call to this tool.
+
+        Only the arguments given are returned, so that the callable's defaults apply,
+        unless `with_defaults` is set; then calls that only differ by leaving out
+        default arguments get the same arguments.
+
+        Raises:
+            pydantic.ValidationError: If the arguments don't match the tool's signature
+        """
+        model = self.arguments_model
+        validated = model.model_validate(arguments)
+        values = {
+            str(field.alias): getattr(validated, name)
+            for name, field in model.model_fields.items()
+            if with_defaults or name in validated.model_fields_set
+        }
+        if validated.model_extra:
+            values.update(validated.model_extra)
+        return values
+
+    @property
+    def built_input_schema(self) -> dict[str, Any] | None:
+        """The input schema if it was already built or given in a manifest, else None."""
+        return self._input_schema
+
+    @model_serializer(mode="wrap")
+    def _serialize_with_schema(self, handler):
+        data = handler(self)
+        data["inputSchema"] = self.input_schema
+        return data
+
+    @property
+    def capabilities(self) -> Capability:
+        return Capability.from_flags(
+            read=self.read, write=self.write, execute=self.execute, delete=self.delete
+        )
+
+    @property
+    def record(self) -> "ToolRecord":
+        """The compact record of this tool used when calling it, built on first use."""
+        if self._record is None:
+            self._record = ToolRecord(self)
+        return self._record
+
+    @property
+    def is_generator(self) -> bool:
+        """Whether the tool yields its result in chunks. Imports a lazy callable."""
+        return self.record.is_generator
+
+    @property
+    def is_read_only(self) -> bool:
+        return self.capabilities == Capability.READ
+
+    @property
+    def is_mutating(self) -> bool:
+        return self.write or self.delete
 
     @model_validator(mode="after")
     def set_name_description(self):
@@ -42,6 +394,24 @@ class Tool(BaseModel):
         if not self.description:
             self.description = get_doc_description(self.callable)
 
+        if self.execution_mode == "process" and (
+            inspect.iscoroutinefunction(self.callable)
+            or inspect.isgeneratorfunction(self.callable)
+            or inspect.isasyncgenfunction(self.callable)
+        ):
+            raise ValueError(
+                f"Coroutine and generator tools like '{self.name}' can't use the "
+                "'process' execution mode"
+            )
+
+        if self.cache and not self.is_read_only:
+            raise ValueError(f"Only read-only tools can cache their results, not '{self.name}'")
+
+        if self.coalesce and self.is_mutating:
+            raise ValueError(
+                f"Only tools that don't write or delete can coalesce calls, not '{self.name}'"
+            )
+
         return self
 
     def __eq__(self, other):
@@ -53,6 +423,69 @@ class Tool(BaseModel):
         return hash(self.name)
 
 
+CallableKind = Literal["function", "coroutine", "generator", "async_generator"]
+
+
+class ToolRecord:
+    """
+    What the call path needs to know about a tool, computed once.
+
+    Reading these from the `Tool` model means rebuilding the capability mask and
+    inspecting the callable on every call. The callable is resolved, and its kind
+    inspected, the first time `func` or `kind` is read.
+    """
+
+    __slots__ = (
+        "name",
+        "capabilities",
+        "execution_mode",
+        "cache",
+        "coalesce",
+        "timeout",
+        "is_mutating",
+        "_callable",
+        "_func",
+        "_kind",
+    )
+
+    def __init__(self, tool: Tool):
+        self.name = str(tool.name)
+        self.capabilities = tool.capabilities
+        self.execution_mode = tool.execution_mode
+        self.cache = tool.cache
+        self.coalesce = tool.coalesce
+        self.timeout = tool.timeout
+        self.is_mutating = tool.is_mutating
+        self._callable = tool.callable
+        self._func: Callable | None = None
+        self._kind: CallableKind | None = None
+
+    @property
+    def func(self) -> Callable:
+        """The callable to call with the tool's arguments, all given by keyword."""
+        if self._func is None:
+            self._func = PositionalCall.wrap(resolve_callable(self._callable))
+        return self._func
+
+    @property
+    def kind(self) -> CallableKind:
+        if self._kind is None:
+            func = resolve_callable(self._callable)
+            if inspect.isasyncgenfunction(func):
+                self._kind = "async_generator"
+            elif inspect.isgeneratorfunction(func):
+                self._kind = "generator"
+            elif inspect.iscoroutinefunction(func):
+                self._kind = "coroutine"
+            else:
+                self._kind = "function"
+        return self._kind
+
+    @property
+    def is_generator(self) -> bool:
+        return self.kind in ("generator", "async_generator")
+
+
 class ToolSet(set):
     def add(self, item):
         if item in self:
@@ -66,24 +499,188 @@ class Toolkit(BaseModel):
     tools: ToolSet = Field(default_factory=ToolSet)
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    @classmethod
+    def from_manifest(cls, spec: dict[str, Any]) -> "Toolkit":
+        """
+        Create a toolkit from a manifest without importing any of its tools.
+
+        The manifest is a dict with the toolkit's `name`, optional `description`, and
+        a list of `tools` entries as accepted by `Tool.from_manifest`.
+        """
+        tools = ToolSet()
+        for tool_spec in spec.get("tools", []):
+            tools.add(Tool.from_manifest(tool_spec))
+        return cls(name=spec["name"], description=spec.get("description"), tools=tools)
+
+    # Tools bucketed by their capability bitmask, so lookups never scan `tools`.
+    _buckets: dict[Capability, ToolSet] = PrivateAttr(default_factory=dict)
+    _by_name: dict[str | None, Tool] = PrivateAttr(default_factory=dict)
+    _indexed_count: int = PrivateAttr(default=0)
+    # Views handed out by `view`, per capability query; dropped when the tools change.
+    _views: dict[tuple, "ToolkitView"] = PrivateAttr(default_factory=dict)
+    # The registry this toolkit was last registered with, which makes the changes to it
+    # while it (or a copy the registry made of it) is still registered.
+    _registry: "ToolkitRegistry | None" = PrivateAttr(default=None)
+    # Shared by a toolkit and the copies made of it with `_copy`.
+    _lineage: object = PrivateAttr(default_factory=object)
+
+    def model_post_init(self, __context):
+        self._reindex()
+
+    @field_serializer("tools")
+    def _serialize_tools(self, tools: ToolSet) -> list[Tool]:
+        # A list, as dumped tools are dicts, which a set can't hold.
+        return list(tools)
+
     def add_tool(self, tool: Tool):
+        """
+        Add a tool to the toolkit.
+
+        A registered toolkit is never changed in place, as readers may be using it: the
+        registry publishes a copy with the tool instead, as `ToolkitRegistry.add_tool`
+        does, and this toolkit is left as it was. That is also the case when the copy
+        registered by an earlier change is still registered, so tools added through the
+        same toolkit all end up in the registry.
+        """
+        registry = self._registry
+        if registry is not None:
+            with registry._lock:
+                if registry._is_registered_copy(self):
+                    registry.add_tool(self.name, tool)
+                    return
         self.tools.add(tool)
+        self._index_tool(tool)
+
+    def _copy(self) -> "Toolkit":
+        """Copy the toolkit with its own set of tools, to change it copy-on-write."""
+        toolkit = self.model_copy(update={"tools": ToolSet(self.tools)})
+        toolkit._registry = None
+        toolkit._reindex()
+        return toolkit
+
+    def remove_tool(self, name: str) -> Tool:
+        """
+        Remove a tool from the toolkit and return it.
+
+        As with `add_tool`, a registered toolkit is replaced by a copy without the tool.
+        """
+        registry = self._registry
+        if registry is not None:
+            with registry._lock:
+                if registry._is_registered_copy(self):
+                    return registry.remove_tool(self.name, name)
+        tool = self.get_tool(name)
+        self.tools.discard(tool)
+        self._reindex()
+        return tool
 
     def find_tools(
-        self, read: bool = False, write: bool = False, execute: bool = False, delete: bool = False
+        self,
+        read: bool = False,
+        write: bool = False,
+        execute: bool = False,
+        delete: bool = False,
+        *,
+        any_of: Capability | None = None,
+        all_of: Capability | None = None,
     ) -> ToolSet[Tool]:
+        """
+        Find the tools in this toolkit matching a capability query.
+
+        Without `any_of`/`all_of` the capability flags must match exactly. With either
+        of them the flags are ignored and a tool matches when it has at least one of
+        the `any_of` capabilities and every one of the `all_of` capabilities.
+        """
+        self._ensure_index()
         toolset = ToolSet()
-        for tool in self.tools:
-            if (
-                tool.read == read
-                and tool.write == write
-                and tool.execute == execute
-                and tool.delete == delete
-            ):
-                toolset.add(tool)
+        for mask in self._matching_masks(
+            Capability.from_flags(read=read, write=write, execute=execute, delete=delete),
+            any_of,
+            all_of,
+        ):
+            bucket = self._buckets.get(mask)
+            if bucket:
+                toolset.update(bucket)
 
         return toolset
 
+    def view(
+        self,
+        read: bool = False,
+        write: bool = False,
+        execute: bool = False,
+        delete: bool = False,
+        *,
+        any_of: Capability | None = None,
+        all_of: Capability | None = None,
+    ) -> "ToolkitView":
+        """
+        Return a read-only view of the tools matching a capability query.
+
+        The query works like `find_tools`. Views are cached, so asking the same query
+        again returns the same view until a tool is added to the toolkit.
+        """
+        self._ensure_index()
+        key = (
+            Capability.from_flags(read=read, write=write, execute=execute, delete=delete),
+            any_of,
+            all_of,
+        )
+        view = self._views.get(key)
+        if view is None:
+            tools = self.find_tools(
+                read=read,
+                write=write,
+                execute=execute,
+                delete=delete,
+                any_of=any_of,
+                all_of=all_of,
+            )
+            view = ToolkitView(self.name, self.description, frozenset(tools))
+            self._views[key] = view
+        return view
+
+    def get_tool(self, name: str) -> Tool:
+        self._ensure_index()
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise LookupError(f"Tool with {name=} not found in toolkit '{self.name}'.") from None
+
+    @staticmethod
+    def _matching_masks(
+        exact: Capability, any_of: Capability | None, all_of: Capability | None
+    ) -> Iterator[Capability]:
+        if any_of is None and all_of is None:
+            yield exact
+            return
+
+        for mask in _ALL_MASKS:
+            if any_of is not None and not mask & any_of:
+                continue
+            if all_of is not None and mask & all_of != all_of:
+                continue
+            yield mask
+
+    def _index_tool(self, tool: Tool):
+        self._buckets.setdefault(tool.capabilities, ToolSet()).add(tool)
+        self._by_name[tool.name] = tool
+        self._indexed_count += 1
+        self._views.clear()
+
+    def _ensure_index(self):
+        # Tools added straight to `self.tools` bypass `add_tool`; catch up on them here.
+        if self._indexed_count != len(self.tools):
+            self._reindex()
+
+    def _reindex(self):
+        self._buckets = {}
+        self._by_name = {}
+        self._indexed_count = 0
+        self._views = {}
+        for tool in self.tools:
+            self._index_tool(tool)
+
     def __eq__(self, other):
         if not isinstance(other, Toolkit):
             return False
@@ -93,6 +690,52 @@ class Toolkit(BaseModel):
         return hash(self.name)
 
 
+class ToolkitView:
+    """
+    A read-only view of some of a toolkit's tools.
+
+    Views are plain slotted objects rather than models, so handing one out doesn't
+    run any validation or copy the toolkit. They serialize like a `Toolkit`.
+    """
+
+    __slots__ = ("name", "description", "tools")
+
+    name: str
+    description: str | None
+    tools: frozenset[Tool]
+
+    def __init__(self, name: str, description: str | None, tools: frozenset[Tool]):
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "description", description)
+        object.__setattr__(self, "tools", tools)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def model_dump_json(self) -> str:
+        head = json.dumps(
+            {"name": self.name, "description": self.description},
+            ensure_ascii=False,
+            separators=(",", ":"),
+        )
+        tools = ",".join(tool.model_dump_json() for tool in self.tools)
+        return f'{head[:-1]},"tools":[{tools}]}}'
+
+    def __eq__(self, other):
+        if not isinstance(other, (Toolkit, ToolkitView)):
+            return False
+        return self.name == other.name
+
+    def __hash__(self):
+        return hash(self.name)
+
+    def __repr__(self):
+        return f"ToolkitView(name={self.name!r}, tools={len(self.tools)})"
+
+
 class ToolkitSet(set):
     def add(self, item):
         if item in self:
@@ -106,19 +749,337 @@ class ToolkitSet(set):
 
         return "[" + ",".join(items) + "]"
 
+
+class FrozenToolkitSet(frozenset):
+    """An immutable set of the registered toolkits, as returned by `list_toolkits`."""
+
+    def model_dump_json(self):
+        return "[" + ",".join(item.model_dump_json() for item in self) + "]"
+
+
+class ToolkitListing:
+    """
+    The serialized registry listing for one registry generation.
+
+    The JSON body and its ETag are computed once; the gzipped body is computed on
+    first use. Both are reused until the registry changes.
+    """
+
+    def __init__(self, generation: int, body: bytes, serialization_seconds: float = 0.0):
+        self.generation = generation
+        self.body = body
+        self.serialization_seconds = serialization_seconds
+        self.etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        self._gzipped: bytes | None = None
+
+    @property
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body)
+        return self._gzipped
+
+
+ChangeAction = Literal["added", "removed", "replaced"]
+
+
+class RegistryChange(NamedTuple):
+    """
+    A change to the registry, as passed to registry listeners and kept in its change log.
+
+    `tool_name` is set when a single tool of the toolkit changed, and is None when the
+    whole toolkit was added, removed or replaced.
+    """
+
+    generation: int
+    action: ChangeAction
+    toolkit_name: str
+    tool_name: str | None = None
+
+
+class RegistrySnapshot:
+    """
+    The registry's contents at one generation.
+
+    A snapshot is never changed once published: writers build a new one and swap it
+    in, so readers can use the snapshot they got without any locking. The set of
+    toolkits and their sorted names are built on first read, so that writers making
+    many changes in a row don't pay for them on every change.
+    """
+
+    __slots__ = ("generation", "by_name", "_by_name", "_toolkits", "_sorted_names")
+
+    def __init__(self, generation: int, by_name: dict[str, Toolkit]):
+        self.generation = generation
+        self.by_name: Mapping[str, Toolkit] = MappingProxyType(by_name)
+        self._by_name = by_name
+        self._toolkits: FrozenToolkitSet | None = None
+        self._sorted_names: tuple[str, ...] | None = None
+
+    @property
+    def toolkits(self) -> FrozenToolkitSet:
+        # Readers racing to build these build equal values, so no lock is needed.
+        if self._toolkits is None:
+            self._toolkits = FrozenToolkitSet(self.by_name.values())
+        return self._toolkits
+
+    @property
+    def sorted_names(self) -> tuple[str, ...]:
+        if self._sorted_names is None:
+            self._sorted_names = tuple(sorted(self.by_name))
+        return self._sorted_names
+
+    def copy_by_name(self) -> dict[str, Toolkit]:
+        """Return a copy of `by_name` for building the next snapshot."""
+        # Copying the dict itself is much faster than copying through the proxy.
+        return self._by_name.copy()
+
+
 class ToolkitRegistry(BaseModel):
-    toolkits: ToolkitSet[Toolkit] = Field(default_factory=ToolkitSet)
+    # How many changes `changes_since` can replay before clients need a full snapshot.
+    max_changes: int = Field(default=1000, exclude=True)
     model_config = ConfigDict(arbitrary_types_allowed=True)
 
+    # Writers hold `_lock` and publish a new `_snapshot`; readers never take the lock.
+    _snapshot: RegistrySnapshot = PrivateAttr()
+    _lock: threading.RLock = PrivateAttr(default_factory=threading.RLock)
+    _listing: ToolkitListing | None = PrivateAttr(default=None)
+    _listeners: tuple[Callable[[RegistryChange], None], ...] = PrivateAttr(default=())
+    _changes: deque[RegistryChange] = PrivateAttr(default_factory=deque)
+
+    def __init__(self, toolkits: Iterable[Toolkit] = (), **data: Any):
+        """Create a registry holding `toolkits` to start with."""
+        super().__init__(**data)
+        by_name: dict[str, Toolkit] = {}
+        for toolkit in toolkits:
+            if toolkit.name in by_name:
+                raise ValueError(f"Toolkit with name '{toolkit.name}' already exists.")
+            toolkit._registry = self
+            by_name[toolkit.name] = toolkit
+        self._snapshot = RegistrySnapshot(0, by_name)
+
+    def model_post_init(self, __context):
+        self._changes = deque(maxlen=self.max_changes)
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def toolkits(self) -> FrozenToolkitSet:
+        """The registered toolkits, as of the current snapshot; change them through the registry."""
+        return self._snapshot.toolkits
+
+    @field_serializer("toolkits")
+    def _serialize_toolkits(self, toolkits: FrozenToolkitSet) -> list[Toolkit]:
+        return list(toolkits)
+
     def register_toolkit(self, toolkit: Toolkit):
-        self.toolkits.add(toolkit)
+        self.register_toolkits([toolkit])
 
-    def list_toolkits(self):
-        toolkits = ToolkitSet()
-        for toolkit in self.toolkits:
-            toolkits.add(toolkit)
-        
-        return toolkits
+    def register_toolkits(self, toolkits: Iterable[Toolkit]):
+        """
+        Register several toolkits at once, publishing a single new snapshot.
+
+        Each toolkit is still recorded as its own change. Nothing is registered if any
+        of the names is taken, or repeated.
+        """
+        with self._lock:
+            by_name = self._snapshot.copy_by_name()
+            added = []
+            for toolkit in toolkits:
+                if toolkit.name in by_name:
+                    raise ValueError(f"Toolkit with name '{toolkit.name}' already exists.")
+                by_name[toolkit.name] = toolkit
+                added.append(toolkit)
+            for toolkit in added:
+                toolkit._reindex()
+                toolkit._registry = self
+            self._publish_many(by_name, [("added", toolkit.name, None) for toolkit in added])
+
+    def unregister_toolkit(self, name: str) -> Toolkit:
+        with self._lock:
+            toolkit = self._get_registered(name)
+            by_name = self._snapshot.copy_by_name()
+            del by_name[name]
+            self._publish(by_name, "removed", name)
+            return toolkit
+
+    def replace_toolkit(self, toolkit: Toolkit):
+        """
+        Register `toolkit`, replacing any registered toolkit with the same name.
+
+        Readers that already got the old toolkit keep using it undisturbed.
+        """
+        with self._lock:
+            by_name = self._snapshot.copy_by_name()
+            action: ChangeAction = "replaced" if toolkit.name in by_name else "added"
+            toolkit._reindex()
+            by_name[toolkit.name] = toolkit
+            self._publish(by_name, action, toolkit.name)
+
+    def add_tool(self, toolkit_name: str, tool: Tool):
+        """Add a tool to a registered toolkit."""
+        with self._lock:
+            toolkit = self._get_registered(toolkit_name)._copy()
+            toolkit.add_tool(tool)
+            self._publish_toolkit(toolkit, "added", str(tool.name))
+
+    def remove_tool(self, toolkit_name: str, tool_name: str) -> Tool:
+        with self._lock:
+            toolkit = self._get_registered(toolkit_name)._copy()
+            tool = toolkit.remove_tool(tool_name)
+            self._publish_toolkit(toolkit, "removed", tool_name)
+            return tool
+
+    def replace_tool(self, toolkit_name: str, tool: Tool):
+        """Add a tool to a registered toolkit, replacing any tool with the same name."""
+        with self._lock:
+            toolkit = self._get_registered(toolkit_name)._copy()
+            action: ChangeAction = "replaced"
+            try:
+                toolkit.remove_tool(str(tool.name))
+            except LookupError:
+                action = "added"
+            toolkit.add_tool(tool)
+            self._publish_toolkit(toolkit, action, str(tool.name))
+
+    def changes_since(self, generation: int) -> list[RegistryChange] | None:
+        """
+        Return the changes made after `generation`, oldest first.
+
+        Returns None when the change log no longer reaches back that far (or the
+        generation is in the future), in which case the client needs a full listing.
+        """
+        with self._lock:
+            current = self._snapshot.generation
+            if generation == current:
+                return []
+            if generation > current or not self._changes:
+                return None
+            oldest = self._changes[0].generation
+            if generation < oldest - 1:
+                return None
+            return list(itertools.islice(self._changes, generation - oldest + 1, None))
+
+    def _publish_toolkit(self, toolkit: Toolkit, action: ChangeAction, tool_name: str):
+        by_name = self._snapshot.copy_by_name()
+        by_name[toolkit.name] = toolkit
+        self._publish(by_name, action, toolkit.name, tool_name)
+
+    def _publish(
+        self,
+        by_name: dict[str, Toolkit],
+        action: ChangeAction,
+        toolkit_name: str,
+        tool_name: str | None = None,
+    ):
+        # Called with `_lock` held.
+        toolkit = by_name.get(toolkit_name)
+        if toolkit is not None:
+            toolkit._registry = self
+        self._publish_many(by_name, [(action, toolkit_name, tool_name)])
+
+    def _publish_many(
+        self,
+        by_name: dict[str, Toolkit],
+        changes: list[tuple[ChangeAction, str, str | None]],
+    ):
+        # Called with `_lock` held. Every change gets its own generation, and readers
+        # go straight from the current snapshot to the one after the last change.
+        if not changes:
+            return
+        generation = self._snapshot.generation
+        self._snapshot = RegistrySnapshot(generation + len(changes), by_name)
+        logged = [
+            RegistryChange(generation + offset, action, toolkit_name, tool_name)
+            for offset, (action, toolkit_name, tool_name) in enumerate(changes, 1)
+        ]
+        self._changes.extend(logged)
+        for change in logged:
+            self._notify(change)
+
+    def add_listener(self, listener: Callable[[RegistryChange], None]):
+        """
+        Call `listener` after every change to the registry.
+
+        Listeners are called synchronously, on the thread that changed the registry,
+        in the order the changes were made.
+        """
+        with self._lock:
+            self._listeners = (*self._listeners, listener)
+
+    def remove_listener(self, listener: Callable[[RegistryChange], None]):
+        with self._lock:
+            listeners = list(self._listeners)
+            listeners.remove(listener)
+            self._listeners = tuple(listeners)
+
+    def _notify(self, change: RegistryChange):
+        for listener in self._listeners:
+            listener(change)
+
+    @property
+    def generation(self) -> int:
+        """
+        The registry's revision: a counter that increases by one on every change.
+        """
+        return self._snapshot.generation
+
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        """The registry's current contents, which stay valid as the registry changes."""
+        return self._snapshot
+
+    def list_toolkits(self) -> FrozenToolkitSet:
+        """Return the registered toolkits. The set is shared until the registry changes."""
+        return self._snapshot.toolkits
+
+    def iter_toolkits(
+        self,
+        names: Iterable[str] | None = None,
+        *,
+        any_of: Capability | None = None,
+        all_of: Capability | None = None,
+        after: str | None = None,
+    ) -> Iterator[Toolkit | ToolkitView]:
+        """
+        Iterate over registered toolkits in name order.
+
+        Args:
+            names: Only yield toolkits with these names
+            any_of: Only yield tools having at least one of these capabilities
+            all_of: Only yield tools having all of these capabilities
+            after: Only yield toolkits whose name sorts after this one, for pagination
+
+        Returns:
+            Iterator[Toolkit | ToolkitView]: The matching toolkits. When a capability
+            filter is given, toolkits are narrowed to views of the matching tools and
+            skipped if none match.
+        """
+        snapshot = self._snapshot
+        ordered: Sequence[str]
+        if names is not None:
+            ordered = sorted(name for name in set(names) if name in snapshot.by_name)
+        else:
+            ordered = snapshot.sorted_names
+        start = bisect.bisect_right(ordered, after) if after is not None else 0
+        for name in ordered[start:]:
+            toolkit = snapshot.by_name[name]
+            if any_of is None and all_of is None:
+                yield toolkit
+                continue
+
+            view = toolkit.view(any_of=any_of, all_of=all_of)
+            if view.tools:
+                yield view
+
+    def get_listing(self) -> ToolkitListing:
+        """Return the serialized listing of all toolkits, cached per generation."""
+        snapshot = self._snapshot
+        listing = self._listing
+        if listing is None or listing.generation != snapshot.generation:
+            start = time.perf_counter()
+            body = snapshot.toolkits.model_dump_json().encode()
+            listing = ToolkitListing(snapshot.generation, body, time.perf_counter() - start)
+            self._listing = listing
+        return listing
 
     def get_toolkit(
         self,
@@ -127,17 +1088,39 @@ class ToolkitRegistry(BaseModel):
         write: bool = False,
         execute: bool = False,
         delete: bool = False,
-    ) -> Toolkit:
+        *,
+        any_of: Capability | None = None,
+        all_of: Capability | None = None,
+    ) -> ToolkitView:
         toolkit_in_registry = self._find_toolkit(name)
         if toolkit_in_registry:
-            tools = toolkit_in_registry.find_tools(
-                read=read, write=write, execute=execute, delete=delete
+            return toolkit_in_registry.view(
+                read=read,
+                write=write,
+                execute=execute,
+                delete=delete,
+                any_of=any_of,
+                all_of=all_of,
             )
-            return Toolkit(name=toolkit_in_registry.name, tools=tools)
         else:
             raise LookupError(f"Tookit with {name=} not found in registry.")
     
+    def get_tool(self, toolkit_name: str, tool_name: str) -> Tool:
+        toolkit = self._find_toolkit(toolkit_name)
+        if toolkit is None:
+            raise LookupError(f"Tookit with name='{toolkit_name}' not found in registry.")
+        return toolkit.get_tool(tool_name)
+
+    def _is_registered_copy(self, toolkit: Toolkit) -> bool:
+        # Whether `toolkit`, or a copy made of it to change it, is registered.
+        registered = self._find_toolkit(toolkit.name)
+        return registered is not None and registered._lineage is toolkit._lineage
+
     def _find_toolkit(self, name: str) -> Toolkit | None:
-        for toolkit in self.toolkits:
-            if toolkit.name == name:
-                return toolkit
+        return self._snapshot.by_name.get(name)
+
+    def _get_registered(self, name: str) -> Toolkit:
+        toolkit = self._find_toolkit(name)
+        if toolkit is None:
+            raise LookupError(f"Tookit with {name=} not found in registry.")
+        return toolkit
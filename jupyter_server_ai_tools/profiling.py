@@ -0,0 +1,232 @@
+import cProfile
+import itertools
+import marshal
+import random
+import threading
+import time
+import tracemalloc
+import types
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Coroutine, Iterator, NamedTuple
+
+# Number of allocation sites reported for calls profiled with memory tracing.
+TOP_ALLOCATIONS = 10
+
+
+class MemoryReport(NamedTuple):
+    peak: int
+    top_allocations: list[str]
+
+
+class CallProfile(NamedTuple):
+    id: int
+    toolkit_name: str
+    tool_name: str
+    # Why the call was profiled: "sampled", or "slow" if an earlier call was slow.
+    reason: str
+    started: float
+    duration: float
+    # The profile in the format written by `pstats.Stats.dump_stats`.
+    stats: bytes
+    memory: MemoryReport | None
+
+    def summary(self) -> dict[str, Any]:
+        """Describe the profile without its stats."""
+        summary = self._asdict()
+        del summary["stats"]
+        summary["memory"] = self.memory._asdict() if self.memory is not None else None
+        return summary
+
+
+class ProfileCapture:
+    """Collects the profile of one tool call, wherever the callable runs."""
+
+    def __init__(self, memory: bool = False):
+        self.memory = memory
+        self.stats = b""
+        self.memory_report: MemoryReport | None = None
+        self._profiler = cProfile.Profile()
+
+    def runcall(self, func: Callable, /, *args, **kwargs) -> Any:
+        """Call a function under the profiler, on the current thread."""
+        tracing = _start_tracing(self.memory)
+        profiling = _enable(self._profiler)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if profiling:
+                self._profiler.disable()
+            self._finish(tracing)
+
+    async def run_coroutine(self, coroutine: Coroutine) -> Any:
+        """
+        Await a coroutine, profiling only the steps it runs itself.
+
+        Memory is traced for the whole call, allocations by other tasks included.
+        """
+        tracing = _start_tracing(self.memory)
+        try:
+            return await _profile_steps(coroutine, self._profiler)
+        finally:
+            self._finish(tracing)
+
+    def absorb(self, stats: bytes, memory_report: MemoryReport | None):
+        """Keep the profile of a call profiled in another process by `profiled_call`."""
+        self.stats = stats
+        self.memory_report = memory_report
+
+    def _finish(self, tracing: bool):
+        if tracing:
+            self.memory_report = _memory_report()
+            tracemalloc.stop()
+        self._profiler.create_stats()
+        self.stats = marshal.dumps(self._profiler.stats)
+
+
+def profiled_call(
+    func: Callable, arguments: dict[str, Any], memory: bool
+) -> tuple[Any, bytes, MemoryReport | None]:
+    """Profile a call in a worker process, returning its result and its profile."""
+    capture = ProfileCapture(memory)
+    result = capture.runcall(func, **arguments)
+    return result, capture.stats, capture.memory_report
+
+
+class CallProfiler:
+    """
+    Captures cProfile (and optionally tracemalloc) profiles of some tool calls.
+
+    A `sample_rate` fraction of the calls is profiled. The profiler can't tell in
+    advance which calls will be slow, so a call taking longer than `slow_threshold`
+    seconds arms it instead: the next call of the same tool is profiled. Only one call
+    is profiled at a time, since profilers and tracemalloc are process-wide; calls
+    picked while another is profiled run unprofiled. The `max_profiles` most recent
+    profiles are kept.
+    """
+
+    def __init__(
+        self,
+        sample_rate: float = 0.0,
+        slow_threshold: float = 0.0,
+        max_profiles: int = 50,
+        memory: bool = False,
+        random: Callable[[], float] = random.random,
+    ):
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.memory = memory
+        self._random = random
+        self._profiles: deque[CallProfile] = deque(maxlen=max_profiles)
+        self._ids = itertools.count(1)
+        self._armed: set[tuple[str, str]] = set()
+        self._busy = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0 or self.slow_threshold > 0
+
+    @contextmanager
+    def profile(self, toolkit_name: str, tool_name: str) -> Iterator[ProfileCapture | None]:
+        """
+        Time a call, and yield a capture to run it under if it was picked for profiling.
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        key = (toolkit_name, tool_name)
+        reason = None
+        if key in self._armed:
+            reason = "slow"
+        elif self.sample_rate and self._random() < self.sample_rate:
+            reason = "sampled"
+        capture = None
+        if reason is not None and self._busy.acquire(blocking=False):
+            self._armed.discard(key)
+            capture = ProfileCapture(self.memory)
+
+        started = time.time()
+        start = time.perf_counter()
+        try:
+            yield capture
+        finally:
+            duration = time.perf_counter() - start
+            if capture is not None:
+                self._busy.release()
+                self._profiles.append(
+                    CallProfile(
+                        next(self._ids),
+                        toolkit_name,
+                        tool_name,
+                        str(reason),
+                        started,
+                        duration,
+                        capture.stats,
+                        capture.memory_report,
+                    )
+                )
+            elif self.slow_threshold and duration > self.slow_threshold:
+                self._armed.add(key)
+
+    def list_profiles(self) -> list[CallProfile]:
+        """Return the kept profiles, most recent first."""
+        return list(reversed(self._profiles))
+
+    def get_profile(self, profile_id: int) -> CallProfile:
+        """
+        Raises:
+            LookupError: If there is no such profile, or it was dropped already
+        """
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return profile
+        raise LookupError(f"Profile {profile_id} not found")
+
+
+@types.coroutine
+def _profile_steps(coroutine: Coroutine, profiler: cProfile.Profile):
+    # Drive the coroutine by hand, so the profiler only runs while it does and not
+    # while the event loop runs other tasks.
+    send: Any = None
+    error: BaseException | None = None
+    while True:
+        profiling = _enable(profiler)
+        try:
+            if error is not None:
+                awaited = coroutine.throw(error)
+            else:
+                awaited = coroutine.send(send)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            if profiling:
+                profiler.disable()
+        send, error = None, None
+        try:
+            send = yield awaited
+        except BaseException as e:
+            error = e
+
+
+def _enable(profiler: cProfile.Profile) -> bool:
+    try:
+        profiler.enable()
+    except ValueError:
+        # Since Python 3.12 only one profiler can run at a time, and one may have been
+        # left running by a thread call that timed out. Run unprofiled then.
+        return False
+    return True
+
+
+def _start_tracing(memory: bool) -> bool:
+    if not memory or tracemalloc.is_tracing():
+        return False
+    tracemalloc.start()
+    return True
+
+
+def _memory_report() -> MemoryReport:
+    peak = tracemalloc.get_traced_memory()[1]
+    statistics = tracemalloc.take_snapshot().statistics("lineno")
+    return MemoryReport(peak, [str(stat) for stat in statistics[:TOP_ALLOCATIONS]])
@@ -0,0 +1,207 @@
+import asyncio
+import bisect
+import itertools
+import math
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Hashable, Mapping
+
+from .metrics import ToolMetrics
+from .models import Capability
+
+# Lower numbers run first. A tool gets the largest number among its capabilities, so
+# a tool that reads and executes waits with the other executing tools.
+DEFAULT_PRIORITIES = {"read": 0, "write": 1, "delete": 1, "execute": 2}
+
+
+class SchedulerFullError(Exception):
+    """Raised when a tool call is turned away because the scheduler's queue is full."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        # Suggested number of seconds to wait before trying again.
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    __slots__ = ("toolkit_name", "user", "future")
+
+    def __init__(self, toolkit_name: str, user: Hashable | None, future: asyncio.Future):
+        self.toolkit_name = toolkit_name
+        self.user = user
+        self.future = future
+
+
+class ToolScheduler:
+    """
+    Admission control for tool calls.
+
+    A call runs once there is room for it under the overall, per-user and per-toolkit
+    concurrency limits. Until then it waits in a bounded queue, ordered by priority
+    and then by arrival; when the queue is full, calls are rejected with
+    `SchedulerFullError`. A limit of 0 means no limit.
+
+    The scheduler must only be used from one event loop.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = 0,
+        max_per_user: int = 0,
+        max_per_toolkit: int = 0,
+        max_queued: int = 0,
+        priorities: Mapping[str, int] = DEFAULT_PRIORITIES,
+        metrics: ToolMetrics | None = None,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_per_toolkit = max_per_toolkit
+        self.max_queued = max_queued
+        self.priorities = dict(priorities)
+        self.metrics = metrics
+        self._running = 0
+        self._by_user: Counter[Hashable] = Counter()
+        self._by_toolkit: Counter[str] = Counter()
+        self._queue: list[tuple[int, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._priority_by_mask: dict[Capability, int] = {}
+        # Moving average of call durations, for estimating Retry-After.
+        self._average_duration = 1.0
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    @property
+    def queued(self) -> int:
+        return len(self._queue)
+
+    def priority(self, capabilities: Capability) -> int:
+        priority = self._priority_by_mask.get(capabilities)
+        if priority is None:
+            priority = max(
+                (
+                    self.priorities.get(str(flag.name).lower(), 0)
+                    for flag in (
+                        Capability.READ,
+                        Capability.WRITE,
+                        Capability.EXECUTE,
+                        Capability.DELETE,
+                    )
+                    if flag in capabilities
+                ),
+                default=0,
+            )
+            self._priority_by_mask[capabilities] = priority
+        return priority
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        toolkit_name: str,
+        user: Hashable | None = None,
+        capabilities: Capability = Capability.NONE,
+    ) -> AsyncIterator[None]:
+        """
+        Wait for room to run a call, and hold it until the block exits.
+
+        Calls without a `user` aren't subject to the per-user limit.
+
+        Raises:
+            SchedulerFullError: If the call has to wait and the queue is full
+        """
+        await self._acquire(toolkit_name, user, self.priority(capabilities))
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._release(toolkit_name, user, time.perf_counter() - start)
+
+    async def _acquire(self, toolkit_name: str, user: Hashable | None, priority: int):
+        if self._can_run(toolkit_name, user):
+            self._start(toolkit_name, user)
+            self._observe_wait(0.0)
+            return
+
+        if self.max_queued and len(self._queue) >= self.max_queued:
+            if self.metrics is not None:
+                self.metrics.rejected.inc()
+            raise SchedulerFullError(
+                f"Too many tool calls are waiting to run ({len(self._queue)}); try again later.",
+                self._retry_after(),
+            )
+
+        waiter = _Waiter(toolkit_name, user, asyncio.get_running_loop().create_future())
+        entry = (priority, next(self._sequence), waiter)
+        # Sequence numbers are unique, so entries never compare their waiters.
+        bisect.insort(self._queue, entry)
+        self._update_depth()
+        start = time.perf_counter()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The call was let in just as it was cancelled; pass its room on.
+                self._release(toolkit_name, user, None)
+            else:
+                self._queue.remove(entry)
+                self._update_depth()
+            raise
+        self._observe_wait(time.perf_counter() - start)
+
+    def _can_run(self, toolkit_name: str, user: Hashable | None) -> bool:
+        if self.max_concurrent and self._running >= self.max_concurrent:
+            return False
+        if self.max_per_toolkit and self._by_toolkit[toolkit_name] >= self.max_per_toolkit:
+            return False
+        if user is not None and self.max_per_user and self._by_user[user] >= self.max_per_user:
+            return False
+        return True
+
+    def _start(self, toolkit_name: str, user: Hashable | None):
+        self._running += 1
+        self._by_toolkit[toolkit_name] += 1
+        if user is not None:
+            self._by_user[user] += 1
+
+    def _release(self, toolkit_name: str, user: Hashable | None, duration: float | None):
+        self._running -= 1
+        self._by_toolkit[toolkit_name] -= 1
+        if not self._by_toolkit[toolkit_name]:
+            del self._by_toolkit[toolkit_name]
+        if user is not None:
+            self._by_user[user] -= 1
+            if not self._by_user[user]:
+                del self._by_user[user]
+        if duration is not None:
+            self._average_duration += 0.2 * (duration - self._average_duration)
+        self._dispatch()
+
+    def _dispatch(self):
+        # Let in, best priority first, every waiting call that now fits the limits.
+        # Calls held back by their user's or toolkit's limit don't block the others.
+        index = 0
+        while index < len(self._queue):
+            if self.max_concurrent and self._running >= self.max_concurrent:
+                break
+            waiter = self._queue[index][2]
+            if waiter.future.done() or not self._can_run(waiter.toolkit_name, waiter.user):
+                index += 1
+                continue
+            del self._queue[index]
+            self._start(waiter.toolkit_name, waiter.user)
+            waiter.future.set_result(None)
+        self._update_depth()
+
+    def _retry_after(self) -> int:
+        slots = self.max_concurrent or max(self._running, 1)
+        return max(1, math.ceil(self._average_duration * (len(self._queue) + 1) / slots))
+
+    def _update_depth(self):
+        if self.metrics is not None:
+            self.metrics.queued.set(len(self._queue))
+
+    def _observe_wait(self, seconds: float):
+        if self.metrics is not None:
+            self.metrics.queue_wait.observe(seconds)
@@ -0,0 +1,210 @@
+import math
+import re
+import threading
+from collections import Counter
+from typing import NamedTuple
+
+from .models import (
+    Capability,
+    LazyCallable,
+    RegistryChange,
+    RegistrySnapshot,
+    Tool,
+    Toolkit,
+    argument_names,
+    resolve_callable,
+)
+
+# Words in snake_case, camelCase, acronyms and numbers: "getHTTPResponse_v2" gives
+# "get", "http", "response", "v" and "2".
+_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+# Name words count more than description words.
+NAME_WEIGHT = 3
+
+
+def tokenize(text: str) -> list[str]:
+    return [word.lower() for word in _WORD.findall(text)]
+
+
+class SearchHit(NamedTuple):
+    toolkit_name: str
+    tool_name: str
+    score: float
+
+
+class _Document(NamedTuple):
+    capabilities: Capability
+    terms: Counter[str]
+    length: int
+
+
+DocumentKey = tuple[str, str]
+
+
+class ToolSearchIndex:
+    """
+    An inverted index over tool names, descriptions and parameter names, ranked with
+    BM25.
+
+    The index is updated one toolkit or tool at a time as the registry changes, and is
+    safe to search while another thread updates it. Names and descriptions are indexed
+    right away, as the registry calls the index while it publishes a change. Parameter
+    names are too when the tool's input schema is already built; otherwise the next
+    search reads them from the tool's signature, so that neither registering nor
+    searching builds schemas.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._documents: dict[DocumentKey, _Document] = {}
+        self._postings: dict[str, dict[DocumentKey, int]] = {}
+        self._total_length = 0
+        # The keys of each toolkit's documents, so that removing a toolkit doesn't scan
+        # every document.
+        self._keys_by_toolkit: dict[str, set[DocumentKey]] = {}
+        # Tools whose parameter names are still to be indexed, with their document.
+        self._pending: dict[DocumentKey, tuple[Tool, _Document]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def add_toolkit(self, toolkit: Toolkit):
+        for tool in toolkit.tools:
+            self.add_tool(toolkit.name, tool)
+
+    def remove_toolkit(self, toolkit_name: str):
+        with self._lock:
+            for key in list(self._keys_by_toolkit.get(toolkit_name, ())):
+                self._remove(key)
+
+    def add_tool(self, toolkit_name: str, tool: Tool):
+        terms: Counter[str] = Counter()
+        for word in tokenize(str(tool.name)):
+            terms[word] += NAME_WEIGHT
+        terms.update(tokenize(tool.description or ""))
+        schema = tool.built_input_schema
+        if schema is not None:
+            for parameter in schema.get("properties", {}):
+                terms.update(tokenize(parameter))
+        document = _Document(tool.capabilities, terms, sum(terms.values()))
+
+        key = (toolkit_name, str(tool.name))
+        with self._lock:
+            self._put(key, document)
+            # Don't import a lazy tool just to index it.
+            if schema is None and not isinstance(tool.callable, LazyCallable):
+                self._pending[key] = (tool, document)
+
+    def remove_tool(self, toolkit_name: str, tool_name: str):
+        with self._lock:
+            self._remove((toolkit_name, tool_name))
+
+    def apply_change(self, change: RegistryChange, snapshot: RegistrySnapshot):
+        """Bring the index up to date with a registry change, given the registry after it."""
+        toolkit = snapshot.by_name.get(change.toolkit_name)
+        if change.tool_name is None:
+            self.remove_toolkit(change.toolkit_name)
+            if toolkit is not None:
+                self.add_toolkit(toolkit)
+        elif change.action == "removed" or toolkit is None:
+            self.remove_tool(change.toolkit_name, change.tool_name)
+        else:
+            self.add_tool(change.toolkit_name, toolkit.get_tool(change.tool_name))
+
+    def search(
+        self,
+        query: str,
+        limit: int = 10,
+        *,
+        any_of: Capability | None = None,
+        all_of: Capability | None = None,
+    ) -> list[SearchHit]:
+        """
+        Return the tools best matching `query`, best first.
+
+        Only tools having at least one of the `any_of` capabilities and all of the
+        `all_of` capabilities are considered.
+        """
+        self._index_parameter_names()
+        terms = set(tokenize(query))
+        scores: dict[DocumentKey, float] = {}
+        with self._lock:
+            count = len(self._documents)
+            if not count:
+                return []
+            average_length = self._total_length / count
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for key, frequency in postings.items():
+                    document = self._documents[key]
+                    if not _matches(document.capabilities, any_of, all_of):
+                        continue
+                    norm = self.k1 * (1 - self.b + self.b * document.length / average_length)
+                    score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                    scores[key] = scores.get(key, 0.0) + score
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        return [SearchHit(toolkit, tool, score) for (toolkit, tool), score in ranked[:limit]]
+
+    def _index_parameter_names(self):
+        # Index the parameters of the tools added since the last search without holding
+        # the lock, then swap their documents in.
+        if not self._pending:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        updated = []
+        for key, (tool, document) in pending.items():
+            terms = document.terms.copy()
+            for parameter in argument_names(resolve_callable(tool.callable)):
+                terms.update(tokenize(parameter))
+            updated.append(
+                (key, document, _Document(tool.capabilities, terms, sum(terms.values())))
+            )
+        with self._lock:
+            for key, document, indexed in updated:
+                # Skip tools removed or replaced in the meantime.
+                if self._documents.get(key) is document:
+                    self._put(key, indexed)
+
+    def _put(self, key: DocumentKey, document: _Document):
+        # Called with `_lock` held.
+        self._remove(key)
+        self._documents[key] = document
+        self._keys_by_toolkit.setdefault(key[0], set()).add(key)
+        self._total_length += document.length
+        for term, count in document.terms.items():
+            self._postings.setdefault(term, {})[key] = count
+
+    def _remove(self, key: DocumentKey):
+        # Called with `_lock` held.
+        self._pending.pop(key, None)
+        document = self._documents.pop(key, None)
+        if document is None:
+            return
+        keys = self._keys_by_toolkit[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_toolkit[key[0]]
+        self._total_length -= document.length
+        for term in document.terms:
+            postings = self._postings[term]
+            del postings[key]
+            if not postings:
+                del self._postings[term]
+
+
+def _matches(
+    capabilities: Capability, any_of: Capability | None, all_of: Capability | None
+) -> bool:
+    if any_of is not None and not capabilities & any_of:
+        return False
+    if all_of is not None and capabilities & all_of != all_of:
+        return False
+    return True
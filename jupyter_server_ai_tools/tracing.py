@@ -0,0 +1,115 @@
+import json
+import logging
+import os
+import queue
+import threading
+from typing import Any, Iterator
+from urllib.parse import unquote_plus
+
+# Query parameters carrying credentials, which are left out of traces.
+REDACTED_PARAMETERS = frozenset({"token", "_xsrf"})
+
+
+class TraceRecorder:
+    """
+    Appends the requests made to the extension's endpoints to a trace file, for
+    replaying them with ``benchmarks/loadgen.py``.
+
+    Each line of the file is a JSON object with the request's `time` (seconds since
+    the epoch), `method`, `path` relative to the server's base URL (query included,
+    without the `REDACTED_PARAMETERS`), `body` (None when empty), and the `status` and
+    `duration` of the response. Lines are written by a background thread, so that
+    recording a request never blocks the event loop on the file. The file is created
+    readable by its owner only, as bodies hold whatever the tools were sent.
+    """
+
+    def __init__(self, path: str | os.PathLike, log: logging.Logger | None = None):
+        self.path = path
+        self.log = log or logging.getLogger(__name__)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self._file = os.fdopen(fd, "a", encoding="utf-8")
+        # Entries waiting to be written; None tells the writer to stop.
+        self._queue: queue.SimpleQueue[dict[str, Any] | None] = queue.SimpleQueue()
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_entries, name="jupyter-ai-tools-trace", daemon=True
+        )
+        self._writer.start()
+
+    def record(
+        self,
+        time: float,
+        method: str,
+        path: str,
+        body: bytes,
+        status: int,
+        duration: float,
+    ):
+        if self._closed:
+            return
+        self._queue.put(
+            {
+                "time": round(time, 6),
+                "method": method,
+                "path": redact_path(path),
+                "body": body.decode("utf-8", "replace") if body else None,
+                "status": status,
+                "duration": round(duration, 6),
+            }
+        )
+
+    def close(self):
+        """Write the requests recorded so far and close the file."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+    def _write_entries(self):
+        # Write whatever has been recorded in one go, flushing once the queue is empty.
+        stopping = False
+        while not stopping:
+            entries = [self._queue.get()]
+            while True:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines = []
+            for entry in entries:
+                if entry is None:
+                    stopping = True
+                    break
+                lines.append(json.dumps(entry, separators=(",", ":")) + "\n")
+            try:
+                self._file.write("".join(lines))
+                self._file.flush()
+            except OSError:
+                self.log.warning("Failed to write to the request trace '%s'.", self.path)
+
+
+def redact_path(path: str) -> str:
+    """Remove the `REDACTED_PARAMETERS` from the query of a request path."""
+    base, sep, query = path.partition("?")
+    if not sep:
+        return path
+    kept = [
+        parameter
+        for parameter in query.split("&")
+        if unquote_plus(parameter.partition("=")[0]) not in REDACTED_PARAMETERS
+    ]
+    return f"{base}?{'&'.join(kept)}" if kept else base
+
+
+def read_trace(path: str | os.PathLike) -> Iterator[dict[str, Any]]:
+    """Read the requests recorded by a `TraceRecorder`, skipping malformed lines."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict) and "method" in entry and "path" in entry:
+                yield entry
@@ -14,7 +14,7 @@ def _load_jupyter_server_extension(serverapp):
 async def _start_jupyter_server_extension(serverapp):
     registry = serverapp.web_app.settings["toolkit_registry"]
     if registry:
-        toolset = ToolSet({ Tool(callable=callable) })
+        toolset = ToolSet({ Tool(callable=say_hello, read=True) })
         registry.register_toolkit(
             Toolkit(name="hello_toolkit", tools=toolset)
         )
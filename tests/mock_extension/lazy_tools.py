@@ -0,0 +1,19 @@
+"""Tools that tests reference lazily; this module must only be imported on first use."""
+
+
+def shout(message: str):
+    """Shout a message."""
+    return message.upper()
+
+
+TOOLKIT = {
+    "name": "lazy_toolkit",
+    "description": "Tools imported on first use",
+    "tools": [
+        {
+            "callable": "tests.mock_extension.lazy_tools:shout",
+            "description": "Shout a message.",
+            "read": True,
+        }
+    ],
+}
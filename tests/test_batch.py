@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+
+from jupyter_server_ai_tools.batch import (
+    BatchError,
+    BatchResult,
+    parse_batch,
+    resolve_references,
+    run_batch,
+)
+from jupyter_server_ai_tools.execution import ToolArgumentError
+
+
+def test_parse_batch_finds_references():
+    calls = parse_batch(
+        [
+            {"id": "ls", "toolkit": "fs", "tool": "ls"},
+            {"id": "cwd", "toolkit": "fs", "tool": "cwd"},
+            {
+                "id": "read",
+                "toolkit": "fs",
+                "tool": "read",
+                "arguments": {"paths": [{"$ref": "ls"}], "encoding": "utf-8"},
+                "depends_on": ["cwd"],
+            },
+        ]
+    )
+    assert [call.depends_on for call in calls] == [
+        frozenset(),
+        frozenset(),
+        frozenset({"ls", "cwd"}),
+    ]
+    assert resolve_references(calls[2].arguments, {"ls": ["a.txt"]}) == {
+        "paths": [["a.txt"]],
+        "encoding": "utf-8",
+    }
+
+
+@pytest.mark.parametrize(
+    "calls, message",
+    [
+        ([], "non-empty list"),
+        ([{"id": "a", "toolkit": "fs"}], "must name a 'toolkit' and a 'tool'"),
+        ([{"id": "a", "toolkit": "fs", "tool": "ls"}] * 2, "must be unique"),
+        ([{"id": "a", "toolkit": "fs", "tool": "ls", "depends_on": ["b"]}], "unknown calls"),
+        (
+            [
+                {"id": "a", "toolkit": "fs", "tool": "ls", "arguments": {"x": {"$ref": "b"}}},
+                {"id": "b", "toolkit": "fs", "tool": "ls", "depends_on": ["a"]},
+                {"id": "c", "toolkit": "fs", "tool": "ls"},
+            ],
+            r"\['a', 'b'\] have a dependency cycle",
+        ),
+    ],
+)
+def test_parse_batch_rejects_bad_batches(calls, message):
+    with pytest.raises(BatchError, match=message):
+        parse_batch(calls)
+
+
+async def test_run_batch_runs_independent_calls_concurrently():
+    calls = parse_batch(
+        [
+            {"id": "a", "toolkit": "kit", "tool": "slow", "arguments": {"value": 1}},
+            {"id": "b", "toolkit": "kit", "tool": "slow", "arguments": {"value": 2}},
+            {
+                "id": "sum",
+                "toolkit": "kit",
+                "tool": "add",
+                "arguments": {"values": [{"$ref": "a"}, {"$ref": "b"}]},
+            },
+            {"id": "bad", "toolkit": "kit", "tool": "fail"},
+            {"id": "after_bad", "toolkit": "kit", "tool": "add", "depends_on": ["bad"]},
+        ]
+    )
+    running = 0
+    peak = 0
+
+    async def invoke(call, arguments):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        try:
+            await asyncio.sleep(0.01)
+            if call.tool_name == "fail":
+                raise ToolArgumentError("bad arguments")
+            if call.tool_name == "add":
+                return sum(arguments["values"])
+            return arguments["value"]
+        finally:
+            running -= 1
+
+    results = [result async for result in run_batch(calls, invoke)]
+    assert peak == 3
+    assert results[-1] == BatchResult("sum", 3)
+    assert sorted(results, key=lambda result: result.id) == [
+        BatchResult("a", 1),
+        BatchResult("after_bad", status=424, error="Skipped: call 'bad' failed"),
+        BatchResult("b", 2),
+        BatchResult("bad", status=400, error="bad arguments"),
+        BatchResult("sum", 3),
+    ]
+    assert BatchResult("bad", status=400, error="bad arguments").to_json() == {
+        "id": "bad",
+        "status": 400,
+        "error": "bad arguments",
+    }
+
+
+async def test_closing_the_batch_cancels_running_calls():
+    cancelled = asyncio.Event()
+    calls = parse_batch(
+        [
+            {"id": "fast", "toolkit": "kit", "tool": "fast"},
+            {"id": "hang", "toolkit": "kit", "tool": "hang"},
+        ]
+    )
+
+    async def invoke(call, arguments):
+        if call.tool_name == "fast":
+            return 1
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    results = run_batch(calls, invoke)
+    assert await results.__anext__() == BatchResult("fast", 1)
+    await results.aclose()
+    await asyncio.wait_for(cancelled.wait(), 1)
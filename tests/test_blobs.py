@@ -0,0 +1,73 @@
+import array
+import hashlib
+import mmap
+
+import pytest
+
+from jupyter_server_ai_tools.blobs import BlobStore, as_buffer
+
+
+def test_as_buffer():
+    assert as_buffer("text") is None
+    assert as_buffer({"a": 1}) is None
+    view = as_buffer(b"abc")
+    assert view is not None and view.tobytes() == b"abc"
+
+    numbers = array.array("i", [1, 2, 3])
+    view = as_buffer(numbers)
+    assert view is not None
+    assert view.nbytes == 3 * numbers.itemsize
+    assert view.obj is numbers
+
+    # Every other byte: not contiguous, so copied.
+    view = as_buffer(memoryview(b"abcdef")[::2])
+    assert view is not None and view.tobytes() == b"ace"
+
+
+def test_put_is_content_addressed(tmp_path):
+    store = BlobStore(tmp_path)
+    handle = store.put(bytearray(b"x" * 100))
+    assert handle.id == hashlib.sha256(b"x" * 100).hexdigest()
+    assert handle.size == 100
+    assert (tmp_path / handle.id).read_bytes() == b"x" * 100
+
+    assert store.put(memoryview(b"x" * 100)) == handle
+    assert (len(store), store.bytes) == (1, 100)
+
+    with pytest.raises(TypeError):
+        store.put("text")
+
+
+def test_put_mmap(tmp_path):
+    with mmap.mmap(-1, 4096) as buffer:
+        buffer[:5] = b"hello"
+        handle = BlobStore(tmp_path).put(buffer)
+    assert (tmp_path / handle.id).read_bytes()[:5] == b"hello"
+
+
+def test_least_recently_used_blobs_are_evicted(tmp_path):
+    store = BlobStore(tmp_path, max_bytes=250)
+    first = store.put(b"1" * 100)
+    second = store.put(b"2" * 100)
+    assert store.touch(first.id)
+
+    third = store.put(b"3" * 100)
+    assert first.id in store and third.id in store
+    assert second.id not in store
+    assert not (tmp_path / second.id).exists()
+    assert store.bytes == 200
+
+    with pytest.raises(ValueError, match="doesn't fit"):
+        store.put(b"4" * 300)
+
+
+def test_blobs_survive_restarts_unless_the_directory_is_temporary(tmp_path):
+    handle = BlobStore(tmp_path).put(b"data")
+    assert handle.id in BlobStore(tmp_path)
+    assert handle.id not in BlobStore(tmp_path, max_bytes=2)
+
+    store = BlobStore()
+    store.put(b"data")
+    path = store.path
+    store.close()
+    assert not path.exists()
@@ -0,0 +1,90 @@
+import pytest
+
+from jupyter_server_ai_tools.cache import ResultCache
+from jupyter_server_ai_tools.models import Tool
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_make_key_ignores_argument_order():
+    assert ResultCache.make_key("kit", "tool", {"a": 1, "b": 2}) == ResultCache.make_key(
+        "kit", "tool", {"b": 2, "a": 1}
+    )
+
+
+def test_cache_hit_and_miss():
+    cache = ResultCache()
+    key = ResultCache.make_key("kit", "tool", {})
+
+    assert cache.get(key) == (False, None)
+    value = ["a", "b"]
+    cache.put(key, value)
+    value.append("changed after put")
+    hit, result = cache.get(key)
+    assert (hit, result) == (True, ["a", "b"])
+    result.append("changed after get")
+    assert cache.get(key) == (True, ["a", "b"])
+
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.entries) == (2, 1, 1)
+
+
+def test_cache_ttl():
+    clock = FakeClock()
+    cache = ResultCache(ttl=10, clock=clock)
+    cache.put("key", "value")
+
+    clock.now = 9.9
+    assert cache.get("key") == (True, "value")
+    clock.now = 10
+    assert cache.get("key") == (False, None)
+    assert cache.stats().entries == 0
+
+
+def test_cache_lru_eviction():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats().evictions == 1
+
+
+def test_cache_byte_budget():
+    cache = ResultCache(max_bytes=15)
+    cache.put("a", "x" * 8)
+    cache.put("b", "y" * 8)
+
+    assert cache.get("a") == (False, None)
+    assert cache.stats().bytes == 10
+
+    cache.put("too_big", "z" * 20)
+    assert cache.get("too_big") == (False, None)
+
+
+def test_cache_invalidate():
+    cache = ResultCache()
+    cache.put(("kit", "one", "{}"), 1)
+    cache.put(("kit", "two", "{}"), 2)
+    cache.put(("other", "one", "{}"), 3)
+
+    assert cache.invalidate("kit", "one") == 1
+    assert cache.invalidate("kit") == 1
+    assert cache.stats().entries == 1
+
+
+def test_only_read_only_tools_can_cache():
+    def update():
+        pass
+
+    with pytest.raises(ValueError, match="Only read-only tools can cache their results"):
+        Tool(callable=update, read=True, write=True, cache=True)
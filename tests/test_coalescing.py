@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from jupyter_server_ai_tools.coalescing import CallCoalescer
+from jupyter_server_ai_tools.metrics import ToolMetrics
+from jupyter_server_ai_tools.models import Tool
+
+
+async def test_identical_calls_share_one_run():
+    metrics = ToolMetrics()
+    coalescer = CallCoalescer(metrics)
+    runs = []
+    release = asyncio.Event()
+
+    async def call():
+        runs.append(1)
+        await release.wait()
+        return ["a.txt", "b.txt"]
+
+    calls = [
+        asyncio.ensure_future(coalescer.run("fs", "ls", {"path": "/", "all": True}, call)),
+        asyncio.ensure_future(coalescer.run("fs", "ls", {"all": True, "path": "/"}, call)),
+        asyncio.ensure_future(coalescer.run("fs", "ls", {"path": "/tmp", "all": True}, call)),
+    ]
+    await asyncio.sleep(0)
+    assert coalescer.in_flight == 2
+
+    release.set()
+    assert await asyncio.gather(*calls) == [["a.txt", "b.txt"]] * 3
+    assert len(runs) == 2
+    assert coalescer.in_flight == 0
+    assert metrics.snapshot()["tools"]["fs"]["ls"]["coalesced"] == 1
+
+
+async def test_exception_is_shared_by_every_waiter():
+    coalescer = CallCoalescer()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        raise OSError("disk on fire")
+
+    calls = [asyncio.ensure_future(coalescer.run("fs", "ls", {}, call)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*calls, return_exceptions=True)
+    assert [str(e) for e in results] == ["disk on fire"] * 3
+    assert results[0] is results[1]
+
+
+async def test_run_is_cancelled_with_its_last_waiter():
+    coalescer = CallCoalescer()
+    cancelled = asyncio.Event()
+
+    async def call():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    first = asyncio.ensure_future(coalescer.run("fs", "ls", {}, call))
+    second = asyncio.ensure_future(coalescer.run("fs", "ls", {}, call))
+    await asyncio.sleep(0)
+
+    first.cancel()
+    await asyncio.sleep(0)
+    assert not cancelled.is_set()
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert coalescer.in_flight == 0
+
+
+def test_mutating_tools_cannot_coalesce():
+    def rm(path: str):
+        pass
+
+    Tool(callable=rm, read=True, execute=True, coalesce=True)
+    with pytest.raises(ValueError, match="can coalesce calls"):
+        Tool(callable=rm, delete=True, coalesce=True)
@@ -0,0 +1,72 @@
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from jupyter_server_ai_tools import discovery
+from jupyter_server_ai_tools.execution import ToolExecutor
+from jupyter_server_ai_tools.models import LazyCallable, Tool, Toolkit
+
+LAZY_MODULE = "tests.mock_extension.lazy_tools"
+
+MANIFEST = {
+    "name": "lazy_toolkit",
+    "tools": [
+        {
+            "callable": f"{LAZY_MODULE}:shout",
+            "description": "Shout a message.",
+            "read": True,
+            "inputSchema": {"type": "object", "properties": {"message": {"type": "string"}}},
+        }
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def unload_lazy_module():
+    sys.modules.pop(LAZY_MODULE, None)
+    yield
+    sys.modules.pop(LAZY_MODULE, None)
+
+
+def test_toolkit_from_manifest_does_not_import_tools():
+    toolkit = Toolkit.from_manifest(MANIFEST)
+    tool = toolkit.get_tool("shout")
+
+    assert isinstance(tool.callable, LazyCallable)
+    assert tool.description == "Shout a message."
+    assert tool.read
+    assert '"inputSchema":{"type":"object"' in toolkit.model_dump_json()
+    assert LAZY_MODULE not in sys.modules
+
+
+async def test_lazy_tool_is_imported_on_first_call():
+    tool = Tool.model_validate({"callable": f"{LAZY_MODULE}:shout"})
+    assert tool.name == "shout"
+    assert LAZY_MODULE not in sys.modules
+
+    executor = ToolExecutor(max_workers=1, max_processes=1)
+    try:
+        assert await executor.run(tool, {"message": "hi"}) == "HI"
+    finally:
+        executor.shutdown()
+    assert LAZY_MODULE in sys.modules
+
+
+def test_lazy_callable_rejects_invalid_references():
+    with pytest.raises(ValueError, match="Expected a 'module:function' reference"):
+        LazyCallable("not_a_reference")
+
+
+def test_discover_toolkits(monkeypatch, caplog):
+    group = discovery.ENTRY_POINT_GROUP
+    entry_points = [
+        EntryPoint("lazy", f"{LAZY_MODULE}:TOOLKIT", group),
+        EntryPoint("broken", "tests.mock_extension.missing:TOOLKIT", group),
+    ]
+    monkeypatch.setattr(discovery, "entry_points", lambda group: entry_points)
+
+    toolkits = list(discovery.discover_toolkits())
+
+    assert [toolkit.name for toolkit in toolkits] == ["lazy_toolkit"]
+    assert "Failed to load toolkit from entry point" in caplog.text
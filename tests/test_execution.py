@@ -0,0 +1,194 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from jupyter_server_ai_tools.execution import (
+    ToolArgumentError,
+    ToolExecutor,
+    ToolTimeoutError,
+    run_with_timeout,
+)
+from jupyter_server_ai_tools.models import Tool
+
+
+def worker_pid():
+    return os.getpid()
+
+
+def crash():
+    os._exit(1)
+
+
+def sleep(seconds: float):
+    time.sleep(seconds)
+
+
+def power(base: int, exponent: int = 2, /, *, modulo: int | None = None):
+    return pow(base, exponent, modulo)
+
+
+@pytest.fixture
+def executor():
+    executor = ToolExecutor(max_workers=2, max_processes=1, process_start_method="spawn")
+    yield executor
+    executor.shutdown()
+
+
+async def test_sync_tool_runs_off_the_event_loop(executor):
+    def slow_add(a: int, b: int):
+        time.sleep(0.1)
+        return a + b, threading.current_thread() is threading.main_thread()
+
+    tool = Tool(callable=slow_add)
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    ticker = asyncio.ensure_future(tick())
+    result = await executor.run(tool, {"a": 1, "b": 2})
+    ticker.cancel()
+
+    assert result == (3, False)
+    assert ticks > 1
+
+
+async def test_async_tool_is_awaited(executor):
+    async def double(x: int):
+        return x * 2
+
+    assert await executor.run(Tool(callable=double), {"x": 4}) == 8
+
+
+async def test_invalid_arguments(executor):
+    def greet(name: str):
+        return name
+
+    with pytest.raises(ToolArgumentError, match="Invalid arguments for tool 'greet'"):
+        await executor.run(Tool(callable=greet), {"nom": "Ada"})
+
+
+async def test_inline_tool_runs_on_the_event_loop(executor):
+    def current_thread():
+        return threading.current_thread()
+
+    tool = Tool(callable=current_thread, execution_mode="inline")
+    assert await executor.run(tool, {}) is threading.current_thread()
+
+
+async def test_process_tool_runs_in_a_worker_process(executor):
+    tool = Tool(callable=worker_pid, execution_mode="process")
+    assert await executor.run(tool, {}) != os.getpid()
+
+
+async def test_process_pool_recovers_from_a_crashed_worker(executor):
+    with pytest.raises(BrokenProcessPool):
+        await executor.run(Tool(callable=crash, execution_mode="process"), {})
+
+    tool = Tool(callable=worker_pid, execution_mode="process")
+    assert await executor.run(tool, {}) != os.getpid()
+
+
+@pytest.mark.parametrize("execution_mode", ["inline", "thread", "process"])
+async def test_positional_only_parameters(executor, execution_mode):
+    tool = Tool(callable=power, execution_mode=execution_mode)
+    assert tool.input_schema["required"] == ["base"]
+    assert await executor.run(tool, {"base": 3}) == 9
+    assert await executor.run(tool, {"base": 3, "exponent": 3, "modulo": 5}) == 2
+
+
+def test_coroutine_tool_cannot_use_process_mode():
+    async def fetch():
+        pass
+
+    with pytest.raises(ValueError, match="can't use the 'process' execution mode"):
+        Tool(callable=fetch, execution_mode="process")
+
+
+async def test_stream_sync_generator_pulls_chunks_on_demand(executor):
+    produced = []
+
+    def count(n: int):
+        for i in range(n):
+            produced.append(i)
+            yield i
+
+    chunks = executor.stream(Tool(callable=count), {"n": 3})
+    assert await chunks.__anext__() == 0
+    assert produced == [0]
+    assert [chunk async for chunk in chunks] == [1, 2]
+
+
+async def test_stream_async_generator(executor):
+    async def count(n: int):
+        for i in range(n):
+            yield i
+
+    assert [chunk async for chunk in executor.stream(Tool(callable=count), {"n": 3})] == [0, 1, 2]
+
+
+async def test_stream_plain_tool_yields_one_chunk(executor):
+    def answer():
+        return 42
+
+    assert [chunk async for chunk in executor.stream(Tool(callable=answer), {})] == [42]
+
+
+async def test_run_with_timeout_cancels_async_tool(executor):
+    cancelled = asyncio.Event()
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(ToolTimeoutError, match="'hang' timed out after 0.05 seconds"):
+        await run_with_timeout(executor.run(Tool(callable=hang), {}), 0.05, "hang")
+    assert cancelled.is_set()
+    assert await run_with_timeout(executor.run(Tool(callable=worker_pid), {}), 5, "pid")
+
+
+async def test_cancelled_process_tool_is_killed(executor):
+    first_pid = await executor.run(Tool(callable=worker_pid, execution_mode="process"), {})
+
+    tool = Tool(callable=sleep, execution_mode="process")
+    with pytest.raises(ToolTimeoutError):
+        await run_with_timeout(executor.run(tool, {"seconds": 30}), 0.5, "sleep")
+
+    tool = Tool(callable=worker_pid, execution_mode="process")
+    assert await executor.run(tool, {}) != first_pid
+
+
+async def test_cancelling_a_process_tool_spares_other_calls():
+    executor = ToolExecutor(max_workers=2, max_processes=2, process_start_method="spawn")
+    try:
+        tool = Tool(callable=sleep, execution_mode="process")
+        # Wait for both workers to be up, so that both calls below are running.
+        await asyncio.gather(*(executor.run(tool, {"seconds": 0.2}) for _ in range(2)))
+        other = asyncio.ensure_future(executor.run(tool, {"seconds": 1}))
+        with pytest.raises(ToolTimeoutError):
+            await run_with_timeout(executor.run(tool, {"seconds": 30}), 0.5, "sleep")
+        assert await other is None
+
+        # The killed worker was replaced, so both workers are available again.
+        pids = await asyncio.gather(
+            executor.run(Tool(callable=worker_pid, execution_mode="process"), {}),
+            executor.run(tool, {"seconds": 0.5}),
+        )
+        assert pids[0] != os.getpid()
+    finally:
+        executor.shutdown()
+
+
+def test_tool_timeout_must_be_positive():
+    with pytest.raises(ValueError):
+        Tool(callable=worker_pid, timeout=0)
@@ -0,0 +1,110 @@
+import json
+
+import pytest
+
+from jupyter_server_ai_tools.formats import (
+    NAME_PATTERN,
+    qualified_name,
+    render,
+    resolve_qualified_name,
+    split_qualified_name,
+    to_anthropic,
+    to_mcp,
+    to_openai,
+)
+from jupyter_server_ai_tools.models import Tool, Toolkit, ToolSet
+
+
+def read_file(path: str):
+    """Read a file."""
+
+
+def delete_file(path: str):
+    """Delete a file."""
+
+
+SCHEMA = {
+    "type": "object",
+    "properties": {"path": {"title": "Path", "type": "string"}},
+    "required": ["path"],
+}
+
+
+@pytest.fixture
+def toolkits():
+    tools = ToolSet(
+        {
+            Tool(callable=read_file, read=True),
+            Tool(callable=delete_file, delete=True),
+        }
+    )
+    return [Toolkit(name="files", tools=tools)]
+
+
+def _schema(tool):
+    return {key: tool[key] for key in ("type", "properties", "required")}
+
+
+def test_to_openai(toolkits):
+    tools = to_openai(toolkits)
+    names = [tool["function"]["name"] for tool in tools]
+    assert names == ["files__delete_file", "files__read_file"]
+    assert tools[1]["type"] == "function"
+    assert tools[1]["function"]["description"] == "Read a file."
+    assert _schema(tools[1]["function"]["parameters"]) == SCHEMA
+
+
+def test_to_anthropic(toolkits):
+    tools = to_anthropic(toolkits)
+    assert [tool["name"] for tool in tools] == ["files__delete_file", "files__read_file"]
+    assert _schema(tools[1]["input_schema"]) == SCHEMA
+
+
+def test_to_mcp(toolkits):
+    tools = to_mcp(toolkits)["tools"]
+    assert [tool["name"] for tool in tools] == ["files__delete_file", "files__read_file"]
+    assert tools[0]["annotations"] == {"readOnlyHint": False, "destructiveHint": True}
+    assert tools[1]["annotations"] == {"readOnlyHint": True, "destructiveHint": False}
+    assert _schema(tools[1]["inputSchema"]) == SCHEMA
+
+
+def test_render(toolkits):
+    assert json.loads(render("anthropic", toolkits)) == to_anthropic(toolkits)
+    with pytest.raises(ValueError, match="Unknown listing format 'yaml'"):
+        render("yaml", toolkits)
+
+
+def test_qualified_names():
+    assert split_qualified_name(qualified_name("files", "read_file")) == ("files", "read_file")
+    assert split_qualified_name(qualified_name("files", "_private")) == ("files", "_private")
+    with pytest.raises(ValueError):
+        split_qualified_name("read_file")
+
+
+@pytest.mark.parametrize(
+    "toolkit_name, tool_name",
+    [
+        ("my files", "read_file"),
+        ("jupyter.files", "read_file"),
+        ("my__files", "read_file"),
+        ("files_", "read_file"),
+        ("files", "read_" + "x" * 64),
+    ],
+)
+def test_qualified_names_that_dont_fit(toolkit_name, tool_name):
+    name = qualified_name(toolkit_name, tool_name)
+    assert NAME_PATTERN.match(name)
+    assert name == qualified_name(toolkit_name, tool_name)
+    with pytest.raises(ValueError):
+        split_qualified_name(name)
+
+    def read_file(path: str):
+        pass
+
+    tools = ToolSet({Tool(callable=read_file, name=tool_name)})
+    toolkits = [Toolkit(name="files", tools=ToolSet({Tool(callable=read_file)}))]
+    toolkits.append(Toolkit(name=toolkit_name, tools=tools))
+    assert resolve_qualified_name(name, toolkits) == (toolkit_name, tool_name)
+    assert resolve_qualified_name("files__read_file", toolkits) == ("files", "read_file")
+    with pytest.raises(LookupError):
+        resolve_qualified_name("files__missing", toolkits)
@@ -1,7 +1,18 @@
+"""Python unit tests for jupyter_server_ai_tools."""
+
 import asyncio
+import gzip
 import json
+import stat
+from importlib.metadata import EntryPoint
+from urllib.parse import parse_qs, urlparse
 
 import pytest
+from tornado.httpclient import HTTPClientError
+
+from jupyter_server_ai_tools import discovery
+from jupyter_server_ai_tools.models import Tool, Toolkit, ToolSet
+from jupyter_server_ai_tools.tracing import TraceRecorder, read_trace, redact_path
 
 
 @pytest.fixture
@@ -16,7 +27,14 @@ def jp_server_config():
     }
 
 
-async def test_toolkit_handler(jp_fetch):
+@pytest.fixture
+def toolkit_registry(jp_serverapp, jp_asyncio_loop):
+    # The test server never runs the post-start hooks, so start extensions here.
+    jp_asyncio_loop.run_until_complete(jp_serverapp.extension_manager.start_all_extensions())
+    return jp_serverapp.web_app.settings["toolkit_registry"]
+
+
+async def test_toolkit_handler(jp_fetch, toolkit_registry):
     response = await jp_fetch("api", "toolkits")
     assert response.code == 200
 
@@ -26,4 +44,722 @@ async def test_toolkit_handler(jp_fetch):
 
     toolkit = toolkits[0]
     assert toolkit["name"] == "hello_toolkit"
-    assert len(toolkit.tools) == 1
+    assert len(toolkit["tools"]) == 1
+    assert toolkit["tools"][0]["inputSchema"]["required"] == ["name"]
+
+
+async def test_toolkit_handler_etag(jp_fetch, toolkit_registry):
+    response = await jp_fetch("api", "toolkits")
+    etag = response.headers["Etag"]
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "toolkits", headers={"If-None-Match": etag})
+    assert e.value.code == 304
+
+    def other():
+        pass
+
+    toolkit_registry.register_toolkit(Toolkit(name="other", tools=ToolSet({Tool(callable=other)})))
+    response = await jp_fetch("api", "toolkits", headers={"If-None-Match": etag})
+    assert response.code == 200
+    assert response.headers["Etag"] != etag
+    assert len(json.loads(response.body)) == 2
+
+
+async def test_toolkit_handler_gzip(jp_fetch, toolkit_registry):
+    response = await jp_fetch(
+        "api",
+        "toolkits",
+        headers={"Accept-Encoding": "gzip"},
+        decompress_response=False,
+    )
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert json.loads(gzip.decompress(response.body))[0]["name"] == "hello_toolkit"
+
+    # The identity body shares the ETag, so it varies on Accept-Encoding too.
+    response = await jp_fetch("api", "toolkits")
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+
+def _register_toolkits(toolkit_registry, count):
+    for i in range(count):
+
+        def read_func():
+            pass
+
+        def write_func():
+            pass
+
+        tools = ToolSet(
+            {
+                Tool(callable=read_func, name=f"read_{i}", read=True),
+                Tool(callable=write_func, name=f"write_{i}", write=True),
+            }
+        )
+        toolkit_registry.register_toolkit(Toolkit(name=f"toolkit_{i}", tools=tools))
+
+
+async def test_toolkit_handler_filters(jp_fetch, toolkit_registry):
+    _register_toolkits(toolkit_registry, 3)
+
+    response = await jp_fetch("api", "toolkits", params={"name": "toolkit_1,toolkit_2"})
+    assert [t["name"] for t in json.loads(response.body)] == ["toolkit_1", "toolkit_2"]
+
+    response = await jp_fetch("api", "toolkits", params={"any_of": "write"})
+    toolkits = json.loads(response.body)
+    assert [t["name"] for t in toolkits] == ["toolkit_0", "toolkit_1", "toolkit_2"]
+    assert all(len(t["tools"]) == 1 and t["tools"][0]["write"] for t in toolkits)
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "toolkits", params={"any_of": "fly"})
+    assert e.value.code == 400
+
+
+async def test_toolkit_handler_pagination(jp_fetch, toolkit_registry):
+    _register_toolkits(toolkit_registry, 3)
+
+    response = await jp_fetch("api", "toolkits", params={"limit": "3"})
+    assert [t["name"] for t in json.loads(response.body)] == [
+        "hello_toolkit",
+        "toolkit_0",
+        "toolkit_1",
+    ]
+    link = response.headers["Link"]
+    assert link.endswith('rel="next"')
+
+    cursor = parse_qs(urlparse(link[1 : link.index(">")]).query)["cursor"][0]
+    response = await jp_fetch("api", "toolkits", params={"limit": "3", "cursor": cursor})
+    assert [t["name"] for t in json.loads(response.body)] == ["toolkit_2"]
+    assert "Link" not in response.headers
+
+
+async def test_toolkit_handler_ndjson(jp_fetch, toolkit_registry):
+    _register_toolkits(toolkit_registry, 2)
+
+    response = await jp_fetch("api", "toolkits", headers={"Accept": "application/x-ndjson"})
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    lines = response.body.decode().splitlines()
+    assert [json.loads(line)["name"] for line in lines] == [
+        "hello_toolkit",
+        "toolkit_0",
+        "toolkit_1",
+    ]
+
+
+async def test_toolkit_handler_formats(jp_fetch, toolkit_registry):
+    response = await jp_fetch("api", "toolkits", params={"format": "openai"})
+    [tool] = json.loads(response.body)
+    assert tool["function"]["name"] == "hello_toolkit__say_hello"
+    etag = response.headers["Etag"]
+
+    listing = toolkit_registry.get_toolkit_listing("openai")
+    assert toolkit_registry.get_toolkit_listing("openai") is listing
+    assert toolkit_registry.list_toolkits(format="openai") == [tool]
+
+    with pytest.raises(HTTPClientError) as e:
+        params = {"format": "openai"}
+        await jp_fetch("api", "toolkits", params=params, headers={"If-None-Match": etag})
+    assert e.value.code == 304
+
+    _register_toolkits(toolkit_registry, 1)
+    response = await jp_fetch("api", "toolkits", params={"format": "mcp"})
+    assert len(json.loads(response.body)["tools"]) == 3
+    assert toolkit_registry.get_toolkit_listing("openai") is not listing
+
+    params = {"format": "anthropic", "any_of": "write"}
+    response = await jp_fetch("api", "toolkits", params=params)
+    assert [tool["name"] for tool in json.loads(response.body)] == ["toolkit_0__write_0"]
+
+    for params in ({"format": "yaml"}, {"format": "mcp", "stream": "true"}):
+        with pytest.raises(HTTPClientError) as e:
+            await jp_fetch("api", "toolkits", params=params)
+        assert e.value.code == 400
+
+
+async def test_toolkit_handler_changes_since(jp_fetch, toolkit_registry):
+    revision = toolkit_registry.revision
+    _register_toolkits(toolkit_registry, 2)
+    toolkit_registry.unregister_toolkit("toolkit_0")
+
+    response = await jp_fetch("api", "toolkits", params={"since": str(revision)})
+    delta = json.loads(response.body)
+    assert delta["revision"] == revision + 3
+    assert delta["snapshot"] is False
+    assert [(c["action"], c["toolkit_name"]) for c in delta["changes"]] == [
+        ("added", "toolkit_0"),
+        ("added", "toolkit_1"),
+        ("removed", "toolkit_0"),
+    ]
+    assert [t["name"] for t in delta["toolkits"]] == ["toolkit_1"]
+    assert delta["removed"] == ["toolkit_0"]
+
+    response = await jp_fetch("api", "toolkits", params={"since": str(revision + 3)})
+    assert json.loads(response.body)["changes"] == []
+
+
+async def test_toolkit_handler_changes_snapshot(jp_fetch, toolkit_registry):
+    toolkit_registry._registry._changes.clear()
+    _register_toolkits(toolkit_registry, 1)
+
+    response = await jp_fetch("api", "toolkits", params={"since": "0"})
+    snapshot = json.loads(response.body)
+    assert snapshot["snapshot"] is True
+    assert snapshot["revision"] == toolkit_registry.revision
+    assert sorted(t["name"] for t in snapshot["toolkits"]) == ["hello_toolkit", "toolkit_0"]
+
+
+async def test_toolkit_handler_changes_long_poll(jp_fetch, toolkit_registry):
+    revision = toolkit_registry.revision
+
+    def other():
+        pass
+
+    asyncio.get_running_loop().call_later(
+        0.1,
+        toolkit_registry.register_toolkit,
+        Toolkit(name="other", tools=ToolSet({Tool(callable=other)})),
+    )
+    response = await jp_fetch("api", "toolkits", params={"since": str(revision), "wait": "10"})
+    delta = json.loads(response.body)
+    assert delta["revision"] == revision + 1
+    assert [t["name"] for t in delta["toolkits"]] == ["other"]
+
+    params = {"since": str(revision + 1), "wait": "0.05"}
+    response = await jp_fetch("api", "toolkits", params=params)
+    assert json.loads(response.body)["changes"] == []
+
+
+async def test_tool_invocation_handler(jp_fetch, toolkit_registry):
+    response = await jp_fetch(
+        "api",
+        "toolkits",
+        "hello_toolkit",
+        "tools",
+        "say_hello",
+        method="POST",
+        body=json.dumps({"arguments": {"name": "Ada"}}),
+    )
+    assert json.loads(response.body) == {"result": "Hello, Ada!"}
+
+
+async def test_tool_invocation_handler_async_tool(jp_fetch, toolkit_registry):
+    async def shout(message: str):
+        return message.upper()
+
+    toolkit_registry.register_toolkit(Toolkit(name="async", tools=ToolSet({Tool(callable=shout)})))
+    response = await jp_fetch(
+        "api",
+        "toolkits",
+        "async",
+        "tools",
+        "shout",
+        method="POST",
+        body=json.dumps({"arguments": {"message": "hi"}}),
+    )
+    assert json.loads(response.body) == {"result": "HI"}
+
+
+@pytest.mark.parametrize(
+    "path, arguments, code",
+    [
+        (("missing", "tools", "say_hello"), {"name": "Ada"}, 404),
+        (("hello_toolkit", "tools", "missing"), {"name": "Ada"}, 404),
+        (("hello_toolkit", "tools", "say_hello"), {"nom": "Ada"}, 400),
+    ],
+)
+async def test_tool_invocation_handler_errors(jp_fetch, toolkit_registry, path, arguments, code):
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch(
+            "api", "toolkits", *path, method="POST", body=json.dumps({"arguments": arguments})
+        )
+    assert e.value.code == code
+
+
+async def test_invoke_tool_caches_read_only_results(toolkit_registry):
+    files = ["a.txt"]
+
+    def list_files(limit: int = 10):
+        return files[:limit]
+
+    def add_file(name: str):
+        files.append(name)
+
+    tools = ToolSet(
+        {
+            Tool(callable=list_files, read=True, cache=True),
+            Tool(callable=add_file, write=True),
+        }
+    )
+    toolkit_registry.register_toolkit(Toolkit(name="files", tools=tools))
+
+    assert await toolkit_registry.invoke_tool("files", "list_files") == ["a.txt"]
+    files.append("b.txt")
+    # The same call, with the default spelled out: served from the cache.
+    assert await toolkit_registry.invoke_tool("files", "list_files", {"limit": 10}) == ["a.txt"]
+
+    await toolkit_registry.invoke_tool("files", "add_file", {"name": "c.txt"})
+    assert await toolkit_registry.invoke_tool("files", "list_files") == [
+        "a.txt",
+        "b.txt",
+        "c.txt",
+    ]
+
+    stats = toolkit_registry.get_cache_stats()
+    assert (stats.hits, stats.misses) == (1, 2)
+
+
+async def test_invoke_tool_coalesces_identical_calls(toolkit_registry):
+    runs = []
+    release = asyncio.Event()
+
+    async def list_dir(path: str, hidden: bool = False):
+        runs.append(path)
+        await release.wait()
+        return [path]
+
+    tool = Tool(callable=list_dir, read=True, coalesce=True)
+    toolkit_registry.register_toolkit(Toolkit(name="files", tools=ToolSet({tool})))
+    calls = [
+        asyncio.ensure_future(toolkit_registry.invoke_tool("files", "list_dir", arguments))
+        for arguments in ({"path": "/"}, {"path": "/", "hidden": False}, {"path": "/tmp"})
+    ]
+    await asyncio.sleep(0.01)
+    release.set()
+    assert await asyncio.gather(*calls) == [["/"], ["/"], ["/tmp"]]
+    assert sorted(runs) == ["/", "/tmp"]
+    assert toolkit_registry.get_metrics()["tools"]["files"]["list_dir"]["coalesced"] == 1
+
+
+def _register_generator_tools(toolkit_registry):
+    def tail(lines: int):
+        for i in range(lines):
+            yield f"line {i}"
+
+    async def broken():
+        yield "first"
+        raise RuntimeError("disk on fire")
+
+    tools = ToolSet({Tool(callable=tail, read=True), Tool(callable=broken, read=True)})
+    toolkit_registry.register_toolkit(Toolkit(name="logs", tools=tools))
+
+
+async def test_tool_invocation_handler_streams_ndjson(jp_fetch, toolkit_registry):
+    _register_generator_tools(toolkit_registry)
+
+    body = json.dumps({"arguments": {"lines": 2}})
+    response = await jp_fetch("api", "toolkits", "logs", "tools", "tail", method="POST", body=body)
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.body.decode().splitlines()] == [
+        {"chunk": "line 0"},
+        {"chunk": "line 1"},
+    ]
+
+
+async def test_tool_invocation_handler_streams_sse(jp_fetch, toolkit_registry):
+    _register_generator_tools(toolkit_registry)
+
+    response = await jp_fetch(
+        "api",
+        "toolkits",
+        "logs",
+        "tools",
+        "broken",
+        method="POST",
+        body="{}",
+        headers={"Accept": "text/event-stream"},
+    )
+    assert response.headers["Content-Type"] == "text/event-stream"
+    events = response.body.decode().split("\n\n")
+    assert events[0] == 'data: "first"'
+    assert events[1].startswith("event: error\ndata: ")
+    assert "disk on fire" in events[1]
+    assert events[2] == "event: end\ndata: {}"
+
+
+async def test_invoke_tool_collects_generator_chunks(toolkit_registry):
+    _register_generator_tools(toolkit_registry)
+
+    assert await toolkit_registry.invoke_tool("logs", "tail", {"lines": 2}) == ["line 0", "line 1"]
+
+
+async def _receive(ws, count):
+    return [json.loads(await ws.read_message()) for _ in range(count)]
+
+
+async def test_websocket_multiplexes_tool_calls(jp_ws_fetch, toolkit_registry):
+    release = asyncio.Event()
+
+    async def wait():
+        await release.wait()
+        return "waited"
+
+    def other():
+        pass
+
+    toolkit_registry.register_toolkit(Toolkit(name="slow", tools=ToolSet({Tool(callable=wait)})))
+
+    ws = await jp_ws_fetch("api", "toolkits", "ws")
+    ws.write_message(json.dumps({"id": 1, "type": "invoke", "toolkit": "slow", "tool": "wait"}))
+    ws.write_message(
+        json.dumps(
+            {
+                "id": 2,
+                "type": "invoke",
+                "toolkit": "hello_toolkit",
+                "tool": "say_hello",
+                "arguments": {"name": "Ada"},
+            }
+        )
+    )
+    assert await _receive(ws, 1) == [{"id": 2, "type": "result", "result": "Hello, Ada!"}]
+
+    ws.write_message(json.dumps({"id": 3, "type": "list"}))
+    [listing] = await _receive(ws, 1)
+    assert listing["id"] == 3
+    assert sorted(toolkit["name"] for toolkit in listing["result"]) == ["hello_toolkit", "slow"]
+
+    toolkit_registry.register_toolkit(Toolkit(name="other", tools=ToolSet({Tool(callable=other)})))
+    [change] = await _receive(ws, 1)
+    assert change["type"] == "registry_changed"
+    assert change["toolkit_name"] == "other"
+
+    release.set()
+    assert await _receive(ws, 1) == [{"id": 1, "type": "result", "result": "waited"}]
+    ws.close()
+
+
+async def test_websocket_cancel_and_errors(jp_ws_fetch, toolkit_registry):
+    async def hang():
+        await asyncio.Event().wait()
+
+    toolkit_registry.register_toolkit(Toolkit(name="hang", tools=ToolSet({Tool(callable=hang)})))
+
+    ws = await jp_ws_fetch("api", "toolkits", "ws")
+    ws.write_message(json.dumps({"id": "a", "type": "invoke", "toolkit": "hang", "tool": "hang"}))
+    ws.write_message(json.dumps({"id": "a", "type": "cancel"}))
+    assert await _receive(ws, 1) == [{"id": "a", "type": "cancelled"}]
+
+    ws.write_message(json.dumps({"id": "b", "type": "invoke", "toolkit": "nope", "tool": "x"}))
+    [error] = await _receive(ws, 1)
+    assert (error["id"], error["type"], error["status"]) == ("b", "error", 404)
+    ws.close()
+
+
+async def test_tool_search_handler(jp_fetch, toolkit_registry):
+    _register_toolkits(toolkit_registry, 2)
+
+    response = await jp_fetch("api", "tools", "search", params={"q": "hello"})
+    [hit] = json.loads(response.body)
+    assert hit["toolkit"] == "hello_toolkit"
+    assert hit["tool"]["name"] == "say_hello"
+    assert hit["score"] > 0
+
+    params = {"q": "write 1", "any_of": "write", "limit": "1"}
+    response = await jp_fetch("api", "tools", "search", params=params)
+    assert [(h["toolkit"], h["tool"]["name"]) for h in json.loads(response.body)] == [
+        ("toolkit_1", "write_1")
+    ]
+    assert toolkit_registry.search_tools("read", limit=5)[0].tool_name.startswith("read_")
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "tools", "search")
+    assert e.value.code == 400
+
+
+async def test_tool_invocation_handler_rejects_when_busy(jp_fetch, toolkit_registry):
+    release = asyncio.Event()
+
+    async def wait():
+        await release.wait()
+
+    toolkit_registry.register_toolkit(Toolkit(name="slow", tools=ToolSet({Tool(callable=wait)})))
+    scheduler = toolkit_registry._scheduler
+    scheduler.max_concurrent, scheduler.max_queued = 1, 1
+
+    calls = [asyncio.ensure_future(toolkit_registry.invoke_tool("slow", "wait")) for _ in range(2)]
+    await asyncio.sleep(0.01)
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "toolkits", "slow", "tools", "wait", method="POST", body="{}")
+    assert e.value.code == 429
+    assert e.value.response is not None
+    assert int(e.value.response.headers["Retry-After"]) >= 1
+
+    release.set()
+    await asyncio.gather(*calls)
+
+
+async def test_tool_invocation_handler_timeout(jp_fetch, toolkit_registry):
+    cancelled = asyncio.Event()
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    toolkit_registry.register_toolkit(Toolkit(name="slow", tools=ToolSet({Tool(callable=hang)})))
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch(
+            "api", "toolkits", "slow", "tools", "hang", method="POST", body='{"timeout": 0.05}'
+        )
+    assert e.value.code == 504
+    assert cancelled.is_set()
+    assert toolkit_registry._scheduler.running == 0
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch(
+            "api", "toolkits", "slow", "tools", "hang", method="POST", body='{"timeout": -1}'
+        )
+    assert e.value.code == 400
+
+
+async def test_tool_default_timeout(toolkit_registry):
+    async def hang():
+        await asyncio.sleep(10)
+
+    tool = Tool(callable=hang, timeout=0.05)
+    toolkit_registry.register_toolkit(Toolkit(name="slow", tools=ToolSet({tool})))
+    with pytest.raises(TimeoutError):
+        await toolkit_registry.invoke_tool("slow", "hang", timeout=5)
+    with pytest.raises(TimeoutError):
+        await toolkit_registry.invoke_tool("slow", "hang")
+
+
+async def test_tool_invocation_cancelled_when_client_leaves(jp_fetch, toolkit_registry):
+    cancelled = asyncio.Event()
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    toolkit_registry.register_toolkit(Toolkit(name="slow", tools=ToolSet({Tool(callable=hang)})))
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch(
+            "api",
+            "toolkits",
+            "slow",
+            "tools",
+            "hang",
+            method="POST",
+            body="{}",
+            request_timeout=0.2,
+        )
+    assert e.value.code == 599
+    await asyncio.wait_for(cancelled.wait(), 5)
+
+
+async def test_large_results_are_served_from_the_blob_store(jp_fetch, toolkit_registry):
+    data = bytes(range(256)) * 8192
+
+    def dump():
+        return data
+
+    def small():
+        return [1, 2]
+
+    tools = ToolSet({Tool(callable=dump, read=True), Tool(callable=small, read=True)})
+    toolkit_registry.register_toolkit(Toolkit(name="blobs", tools=tools))
+    response = await jp_fetch("api", "toolkits", "blobs", "tools", "dump", method="POST", body="{}")
+    handle = json.loads(response.body)["result"]
+    assert handle["size"] == len(data)
+    assert handle["url"] == f"/a%40b/api/tools/blobs/{handle['$blob']}"
+
+    response = await jp_fetch("api", "tools", "blobs", handle["$blob"])
+    assert response.body == data
+    assert response.headers["Content-Type"] == "application/octet-stream"
+    assert response.headers["Etag"] == f'"{handle["$blob"]}"'
+
+    response = await jp_fetch(
+        "api", "tools", "blobs", handle["$blob"], headers={"Range": "bytes=256-511"}
+    )
+    assert response.code == 206
+    assert response.body == bytes(range(256))
+
+    response = await jp_fetch(
+        "api", "toolkits", "blobs", "tools", "small", method="POST", body="{}"
+    )
+    assert json.loads(response.body) == {"result": [1, 2]}
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "tools", "blobs", "0" * 64)
+    assert e.value.code == 404
+
+
+async def test_tool_profiles_handler(jp_fetch, toolkit_registry):
+    toolkit_registry._profiler.sample_rate = 1.0
+    await toolkit_registry.invoke_tool("hello_toolkit", "say_hello", {"name": "Ada"})
+
+    response = await jp_fetch("api", "tools", "profiles")
+    (profile,) = json.loads(response.body)
+    assert (profile["toolkit_name"], profile["tool_name"]) == ("hello_toolkit", "say_hello")
+    assert profile["reason"] == "sampled"
+
+    response = await jp_fetch("api", "tools", "profiles", str(profile["id"]))
+    assert response.headers["Content-Type"] == "application/octet-stream"
+    assert "say_hello" in response.headers["Content-Disposition"]
+    assert response.body == toolkit_registry.get_profile(profile["id"]).stats
+
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "tools", "profiles", "999")
+    assert e.value.code == 404
+
+
+async def test_tool_batch_handler(jp_fetch, toolkit_registry):
+    def read_file(path: str):
+        return f"contents of {path}"
+
+    def write_file(path: str, content: str):
+        pass
+
+    tools = ToolSet({Tool(callable=read_file, read=True), Tool(callable=write_file, write=True)})
+    toolkit_registry.register_toolkit(Toolkit(name="files", tools=tools))
+    calls = [
+        {
+            "id": "hello",
+            "toolkit": "hello_toolkit",
+            "tool": "say_hello",
+            "arguments": {"name": "Ada"},
+        },
+        {
+            "id": "read",
+            "toolkit": "files",
+            "tool": "read_file",
+            "arguments": {"path": {"$ref": "hello"}},
+        },
+        {"id": "bad", "toolkit": "files", "tool": "read_file", "arguments": {}},
+        {"id": "skipped", "toolkit": "files", "tool": "read_file", "depends_on": ["bad"]},
+    ]
+    response = await jp_fetch(
+        "api", "tools", "batch", method="POST", body=json.dumps({"calls": calls})
+    )
+    assert response.headers["Content-Type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.body.decode().splitlines()]
+    results = {line["id"]: line for line in lines}
+    assert [line["id"] for line in lines].index("hello") < [line["id"] for line in lines].index(
+        "read"
+    )
+    assert results["read"] == {"id": "read", "result": "contents of Hello, Ada!"}
+    assert results["bad"]["status"] == 400
+    assert results["skipped"]["status"] == 424
+
+    write = {"id": "write", "toolkit": "files", "tool": "write_file", "arguments": {}}
+    body = {"calls": [calls[0], write], "capabilities": ["read"]}
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "tools", "batch", method="POST", body=json.dumps(body))
+    assert e.value.code == 400
+
+    cycle = [{"id": "a", "toolkit": "files", "tool": "read_file", "depends_on": ["a"]}]
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "tools", "batch", method="POST", body=json.dumps({"calls": cycle}))
+    assert e.value.code == 400
+
+    missing = [{"id": "a", "toolkit": "files", "tool": "missing"}]
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch("api", "tools", "batch", method="POST", body=json.dumps({"calls": missing}))
+    assert e.value.code == 404
+
+
+async def test_tool_batch_cancelled_when_client_leaves(jp_fetch, toolkit_registry):
+    cancelled = asyncio.Event()
+
+    async def hang():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    toolkit_registry.register_toolkit(Toolkit(name="slow", tools=ToolSet({Tool(callable=hang)})))
+    body = {"calls": [{"id": "a", "toolkit": "slow", "tool": "hang"}]}
+    with pytest.raises(HTTPClientError) as e:
+        await jp_fetch(
+            "api", "tools", "batch", method="POST", body=json.dumps(body), request_timeout=0.2
+        )
+    assert e.value.code == 599
+    await asyncio.wait_for(cancelled.wait(), 5)
+
+
+async def test_requests_are_recorded_in_the_trace(
+    jp_fetch, jp_serverapp, toolkit_registry, tmp_path
+):
+    path = tmp_path / "trace.ndjson"
+    recorder = TraceRecorder(path)
+    jp_serverapp.web_app.settings["toolkit_trace_recorder"] = recorder
+    token = jp_serverapp.identity_provider.token
+    await jp_fetch("api", "toolkits", params={"any_of": "read", "token": token})
+    body = json.dumps({"arguments": {"name": "Ada"}})
+    await jp_fetch(
+        "api", "toolkits", "hello_toolkit", "tools", "say_hello", method="POST", body=body
+    )
+    with pytest.raises(HTTPClientError):
+        await jp_fetch("api", "toolkits", "missing", "tools", "say_hello", method="POST", body=body)
+    recorder.close()
+
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    path.write_text(path.read_text() + "not json\n")
+    entries = list(read_trace(path))
+    assert [(e["method"], e["path"], e["body"], e["status"]) for e in entries] == [
+        ("GET", "api/toolkits?any_of=read", None, 200),
+        ("POST", "api/toolkits/hello_toolkit/tools/say_hello", body, 200),
+        ("POST", "api/toolkits/missing/tools/say_hello", body, 404),
+    ]
+    assert entries[0]["time"] <= entries[1]["time"]
+    assert token not in path.read_text()
+
+    assert redact_path("api/toolkits?_xsrf=x&name=a&%74oken=y") == "api/toolkits?name=a"
+    assert redact_path("api/toolkits?token=y") == "api/toolkits"
+
+
+def test_discovery_skips_toolkits_that_fail_to_register(monkeypatch, caplog, toolkit_registry):
+    group = discovery.ENTRY_POINT_GROUP
+    entry_points = [
+        EntryPoint("lazy", "tests.mock_extension.lazy_tools:TOOLKIT", group),
+        EntryPoint("lazy_again", "tests.mock_extension.lazy_tools:TOOLKIT", group),
+    ]
+    monkeypatch.setattr(discovery, "entry_points", lambda group: entry_points)
+    toolkit_registry.manifest_cache = False
+
+    toolkit_registry._discover_toolkits()
+
+    assert toolkit_registry.get_toolkit("lazy_toolkit").name == "lazy_toolkit"
+    assert "Failed to register discovered toolkit 'lazy_toolkit'" in caplog.text
+
+
+async def test_tool_metrics_handler(jp_fetch, toolkit_registry):
+    await jp_fetch("api", "toolkits")
+    await toolkit_registry.invoke_tool("hello_toolkit", "say_hello", {"name": "Ada"})
+
+    response = await jp_fetch("api", "tools", "metrics")
+    assert response.headers["Content-Type"].startswith("text/plain")
+    text = response.body.decode()
+    assert 'jupyter_ai_tools_calls_total{tool="say_hello",toolkit="hello_toolkit"} 1.0' in text
+    assert "jupyter_ai_tools_listing_serialization_seconds_count 1.0" in text
+
+    metrics = toolkit_registry.get_metrics()
+    assert metrics["tools"]["hello_toolkit"]["say_hello"]["calls"] == 1
+
+
+async def test_each_call_counts_one_lookup(jp_fetch, toolkit_registry):
+    body = json.dumps({"arguments": {"name": "Ada"}})
+    await jp_fetch(
+        "api", "toolkits", "hello_toolkit", "tools", "say_hello", method="POST", body=body
+    )
+    with pytest.raises(HTTPClientError):
+        await jp_fetch(
+            "api", "toolkits", "hello_toolkit", "tools", "missing", method="POST", body=body
+        )
+    call = {
+        "id": "hello",
+        "toolkit": "hello_toolkit",
+        "tool": "say_hello",
+        "arguments": {"name": "Ada"},
+    }
+    await jp_fetch("api", "tools", "batch", method="POST", body=json.dumps({"calls": [call]}))
+
+    assert toolkit_registry.get_metrics()["lookups"] == {"true": 2, "false": 1}
@@ -0,0 +1,111 @@
+import json
+import sys
+from importlib.metadata import EntryPoint
+
+import pytest
+
+from jupyter_server_ai_tools import discovery
+from jupyter_server_ai_tools.manifest_cache import (
+    MANIFEST_CACHE_VERSION,
+    ManifestCache,
+    toolkit_manifest,
+)
+from jupyter_server_ai_tools.models import LazyCallable, Tool, Toolkit, ToolSet
+from tests.mock_extension import say_hello
+
+LAZY_MODULE = "tests.mock_extension.lazy_tools"
+ENTRY_POINT = EntryPoint("lazy", f"{LAZY_MODULE}:TOOLKIT", discovery.ENTRY_POINT_GROUP)
+
+
+@pytest.fixture(autouse=True)
+def unload_lazy_module(monkeypatch):
+    monkeypatch.setattr(discovery, "entry_points", lambda group: [ENTRY_POINT])
+    sys.modules.pop(LAZY_MODULE, None)
+    yield
+    sys.modules.pop(LAZY_MODULE, None)
+
+
+def test_toolkit_manifest():
+    def local():
+        pass
+
+    toolkit = Toolkit(name="hello", tools=ToolSet({Tool(callable=say_hello, read=True)}))
+    manifest = toolkit_manifest(toolkit)
+    assert manifest is not None
+    [spec] = manifest["tools"]
+    assert spec["callable"] == "tests.mock_extension:say_hello"
+    assert spec["description"] == "Say hello to a user."
+    assert spec["inputSchema"]["required"] == ["name"]
+
+    tool = Toolkit.from_manifest(manifest).get_tool("say_hello")
+    assert isinstance(tool.callable, LazyCallable)
+    assert tool.read
+
+    assert toolkit_manifest(Toolkit(name="local", tools=ToolSet({Tool(callable=local)}))) is None
+
+
+def test_cached_toolkits_load_without_importing(tmp_path):
+    path = tmp_path / "manifest-cache.json"
+    cache = ManifestCache(path)
+    [toolkit] = discovery.discover_toolkits(cache=cache)
+    cache.save()
+    assert json.loads(path.read_text())["version"] == MANIFEST_CACHE_VERSION
+
+    sys.modules.pop(LAZY_MODULE, None)
+    cache = ManifestCache(path)
+    [cached] = discovery.discover_toolkits(cache=cache)
+    assert cached.model_dump_json() == toolkit.model_dump_json()
+    # Listing the toolkit uses the cached input schemas rather than importing the tools.
+    assert LAZY_MODULE not in sys.modules
+
+    # Nothing changed, so revalidating loads the entry point but replaces nothing.
+    assert list(discovery.revalidate_toolkits(cache)) == []
+    assert LAZY_MODULE in sys.modules
+
+
+def test_stale_cache_entries_are_revalidated(tmp_path):
+    path = tmp_path / "manifest-cache.json"
+    cache = ManifestCache(path)
+    list(discovery.discover_toolkits(cache=cache))
+    cache.save()
+
+    data = json.loads(path.read_text())
+    [entry] = data["entries"].values()
+    entry["manifest"]["tools"][0]["description"] = "Whisper a message."
+    path.write_text(json.dumps(data))
+
+    cache = ManifestCache(path)
+    [cached] = discovery.discover_toolkits(cache=cache)
+    assert cached.get_tool("shout").description == "Whisper a message."
+
+    [fresh] = discovery.revalidate_toolkits(cache)
+    assert fresh.get_tool("shout").description == "Shout a message."
+    cache.save()
+    [entry] = json.loads(path.read_text())["entries"].values()
+    assert entry["manifest"]["tools"][0]["description"] == "Shout a message."
+
+
+def test_changed_source_misses_the_cache(tmp_path):
+    path = tmp_path / "manifest-cache.json"
+    cache = ManifestCache(path)
+    list(discovery.discover_toolkits(cache=cache))
+    cache.save()
+
+    data = json.loads(path.read_text())
+    [entry] = data["entries"].values()
+    entry["fingerprint"]["source"] = "0" * 40
+    path.write_text(json.dumps(data))
+
+    cache = ManifestCache(path)
+    assert cache.get(ENTRY_POINT) is None
+    list(discovery.discover_toolkits(cache=cache))
+    assert LAZY_MODULE in sys.modules
+    assert cache.take_hits() == []
+
+
+def test_unreadable_cache_is_ignored(tmp_path):
+    path = tmp_path / "manifest-cache.json"
+    path.write_text("{not json")
+
+    cache = ManifestCache(path)
+    assert cache.get(ENTRY_POINT) is None
@@ -0,0 +1,43 @@
+import pytest
+
+from jupyter_server_ai_tools.metrics import ToolMetrics
+
+
+def test_track_call():
+    metrics = ToolMetrics()
+
+    with metrics.track_call("kit", "ok"):
+        assert metrics.snapshot()["tools"]["kit"]["ok"]["in_flight"] == 1
+
+    with pytest.raises(RuntimeError):
+        with metrics.track_call("kit", "broken"):
+            raise RuntimeError("boom")
+
+    tools = metrics.snapshot()["tools"]["kit"]
+    assert tools["ok"]["calls"] == 1
+    assert tools["ok"]["errors"] == 0
+    assert tools["ok"]["in_flight"] == 0
+    assert tools["ok"]["latency_count"] == 1
+    assert tools["ok"]["latency_buckets"]["+Inf"] == 1
+    assert tools["broken"]["errors"] == 1
+
+
+def test_track_lookup_and_serialization():
+    metrics = ToolMetrics()
+    metrics.track_lookup(found=True)
+    metrics.track_lookup(found=False)
+    with metrics.track_serialization():
+        pass
+
+    snapshot = metrics.snapshot()
+    assert snapshot["lookups"] == {"true": 1, "false": 1}
+    assert snapshot["serialization"]["count"] == 1
+
+
+def test_generate_latest():
+    metrics = ToolMetrics()
+    with metrics.track_call("kit", "tool"):
+        pass
+
+    text = metrics.generate_latest().decode()
+    assert 'jupyter_ai_tools_calls_total{tool="tool",toolkit="kit"} 1.0' in text
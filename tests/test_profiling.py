@@ -0,0 +1,93 @@
+import asyncio
+import marshal
+import pstats
+import time
+
+from jupyter_server_ai_tools.execution import ToolExecutor
+from jupyter_server_ai_tools.models import Tool
+from jupyter_server_ai_tools.profiling import CallProfiler
+
+
+def busy_loop(n: int):
+    return sum(i * i for i in range(n))
+
+
+async def _call(profiler, executor, tool, arguments):
+    with profiler.profile("kit", str(tool.name)) as capture:
+        return await executor.call(tool, arguments, capture)
+
+
+def _functions(profile) -> set[str]:
+    return {name for _, _, name in marshal.loads(profile.stats)}
+
+
+async def test_sampled_calls_are_profiled(tmp_path):
+    profiler = CallProfiler(sample_rate=0.5, max_profiles=2, memory=True, random=lambda: 0.2)
+    executor = ToolExecutor(max_workers=1, max_processes=1)
+    try:
+        assert await _call(profiler, executor, Tool(callable=busy_loop), {"n": 10}) == 285
+
+        async def fetch():
+            await asyncio.sleep(0)
+            return busy_loop(3)
+
+        assert await _call(profiler, executor, Tool(callable=fetch), {}) == 5
+    finally:
+        executor.shutdown()
+
+    fetch_profile, busy_profile = profiler.list_profiles()
+    assert (busy_profile.tool_name, busy_profile.reason) == ("busy_loop", "sampled")
+    assert "busy_loop" in _functions(busy_profile)
+    assert {"fetch", "busy_loop"} <= _functions(fetch_profile)
+    assert busy_profile.memory is not None and busy_profile.memory.peak > 0
+    assert busy_profile.summary()["memory"]["peak"] == busy_profile.memory.peak
+    assert "stats" not in busy_profile.summary()
+
+    # The stats are what pstats reads back from a file.
+    path = tmp_path / "busy.pstats"
+    path.write_bytes(busy_profile.stats)
+    assert pstats.Stats(str(path)).total_calls > 0  # type: ignore[attr-defined]
+
+
+async def test_process_calls_are_profiled_in_the_worker():
+    profiler = CallProfiler(sample_rate=1.0)
+    executor = ToolExecutor(max_workers=1, max_processes=1, process_start_method="spawn")
+    try:
+        tool = Tool(callable=busy_loop, execution_mode="process")
+        assert await _call(profiler, executor, tool, {"n": 10}) == 285
+    finally:
+        executor.shutdown()
+    assert "busy_loop" in _functions(profiler.list_profiles()[0])
+
+
+async def test_slow_calls_arm_the_profiler():
+    profiler = CallProfiler(slow_threshold=0.05, max_profiles=1)
+
+    def nap(seconds: float):
+        time.sleep(seconds)
+
+    executor = ToolExecutor(max_workers=1, max_processes=1)
+    try:
+        tool = Tool(callable=nap)
+        await _call(profiler, executor, tool, {"seconds": 0})
+        assert profiler.list_profiles() == []
+        await _call(profiler, executor, tool, {"seconds": 0.1})
+        assert profiler.list_profiles() == []
+
+        await _call(profiler, executor, tool, {"seconds": 0})
+        (profile,) = profiler.list_profiles()
+        assert (profile.tool_name, profile.reason) == ("nap", "slow")
+        assert profiler.get_profile(profile.id) is profile
+
+        await _call(profiler, executor, tool, {"seconds": 0})
+        assert len(profiler.list_profiles()) == 1
+    finally:
+        executor.shutdown()
+
+
+def test_profiler_is_off_by_default():
+    profiler = CallProfiler(random=lambda: 0)
+    with profiler.profile("kit", "tool") as capture:
+        assert capture is None
+    assert not profiler.enabled
+    assert profiler.list_profiles() == []
@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from jupyter_server_ai_tools.metrics import ToolMetrics
+from jupyter_server_ai_tools.models import Capability
+from jupyter_server_ai_tools.scheduling import SchedulerFullError, ToolScheduler
+
+
+async def _hold(scheduler, started, release, name, toolkit="kit", user=None, caps=None):
+    async with scheduler.slot(toolkit, user, caps or Capability.READ):
+        started.append(name)
+        await release.wait()
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+async def test_scheduler_runs_higher_priority_calls_first():
+    scheduler = ToolScheduler(max_concurrent=1)
+    started: list[str] = []
+    release = asyncio.Event()
+
+    tasks = [asyncio.create_task(_hold(scheduler, started, release, "first"))]
+    await _settle()
+    tasks.append(
+        asyncio.create_task(_hold(scheduler, started, release, "execute", caps=Capability.EXECUTE))
+    )
+    tasks.append(asyncio.create_task(_hold(scheduler, started, release, "read")))
+    await _settle()
+    assert started == ["first"]
+    assert scheduler.queued == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert started == ["first", "read", "execute"]
+    assert (scheduler.running, scheduler.queued) == (0, 0)
+
+
+async def test_scheduler_per_user_and_per_toolkit_limits():
+    scheduler = ToolScheduler(max_per_user=1, max_per_toolkit=2)
+    started: list[str] = []
+    release = asyncio.Event()
+
+    tasks = [
+        asyncio.create_task(_hold(scheduler, started, release, "ada-1", user="ada")),
+        asyncio.create_task(_hold(scheduler, started, release, "ada-2", user="ada")),
+        asyncio.create_task(_hold(scheduler, started, release, "bob-1", user="bob")),
+        asyncio.create_task(_hold(scheduler, started, release, "cy-1", user="cy")),
+        asyncio.create_task(_hold(scheduler, started, release, "other", "other", "cy")),
+    ]
+    await _settle()
+    # ada's second call waits for her first, and "kit" allows two calls at once;
+    # neither holds back cy's call to another toolkit.
+    assert started == ["ada-1", "bob-1", "other"]
+    assert scheduler.queued == 2
+
+    release.set()
+    await asyncio.gather(*tasks)
+    assert sorted(started) == ["ada-1", "ada-2", "bob-1", "cy-1", "other"]
+
+
+async def test_scheduler_rejects_when_queue_is_full():
+    metrics = ToolMetrics()
+    scheduler = ToolScheduler(max_concurrent=1, max_queued=1, metrics=metrics)
+    started: list[str] = []
+    release = asyncio.Event()
+
+    tasks = [
+        asyncio.create_task(_hold(scheduler, started, release, "running")),
+        asyncio.create_task(_hold(scheduler, started, release, "queued")),
+    ]
+    await _settle()
+    with pytest.raises(SchedulerFullError) as e:
+        async with scheduler.slot("kit"):
+            pass
+    assert e.value.retry_after >= 1
+    assert metrics.snapshot()["scheduler"]["queued"] == 1
+
+    release.set()
+    await asyncio.gather(*tasks)
+    snapshot = metrics.snapshot()["scheduler"]
+    assert (snapshot["queued"], snapshot["rejected"], snapshot["wait_count"]) == (0, 1, 2)
+
+
+async def test_scheduler_cancelled_waiter_leaves_the_queue():
+    scheduler = ToolScheduler(max_concurrent=1)
+    started: list[str] = []
+    release = asyncio.Event()
+
+    running = asyncio.create_task(_hold(scheduler, started, release, "running"))
+    await _settle()
+    waiting = asyncio.create_task(_hold(scheduler, started, release, "waiting"))
+    await _settle()
+    waiting.cancel()
+    await _settle()
+    assert scheduler.queued == 0
+
+    release.set()
+    await running
+    assert started == ["running"]
+    assert scheduler.running == 0
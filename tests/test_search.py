@@ -0,0 +1,109 @@
+from jupyter_server_ai_tools.models import (
+    Capability,
+    RegistryChange,
+    Tool,
+    Toolkit,
+    ToolkitRegistry,
+    ToolkitSet,
+    ToolSet,
+)
+from jupyter_server_ai_tools.search import ToolSearchIndex, tokenize
+
+
+def read_file(path: str):
+    """Read the contents of a file."""
+
+
+def write_file(path: str, content: str):
+    """Write text to a file, replacing it."""
+
+
+def list_kernels():
+    """List the running kernels."""
+
+
+def getHTTPResponse(url: str):
+    """Fetch a web page."""
+
+
+def _files_toolkit():
+    return Toolkit(
+        name="files",
+        tools=ToolSet(
+            {
+                Tool(callable=read_file, read=True),
+                Tool(callable=write_file, write=True),
+            }
+        ),
+    )
+
+
+def test_tokenize():
+    assert tokenize("getHTTPResponse_v2") == ["get", "http", "response", "v", "2"]
+    assert tokenize("Read the file.") == ["read", "the", "file"]
+
+
+def test_search_ranks_name_matches_first():
+    index = ToolSearchIndex()
+    index.add_toolkit(_files_toolkit())
+    index.add_toolkit(Toolkit(name="kernels", tools=ToolSet({Tool(callable=list_kernels)})))
+
+    hits = index.search("read file")
+    assert [(hit.toolkit_name, hit.tool_name) for hit in hits] == [
+        ("files", "read_file"),
+        ("files", "write_file"),
+    ]
+    assert hits[0].score > hits[1].score
+    # Parameter names and split camel case words are indexed too.
+    index.add_tool("web", Tool(callable=getHTTPResponse))
+    assert [hit.tool_name for hit in index.search("url")] == ["getHTTPResponse"]
+    assert [hit.tool_name for hit in index.search("http")] == ["getHTTPResponse"]
+    assert index.search("nothing matches") == []
+
+
+def test_search_filters_by_capability():
+    index = ToolSearchIndex()
+    index.add_toolkit(_files_toolkit())
+
+    assert [hit.tool_name for hit in index.search("file", any_of=Capability.WRITE)] == [
+        "write_file"
+    ]
+    assert index.search("file", all_of=Capability.READ | Capability.WRITE) == []
+
+
+def test_search_index_follows_registry_changes():
+    registry = ToolkitRegistry(toolkits=ToolkitSet())
+    index = ToolSearchIndex()
+    registry.add_listener(lambda change: index.apply_change(change, registry.snapshot))
+
+    registry.register_toolkit(_files_toolkit())
+    assert len(index) == 2
+
+    registry.remove_tool("files", "write_file")
+    assert [hit.tool_name for hit in index.search("file")] == ["read_file"]
+
+    registry.add_tool("files", Tool(callable=list_kernels, read=True))
+    assert [hit.tool_name for hit in index.search("kernels")] == ["list_kernels"]
+
+    registry.unregister_toolkit("files")
+    assert len(index) == 0
+    assert index.search("file") == []
+
+    index.apply_change(RegistryChange(99, "removed", "missing"), registry.snapshot)
+
+
+def test_search_indexes_parameter_names_on_the_next_search():
+    index = ToolSearchIndex()
+    toolkit = _files_toolkit()
+    index.add_toolkit(toolkit)
+    index.add_tool("web", Tool(callable=getHTTPResponse))
+
+    # Parameter names are indexed by the next search, without building any schema.
+    assert [hit.tool_name for hit in index.search("content")] == ["write_file"]
+    assert all(tool.built_input_schema is None for tool in toolkit.tools)
+
+    # Tools removed before that search aren't brought back by it.
+    index.add_tool("web", Tool(callable=getHTTPResponse, name="fetch"))
+    index.remove_toolkit("web")
+    assert index.search("url") == []
+    assert len(index) == 2
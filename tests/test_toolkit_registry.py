@@ -1,6 +1,18 @@
+import json
+import threading
+
 import pytest
+from pydantic import ValidationError
 
-from jupyter_server_ai_tools.models import Tool, Toolkit, ToolkitRegistry, ToolkitSet, ToolSet
+from jupyter_server_ai_tools.models import (
+    Capability,
+    RegistryChange,
+    Tool,
+    Toolkit,
+    ToolkitRegistry,
+    ToolkitSet,
+    ToolSet,
+)
 
 
 def test_toolkit_find_tools():
@@ -122,3 +134,345 @@ def test_toolkit_registry_get_toolkit_no_matching_tools():
     result = registry.get_toolkit("TestToolkit", write=True)
     assert result.name == "TestToolkit"
     assert len(result.tools) == 0
+
+
+def test_toolkit_find_tools_any_of_all_of():
+    def read_func():
+        pass
+
+    def read_write_func():
+        pass
+
+    def delete_func():
+        pass
+
+    read_tool = Tool(callable=read_func, read=True)
+    read_write_tool = Tool(callable=read_write_func, read=True, write=True)
+    delete_tool = Tool(callable=delete_func, delete=True)
+
+    toolkit = Toolkit(name="TestToolkit", tools=ToolSet({read_tool, read_write_tool}))
+    toolkit.add_tool(delete_tool)
+
+    assert toolkit.find_tools(read=True) == {read_tool}
+    assert toolkit.find_tools(any_of=Capability.READ) == {read_tool, read_write_tool}
+    assert toolkit.find_tools(all_of=Capability.READ | Capability.WRITE) == {read_write_tool}
+    assert toolkit.find_tools(any_of=Capability.WRITE | Capability.DELETE) == {
+        read_write_tool,
+        delete_tool,
+    }
+    assert toolkit.find_tools(any_of=Capability.EXECUTE) == set()
+
+
+def test_toolkit_find_tools_sees_tools_added_directly():
+    def read_func():
+        pass
+
+    tool = Tool(callable=read_func, read=True)
+    toolkit = Toolkit(name="TestToolkit")
+    toolkit.tools.add(tool)
+
+    assert toolkit.find_tools(read=True) == {tool}
+
+
+def test_toolkit_registry_get_toolkit_all_of():
+    def read_func():
+        pass
+
+    def read_write_func():
+        pass
+
+    read_tool = Tool(callable=read_func, read=True)
+    read_write_tool = Tool(callable=read_write_func, read=True, write=True)
+    toolkit = Toolkit(name="TestToolkit", tools=ToolSet({read_tool, read_write_tool}))
+
+    registry = ToolkitRegistry(toolkits=ToolkitSet({toolkit}))
+
+    result = registry.get_toolkit("TestToolkit", all_of=Capability.READ)
+    assert result.tools == {read_tool, read_write_tool}
+
+
+def test_toolkit_registry_iter_toolkits():
+    def read_func():
+        pass
+
+    def write_func():
+        pass
+
+    read_tool = Tool(callable=read_func, read=True)
+    write_tool = Tool(callable=write_func, write=True)
+
+    registry = ToolkitRegistry(toolkits=ToolkitSet())
+    registry.register_toolkit(Toolkit(name="b", tools=ToolSet({read_tool})))
+    registry.register_toolkit(Toolkit(name="a", tools=ToolSet({write_tool})))
+    registry.register_toolkit(Toolkit(name="c"))
+
+    assert [t.name for t in registry.iter_toolkits()] == ["a", "b", "c"]
+    assert [t.name for t in registry.iter_toolkits(after="a")] == ["b", "c"]
+    assert [t.name for t in registry.iter_toolkits(["c", "a", "missing"])] == ["a", "c"]
+    assert [t.name for t in registry.iter_toolkits(any_of=Capability.READ)] == ["b"]
+
+
+def test_tool_input_schema():
+    def greet(name: str, times: int = 1, **options):
+        """Say hello"""
+
+    tool = Tool(callable=greet)
+    schema = tool.input_schema
+
+    assert schema["required"] == ["name"]
+    assert schema["properties"]["name"]["type"] == "string"
+    assert schema["properties"]["times"]["type"] == "integer"
+    assert tool.input_schema is schema
+    assert json.loads(tool.model_dump_json())["inputSchema"] == schema
+
+
+def test_tool_validate_arguments():
+    def greet(name: str, times: int = 1, json: dict | None = None):
+        pass
+
+    tool = Tool(callable=greet)
+
+    assert tool.validate_arguments({"name": "Ada", "times": "2"}) == {"name": "Ada", "times": 2}
+    assert tool.validate_arguments({"name": "Ada", "json": {}}) == {"name": "Ada", "json": {}}
+    with pytest.raises(ValidationError):
+        tool.validate_arguments({"times": 2})
+    with pytest.raises(ValidationError):
+        tool.validate_arguments({"name": "Ada", "unknown": True})
+
+
+def test_toolkit_registry_get_toolkit_reuses_views():
+    def read_func():
+        pass
+
+    def other_read_func():
+        pass
+
+    toolkit = Toolkit(name="TestToolkit", description="Tools for tests")
+    toolkit.add_tool(Tool(callable=read_func, read=True))
+    registry = ToolkitRegistry(toolkits=ToolkitSet())
+    registry.register_toolkit(toolkit)
+
+    view = registry.get_toolkit("TestToolkit", read=True)
+    assert registry.get_toolkit("TestToolkit", read=True) is view
+    assert json.loads(view.model_dump_json()) == json.loads(toolkit.model_dump_json())
+    with pytest.raises(AttributeError):
+        view.name = "Renamed"
+
+    toolkit.add_tool(Tool(callable=other_read_func, read=True))
+    refreshed = registry.get_toolkit("TestToolkit", read=True)
+    assert refreshed is not view
+    assert {tool.name for tool in refreshed.tools} == {"read_func", "other_read_func"}
+
+
+def test_toolkit_registry_list_toolkits_is_shared_until_changed():
+    registry = ToolkitRegistry(toolkits=ToolkitSet())
+    registry.register_toolkit(Toolkit(name="a"))
+
+    toolkits = registry.list_toolkits()
+    assert registry.list_toolkits() is toolkits
+    assert isinstance(toolkits, frozenset)
+
+    registry.register_toolkit(Toolkit(name="b"))
+    assert {toolkit.name for toolkit in registry.list_toolkits()} == {"a", "b"}
+
+
+def test_toolkit_registry_change_log():
+    def read_func():
+        pass
+
+    def write_func():
+        pass
+
+    registry = ToolkitRegistry(toolkits=ToolkitSet(), max_changes=3)
+    registry.register_toolkit(Toolkit(name="a"))
+    registry.add_tool("a", Tool(callable=read_func, read=True))
+    registry.replace_tool("a", Tool(callable=read_func, read=True, write=True))
+    registry.remove_tool("a", "read_func")
+    registry.replace_toolkit(Toolkit(name="a", tools=ToolSet({Tool(callable=write_func)})))
+
+    assert registry.generation == 5
+    assert registry.changes_since(5) == []
+    assert registry.changes_since(3) == [
+        RegistryChange(4, "removed", "a", "read_func"),
+        RegistryChange(5, "replaced", "a"),
+    ]
+    changes = registry.changes_since(2)
+    assert changes is not None and changes[0] == RegistryChange(3, "replaced", "a", "read_func")
+    # Older changes were dropped from the log, as were changes from the future.
+    assert registry.changes_since(1) is None
+    assert registry.changes_since(6) is None
+
+    registry.unregister_toolkit("a")
+    assert registry.changes_since(5) == [RegistryChange(6, "removed", "a")]
+    with pytest.raises(LookupError):
+        registry.get_toolkit("a")
+
+
+def test_toolkit_registry_register_toolkits():
+    registry = ToolkitRegistry(toolkits=ToolkitSet())
+    registry.register_toolkit(Toolkit(name="a"))
+    snapshot = registry.snapshot
+
+    with pytest.raises(ValueError, match="'b' already exists"):
+        registry.register_toolkits([Toolkit(name="b"), Toolkit(name="b")])
+    assert registry.snapshot is snapshot
+
+    registry.register_toolkits([Toolkit(name="c"), Toolkit(name="b")])
+    assert registry.generation == 3
+    assert registry.changes_since(1) == [
+        RegistryChange(2, "added", "c"),
+        RegistryChange(3, "added", "b"),
+    ]
+    assert registry.snapshot.sorted_names == ("a", "b", "c")
+    assert {toolkit.name for toolkit in registry.toolkits} == {"a", "b", "c"}
+    # The old snapshot is unchanged, including the parts built on first read.
+    assert snapshot.sorted_names == ("a",)
+
+
+def test_toolkit_registry_copies_toolkits_changed_in_place():
+    def read_func():
+        pass
+
+    toolkit = Toolkit(name="a")
+    registry = ToolkitRegistry(toolkits=ToolkitSet())
+    registry.register_toolkit(toolkit)
+    listing = registry.get_listing()
+
+    toolkit.add_tool(Tool(callable=read_func, read=True))
+    assert registry.generation == 2
+    assert registry.changes_since(1) == [RegistryChange(2, "added", "a", "read_func")]
+    assert registry.get_listing().etag != listing.etag
+    assert "read_func" in registry.get_listing().body.decode()
+    # Readers holding the toolkit don't see it change under them.
+    assert not toolkit.tools
+
+    # Later changes through the same toolkit still reach the registered copy.
+    toolkit.remove_tool("read_func")
+    assert registry.changes_since(2) == [RegistryChange(3, "removed", "a", "read_func")]
+    assert not registry.snapshot.by_name["a"].tools
+
+    # Once replaced, the old toolkit no longer belongs to the registry.
+    registry.replace_toolkit(Toolkit(name="a"))
+    toolkit.add_tool(Tool(callable=read_func, read=True))
+    assert registry.generation == 4
+    assert not registry.snapshot.by_name["a"].tools
+    assert toolkit.get_tool("read_func")
+
+
+def test_toolkit_registry_toolkits_is_read_only():
+    def read_func():
+        pass
+
+    toolkit = Toolkit(name="a", tools=ToolSet({Tool(callable=read_func)}))
+    registry = ToolkitRegistry(toolkits=ToolkitSet({toolkit}))
+
+    assert registry.toolkits == {toolkit}
+    with pytest.raises(AttributeError):
+        registry.toolkits.add(Toolkit(name="b"))  # type: ignore[attr-defined]
+    assert registry.model_dump()["toolkits"] == [toolkit.model_dump()]
+    assert json.loads(registry.model_dump_json()) == {
+        "toolkits": [json.loads(toolkit.model_dump_json())]
+    }
+
+
+def test_toolkit_registry_tools_added_to_registered_toolkits_from_threads():
+    registry = ToolkitRegistry(toolkits=ToolkitSet())
+    registry.register_toolkit(Toolkit(name="a"))
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(200):
+                tool = Tool(callable=read_func, name=f"{worker}_{i}", read=True)
+                registry.snapshot.by_name["a"].add_tool(tool)
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(500):
+                toolkit = registry.snapshot.by_name["a"]
+                for tool in toolkit.tools:
+                    tool.name
+                toolkit.find_tools(read=True)
+                registry.get_toolkit("a", read=True)
+                registry.get_listing()
+        except Exception as e:
+            errors.append(e)
+
+    def read_func():
+        pass
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(registry.snapshot.by_name["a"].tools) == 4 * 200
+    assert registry.generation == 1 + 4 * 200
+
+
+def test_toolkit_registry_concurrent_readers_and_writers():
+    def read_func():
+        pass
+
+    registry = ToolkitRegistry(toolkits=ToolkitSet())
+    errors = []
+
+    def write(worker):
+        try:
+            for i in range(200):
+                name = f"{worker}_{i}"
+                registry.register_toolkit(Toolkit(name=name))
+                registry.add_tool(name, Tool(callable=read_func, read=True))
+                if i % 2:
+                    registry.unregister_toolkit(name)
+        except Exception as e:
+            errors.append(e)
+
+    def read():
+        try:
+            for _ in range(200):
+                for toolkit in registry.list_toolkits():
+                    toolkit.name
+                list(registry.iter_toolkits(any_of=Capability.READ))
+                registry.get_listing()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(w,)) for w in range(4)]
+    threads += [threading.Thread(target=read) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert registry.generation == 4 * (200 * 2 + 100)
+    assert len(registry.list_toolkits()) == 4 * 100
+    assert all(len(toolkit.tools) == 1 for toolkit in registry.list_toolkits())
+
+
+def test_toolkit_registry_replace_keeps_old_snapshot():
+    def read_func():
+        pass
+
+    def write_func():
+        pass
+
+    registry = ToolkitRegistry(toolkits=ToolkitSet())
+    registry.register_toolkit(Toolkit(name="a", tools=ToolSet({Tool(callable=read_func)})))
+    before = registry.snapshot
+
+    registry.replace_toolkit(Toolkit(name="a", tools=ToolSet({Tool(callable=write_func)})))
+    registry.replace_tool("a", Tool(callable=write_func, write=True))
+
+    assert [tool.name for tool in before.by_name["a"].tools] == ["read_func"]
+    assert registry.get_tool("a", "write_func").write
+    assert registry.changes_since(before.generation) == [
+        RegistryChange(2, "replaced", "a"),
+        RegistryChange(3, "replaced", "a", "write_func"),
+    ]